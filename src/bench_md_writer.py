@@ -0,0 +1,85 @@
+"""
+Benchmark for bulk Markdown rendering
+Times MarkdownWriter on synthetic articles: one file at a time, bulk in-process and bulk in a process pool
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+from typing import List, Dict, Any
+from datetime import datetime
+from pathlib import Path
+from config import OUTPUT_DIR
+from md_writer import MarkdownWriter
+
+def synthetic_articles(count: int) -> List[Dict[str, Any]]:
+    """LLM-processed articles shaped like output/llm_processed.json"""
+    paragraph = "Kubernetes operators automate day-two operations for stateful services. " * 12
+    articles = []
+    for i in range(count):
+        articles.append({
+            'title': f"Original article {i}",
+            'seo_title': f"Scaling Platform Engineering Part {i % 500}",  # Repeats exercise slug de-duplication
+            'summary': f"Article {i} explains operator patterns. It covers reconciliation loops.",
+            'tag': ['kubernetes', 'llm', 'react', 'postgresql'][i % 4],
+            'url': f"https://example.com/articles/{i}",
+            'source_domain': 'example.com',
+            'author': 'Bench Author',
+            'published_date': '2025-06-10T08:00:00Z',
+            'crawled_at': '2025-06-10T09:00:00Z',
+            'llm_processed_at': '2025-06-10T09:05:00Z',
+            'content': '\n\n'.join([paragraph] * 6),
+            'word_count': 900,
+            'extraction_method': 'mercury',
+            'llm_model': 'gpt-4o',
+            'keyword': 'kubernetes',
+            'json_ld': {'@context': 'https://schema.org', '@type': 'TechArticle', 'headline': f"Article {i}"}
+        })
+    return articles
+
+def time_run(name: str, articles: List[Dict[str, Any]], run) -> Dict[str, Any]:
+    """Render into a fresh directory and report wall time"""
+    with tempfile.TemporaryDirectory() as tmp:
+        # A run directory inside the temp root keeps the slug registry away from docs/auto
+        writer = MarkdownWriter(docs_dir=Path(tmp) / 'run')
+        start = time.perf_counter()
+        created = run(writer, articles)
+        elapsed = time.perf_counter() - start
+    return {
+        'variant': name,
+        'files': len(created),
+        'seconds': round(elapsed, 3),
+        'articles_per_sec': round(len(created) / elapsed, 1) if elapsed else 0.0
+    }
+
+def main():
+    """Main benchmark execution"""
+    parser = argparse.ArgumentParser(description="Benchmark bulk Markdown rendering")
+    parser.add_argument('--articles', type=int, default=10000, help="Number of synthetic articles")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 2, help="Process pool size for the pooled variant")
+    args = parser.parse_args()
+
+    articles = synthetic_articles(args.articles)
+    variants = [
+        ('one file at a time', lambda writer, items: [path for path in map(writer.create_markdown_file, items) if path]),
+        ('bulk in-process', lambda writer, items: writer.process_articles(items, workers=0)),
+        (f"bulk, {args.workers} processes", lambda writer, items: writer.process_articles(items, workers=args.workers)),
+    ]
+
+    results = []
+    for name, run in variants:
+        results.append(time_run(name, articles, run))
+
+    print(f"\n{args.articles} articles")
+    print(f"{'variant':<24} {'files':>7} {'seconds':>9} {'articles/s':>11}")
+    for row in results:
+        print(f"{row['variant']:<24} {row['files']:>7} {row['seconds']:>9} {row['articles_per_sec']:>11}")
+
+    output_file = OUTPUT_DIR / f"bench_md_writer_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    with open(output_file, 'w', encoding='utf-8') as f:
+        json.dump({'articles': args.articles, 'workers': args.workers, 'results': results}, f, indent=2)
+    print(f"Benchmark results saved to: {output_file}")
+
+if __name__ == "__main__":
+    main()
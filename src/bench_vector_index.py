@@ -0,0 +1,99 @@
+"""
+Benchmark for quantized vector search
+Compares recall@k, resident memory and latency of int8 + rerank against full-precision search
+"""
+import argparse
+import json
+import tempfile
+import time
+from typing import List, Dict, Any
+from datetime import datetime
+import numpy as np
+from config import OUTPUT_DIR, VECTOR_SNAPSHOT_DIR
+from vector_index import VectorIndex
+
+def synthetic_corpus(count: int, dimension: int, seed: int = 0) -> np.ndarray:
+    """Clustered vectors; uniform noise would make every neighbour equally far away"""
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(max(1, count // 50), dimension)).astype(np.float32)
+    assignments = rng.integers(0, len(centers), size=count)
+    return centers[assignments] + 0.5 * rng.normal(size=(count, dimension)).astype(np.float32)
+
+def make_queries(corpus: np.ndarray, count: int, seed: int = 1) -> np.ndarray:
+    """Perturbed corpus rows stand in for real queries about indexed topics"""
+    rng = np.random.default_rng(seed)
+    rows = corpus[rng.integers(0, len(corpus), size=count)]
+    noise = rng.normal(size=rows.shape).astype(np.float32) * np.abs(rows).mean()
+    return rows + noise
+
+def measure(index: VectorIndex, queries: np.ndarray, k: int, truth: List[set]) -> Dict[str, Any]:
+    """Recall@k against exact search plus latency percentiles"""
+    latencies = []
+    hits = 0
+    for query, expected in zip(queries, truth):
+        start = time.perf_counter()
+        results = index.search(query, limit=k, threshold=-1.0)
+        latencies.append((time.perf_counter() - start) * 1000)
+        hits += len(expected & {result['id'] for result in results})
+
+    values = np.array(latencies)
+    return {
+        'recall_at_k': round(hits / (k * len(queries)), 4),
+        'p50_ms': round(float(np.percentile(values, 50)), 3),
+        'p95_ms': round(float(np.percentile(values, 95)), 3),
+    }
+
+def resident_bytes(index: VectorIndex) -> int:
+    """Bytes the scan touches on every query (memory-mapped rerank rows are read on demand)"""
+    if index.codes is not None:
+        return int(index.codes.nbytes + index.scales.nbytes)
+    return int(index.matrix.nbytes)
+
+def main():
+    """Main benchmark execution"""
+    parser = argparse.ArgumentParser(description="Benchmark int8 + rerank against full-precision search")
+    parser.add_argument('--synthetic', type=int, default=0, help="Use N synthetic vectors instead of the current snapshot")
+    parser.add_argument('--dimension', type=int, default=1536, help="Dimension for synthetic vectors")
+    parser.add_argument('--queries', type=int, default=200, help="Number of benchmark queries")
+    parser.add_argument('-k', type=int, default=10, help="Results per query")
+    args = parser.parse_args()
+
+    source = VectorIndex.from_snapshot(VECTOR_SNAPSHOT_DIR) if not args.synthetic else None
+    if source is not None and len(source):
+        corpus = np.asarray(source.matrix, dtype=np.float32)
+        corpus_name = f"snapshot {source.snapshot_version}"
+    else:
+        corpus = synthetic_corpus(args.synthetic or 50000, args.dimension)
+        corpus_name = f"synthetic {len(corpus)}x{corpus.shape[1]}"
+
+    ids = [str(i) for i in range(len(corpus))]
+    metadata = [{} for _ in ids]
+    queries = make_queries(corpus, args.queries)
+
+    exact = VectorIndex()
+    exact.upsert(ids, corpus, metadata)
+    truth = [{result['id'] for result in exact.search(query, limit=args.k, threshold=-1.0)} for query in queries]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Reduced-precision variants are loaded the way workers load them: memory-mapped from a snapshot
+        exact.save_snapshot(tmp, 'float16', dtype='float16')
+        variants = [('float32 exact', exact), ('float16 exact (mmap)', VectorIndex.from_snapshot(tmp))]
+        exact.save_snapshot(tmp, 'float32', dtype='float32')
+        for factor in (1, 2, 4, 10):
+            variants.append((f"int8 + rerank x{factor} (mmap)", VectorIndex.from_snapshot(tmp, quantization='int8', rerank_factor=factor)))
+
+        print(f"Corpus: {corpus_name}, {args.queries} queries, k={args.k}")
+        print(f"{'variant':<28} {'recall@k':>9} {'scan MB':>9} {'p50 ms':>8} {'p95 ms':>8}")
+        results = []
+        for name, index in variants:
+            row = {'variant': name, 'scan_mb': round(resident_bytes(index) / 1e6, 2), **measure(index, queries, args.k, truth)}
+            results.append(row)
+            print(f"{name:<28} {row['recall_at_k']:>9} {row['scan_mb']:>9} {row['p50_ms']:>8} {row['p95_ms']:>8}")
+
+    output_file = OUTPUT_DIR / f"bench_vector_index_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    with open(output_file, 'w', encoding='utf-8') as f:
+        json.dump({'corpus': corpus_name, 'queries': args.queries, 'k': args.k, 'results': results}, f, indent=2)
+    print(f"Benchmark results saved to: {output_file}")
+
+if __name__ == "__main__":
+    main()
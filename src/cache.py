@@ -0,0 +1,173 @@
+"""
+In-process and on-disk caches for the search API
+"""
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+import numpy as np
+
+def normalize_query(query: str) -> str:
+    """Normalize a search query so trivially different spellings share a cache entry"""
+    # NFKC folds full-width/half-width forms common in Japanese input
+    query = unicodedata.normalize('NFKC', query)
+    return ' '.join(query.lower().split())
+
+class LRUCache:
+    """Thread-safe LRU cache with a per-entry time-to-live"""
+
+    def __init__(self, max_size: int = 1024, ttl: float = 3600):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Any) -> Optional[Any]:
+        """Return the cached value or None if missing/expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def set(self, key: Any, value: Any):
+        """Insert a value, evicting the least recently used entry when full"""
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """Drop every entry"""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters for monitoring"""
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self._entries),
+            'max_size': self.max_size,
+            'ttl_seconds': self.ttl,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': round(self.hits / lookups, 4) if lookups else 0.0
+        }
+
+class SQLiteEmbeddingCache:
+    """Embedding cache in a SQLite file shared by all workers on a host"""
+
+    def __init__(self, path: str, ttl: float = 86400):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), timeout=5, check_same_thread=False)
+        # WAL lets several uvicorn workers read while one writes
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS query_embeddings ('
+            'key TEXT PRIMARY KEY, embedding BLOB NOT NULL, created_at REAL NOT NULL)'
+        )
+        self._conn.commit()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[List[float]]:
+        """Return a stored embedding or None if missing/expired"""
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT embedding FROM query_embeddings WHERE key = ? AND created_at > ?',
+                (key, time.time() - self.ttl)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return np.frombuffer(row[0], dtype=np.float32).tolist()
+
+    def set(self, key: str, embedding: List[float]):
+        """Store an embedding as packed float32"""
+        blob = np.asarray(embedding, dtype=np.float32).tobytes()
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO query_embeddings (key, embedding, created_at) VALUES (?, ?, ?)',
+                (key, blob, time.time())
+            )
+            self._conn.commit()
+
+    def purge_expired(self):
+        """Delete expired rows"""
+        with self._lock:
+            self._conn.execute('DELETE FROM query_embeddings WHERE created_at <= ?', (time.time() - self.ttl,))
+            self._conn.commit()
+
+    @property
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters for monitoring"""
+        lookups = self.hits + self.misses
+        return {
+            'path': str(self.path),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': round(self.hits / lookups, 4) if lookups else 0.0
+        }
+
+class QueryEmbeddingCache:
+    """Two-tier query → embedding cache: in-process LRU backed by optional SQLite"""
+
+    def __init__(self, model_tag: str, max_size: int = 1024, ttl: float = 86400, shared_path: Optional[str] = None):
+        # Keys include the model tag so a backend switch never serves stale vectors
+        self.model_tag = model_tag
+        self.memory = LRUCache(max_size=max_size, ttl=ttl)
+        self.shared = SQLiteEmbeddingCache(shared_path, ttl=ttl) if shared_path else None
+
+    def _key(self, query: str) -> str:
+        return f"{self.model_tag}|{normalize_query(query)}"
+
+    def get(self, query: str) -> Optional[List[float]]:
+        """Look up a query in memory first, then in the shared tier"""
+        key = self._key(query)
+        embedding = self.memory.get(key)
+        if embedding is None and self.shared is not None:
+            embedding = self.shared.get(key)
+            if embedding is not None:
+                self.memory.set(key, embedding)
+        return embedding
+
+    def set(self, query: str, embedding: List[float]):
+        """Store a query embedding in every tier"""
+        key = self._key(query)
+        self.memory.set(key, embedding)
+        if self.shared is not None:
+            self.shared.set(key, embedding)
+
+    @property
+    def stats(self) -> Dict[str, Any]:
+        """Combined statistics; overall hit ratio counts a hit in either tier"""
+        memory_stats = self.memory.stats
+        lookups = memory_stats['hits'] + memory_stats['misses']
+        hits = memory_stats['hits'] + (self.shared.hits if self.shared else 0)
+        return {
+            'hit_ratio': round(hits / lookups, 4) if lookups else 0.0,
+            'memory': memory_stats,
+            'shared': self.shared.stats if self.shared else None
+        }
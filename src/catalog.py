@@ -0,0 +1,281 @@
+"""
+Persistent article catalog and the site-wide pages generated from it
+Each Markdown run appends its articles to docs/auto/_index/catalog.jsonl; per-tag pages,
+monthly archives and the RSS feed are then updated for the new entries only
+"""
+import argparse
+import json
+import os
+import re
+from collections import defaultdict
+from typing import List, Dict, Any, Optional, Set
+from datetime import datetime, timezone
+from email.utils import format_datetime
+from pathlib import Path
+from xml.sax.saxutils import escape
+from jinja2 import Environment, FileSystemLoader
+from slugify import slugify
+from config import DOCS_DIR, INDEX_DIR, TOPICS_DIR, ARCHIVE_DIR, TEMPLATES_DIR, PROJECT_ROOT, SITE_URL, RSS_ITEMS
+
+LISTING_START = '<!-- listing:start -->'
+LISTING_END = '<!-- listing:end -->'
+FEED_PATH = PROJECT_ROOT / "static" / "rss.xml"
+TAIL_CHUNK_BYTES = 1 << 16
+
+def catalog_entry(article: Dict[str, Any], path: Path, slug: str, date: datetime) -> Dict[str, Any]:
+    """Catalog record for a generated page; path may be absolute or relative to docs/auto"""
+    path = Path(path)
+    if path.is_absolute():
+        path = path.relative_to(DOCS_DIR)
+    summary = article.get('summary') or ''
+    return {
+        'path': path.as_posix(),
+        'slug': slug,
+        'title': article.get('seo_title') or article.get('title', 'Untitled'),
+        'summary': summary.split('.')[0] + '.' if summary else '',
+        'tag': article.get('tag') or 'development',
+        'date': date.strftime('%Y-%m-%d'),
+        'published_date': article.get('published_date') or None,
+        'url': article.get('url', ''),
+        'source_domain': article.get('source_domain', '')
+    }
+
+class ArticleCatalog:
+    """Append-only JSONL catalog plus incremental tag, archive and RSS generation"""
+
+    def __init__(self, catalog_path: Optional[Path] = None):
+        self.catalog_path = Path(catalog_path) if catalog_path else INDEX_DIR / 'catalog.jsonl'
+
+        self.jinja_env = Environment(
+            loader=FileSystemLoader(str(TEMPLATES_DIR)),
+            trim_blocks=True,
+            lstrip_blocks=True
+        )
+
+    def append(self, entries: List[Dict[str, Any]]):
+        """Append entries in one buffered write"""
+        if not entries:
+            return
+        self.catalog_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.catalog_path, 'a', encoding='utf-8') as f:
+            f.write(''.join(json.dumps(entry, ensure_ascii=False) + '\n' for entry in entries))
+
+    def read_all(self) -> List[Dict[str, Any]]:
+        """Every catalog entry in append order (only needed for a rebuild)"""
+        if not self.catalog_path.exists():
+            return []
+        with open(self.catalog_path, 'r', encoding='utf-8') as f:
+            return [json.loads(line) for line in f if line.strip()]
+
+    def published_urls(self) -> Set[str]:
+        """Source URLs of every published article; discovery skips these"""
+        urls = set()
+        if not self.catalog_path.exists():
+            return urls
+        with open(self.catalog_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    url = json.loads(line).get('url')
+                    if url:
+                        urls.add(url)
+        return urls
+
+    def read_tail(self, count: int) -> List[Dict[str, Any]]:
+        """Last count entries, reading backwards from the end of the file"""
+        if count <= 0 or not self.catalog_path.exists():
+            return []
+        with open(self.catalog_path, 'rb') as f:
+            f.seek(0, os.SEEK_END)
+            position = f.tell()
+            data = b''
+            while position > 0 and data.count(b'\n') <= count:
+                step = min(TAIL_CHUNK_BYTES, position)
+                position -= step
+                f.seek(position)
+                data = f.read(step) + data
+        lines = [line for line in data.decode('utf-8', errors='ignore').splitlines() if line.strip()]
+        if position > 0:
+            lines = lines[1:]  # First line may be cut mid-record
+        return [json.loads(line) for line in lines[-count:]]
+
+    def _link(self, page: Path, entry: Dict[str, Any]) -> str:
+        """Relative Markdown link from a listing page to an article file"""
+        return Path(os.path.relpath(DOCS_DIR / entry['path'], page.parent)).as_posix()
+
+    def _render_items(self, page: Path, entries: List[Dict[str, Any]]) -> str:
+        template = self.jinja_env.get_template('listing_item.md')
+        return ''.join(template.render(entry=entry, link=self._link(page, entry)) + '\n' for entry in entries)
+
+    def _update_listing(self, page: Path, entries: List[Dict[str, Any]], title: str, description: str,
+                        sidebar_position: Optional[int] = None) -> str:
+        """Insert entries (newest first) at the top of a listing page, creating it if needed"""
+        entries = sorted(entries, key=lambda entry: entry['date'], reverse=True)
+        items = self._render_items(page, entries)
+
+        if page.exists():
+            with open(page, 'r', encoding='utf-8') as f:
+                content = f.read()
+            if LISTING_START in content:
+                content = content.replace(LISTING_START + '\n', LISTING_START + '\n' + items, 1)
+                with open(page, 'w', encoding='utf-8') as f:
+                    f.write(content)
+                return str(page)
+
+        page.parent.mkdir(parents=True, exist_ok=True)
+        content = self.jinja_env.get_template('listing.md').render(
+            title=title,
+            description=description,
+            sidebar_position=sidebar_position,
+            items=items,
+            listing_start=LISTING_START,
+            listing_end=LISTING_END
+        )
+        with open(page, 'w', encoding='utf-8') as f:
+            f.write(content + '\n')
+        return str(page)
+
+    def update_pages(self, entries: List[Dict[str, Any]]) -> List[str]:
+        """Update only the tag and month pages the new entries belong to"""
+        by_tag = defaultdict(list)
+        by_month = defaultdict(list)
+        for entry in entries:
+            by_tag[entry['tag']].append(entry)
+            by_month[entry['date'][:7]].append(entry)
+
+        pages = []
+        for tag, tag_entries in sorted(by_tag.items()):
+            pages.append(self._update_listing(
+                TOPICS_DIR / f"{slugify(tag)}.md",
+                tag_entries,
+                title=f"{tag.replace('-', ' ').title()} Articles",
+                description=f"Every curated article tagged {tag}, newest first"
+            ))
+        for month, month_entries in sorted(by_month.items()):
+            label = datetime.strptime(month, '%Y-%m').strftime('%B %Y')
+            pages.append(self._update_listing(
+                ARCHIVE_DIR / f"{month}.md",
+                month_entries,
+                title=label,
+                description=f"Articles curated in {label}",
+                sidebar_position=-int(month.replace('-', ''))  # Newest month first
+            ))
+        for directory, label in ((TOPICS_DIR, "Topics"), (ARCHIVE_DIR, "Archive")):
+            self._write_category(directory, label)
+        return pages
+
+    def _write_category(self, directory: Path, label: str):
+        """Docusaurus category with a generated index page listing the directory"""
+        category_file = directory / "_category_.json"
+        if category_file.exists() or not directory.exists():
+            return
+        with open(category_file, 'w', encoding='utf-8') as f:
+            json.dump({'label': label, 'link': {'type': 'generated-index'}}, f, indent=2)
+
+    def write_feed(self) -> str:
+        """Regenerate static/rss.xml from the newest RSS_ITEMS catalog entries"""
+        entries = list(reversed(self.read_tail(RSS_ITEMS)))
+        items = []
+        for entry in entries:
+            run_dir = Path(entry['path']).parent.as_posix()
+            link = f"{SITE_URL}/docs/auto/{run_dir}/{entry['slug']}"
+            published = datetime.strptime(entry['date'], '%Y-%m-%d').replace(tzinfo=timezone.utc)
+            items.append(
+                "    <item>\n"
+                f"      <title>{escape(entry['title'])}</title>\n"
+                f"      <link>{escape(link)}</link>\n"
+                f"      <guid isPermaLink=\"true\">{escape(link)}</guid>\n"
+                f"      <description>{escape(entry['summary'])}</description>\n"
+                f"      <category>{escape(entry['tag'])}</category>\n"
+                f"      <pubDate>{format_datetime(published)}</pubDate>\n"
+                "    </item>\n"
+            )
+
+        feed = (
+            '<?xml version="1.0" encoding="UTF-8"?>\n'
+            '<rss version="2.0">\n'
+            '  <channel>\n'
+            '    <title>Tech Insight Harvester</title>\n'
+            f'    <link>{escape(SITE_URL)}/</link>\n'
+            '    <description>Automatically curated technology articles and insights</description>\n'
+            f"{''.join(items)}"
+            '  </channel>\n'
+            '</rss>\n'
+        )
+        FEED_PATH.parent.mkdir(parents=True, exist_ok=True)
+        with open(FEED_PATH, 'w', encoding='utf-8') as f:
+            f.write(feed)
+        return str(FEED_PATH)
+
+    def publish(self, entries: List[Dict[str, Any]]) -> List[str]:
+        """Append a run's entries and refresh the pages they affect"""
+        if not entries:
+            return []
+        self.append(entries)
+        return self.update_pages(entries) + [self.write_feed()]
+
+    def rebuild(self) -> List[str]:
+        """Recreate the catalog from existing pages, then every listing page and the feed"""
+        entries = []
+        for path in sorted(DOCS_DIR.glob('*/*.md')):
+            entry = self._entry_from_page(path)
+            if entry:
+                entries.append(entry)
+
+        for directory in (TOPICS_DIR, ARCHIVE_DIR):
+            for page in directory.glob('*.md'):
+                page.unlink()
+        if self.catalog_path.exists():
+            self.catalog_path.unlink()
+
+        entries.sort(key=lambda entry: entry['date'])
+        return self.publish(entries)
+
+    def _entry_from_page(self, path: Path) -> Optional[Dict[str, Any]]:
+        """Catalog entry from a generated page's front matter and run directory"""
+        match = re.match(r'^(\d{8})-', path.name)
+        if not match:
+            return None
+        with open(path, 'r', encoding='utf-8') as f:
+            content = f.read()
+        parts = content.split('---', 2)
+        if len(parts) < 3:
+            return None
+
+        front_matter = {}
+        for line in parts[1].splitlines():
+            if ':' in line and not line.startswith(' '):
+                key, value = line.split(':', 1)
+                front_matter[key.strip()] = value.strip().strip('"\'')
+        source = re.search(r'\*\*Source:\*\* \[.*?\]\((.*?)\)', parts[2])
+
+        article = {
+            'seo_title': front_matter.get('title'),
+            'summary': front_matter.get('description', ''),
+            'tag': front_matter.get('tags', '').strip('[]').split(',')[0].strip() or None,
+            'published_date': front_matter.get('published_date'),
+            'source_domain': front_matter.get('source_domain', ''),
+            'url': source.group(1) if source else ''
+        }
+        slug = front_matter.get('slug') or path.stem[len(match.group(0)):]
+        return catalog_entry(article, path, slug, datetime.strptime(match.group(1), '%Y%m%d'))
+
+def main():
+    """Main catalog execution"""
+    parser = argparse.ArgumentParser(description="Rebuild the article catalog and site-wide index pages")
+    parser.add_argument('--rebuild', action='store_true', help="Recreate the catalog from every generated page")
+    args = parser.parse_args()
+
+    try:
+        catalog = ArticleCatalog()
+        if args.rebuild:
+            pages = catalog.rebuild()
+        else:
+            pages = [catalog.write_feed()]
+        print(f"Catalog pages written: {len(pages)}")
+
+    except Exception as e:
+        print(f"Catalog generation failed: {e}")
+        raise
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Semantic story clustering between dedup.py and llm.py
+Embeds each article's title and lead in one batch and groups articles covering the same story,
+so the LLM stage summarizes each story once instead of every URL
+"""
+import json
+from typing import List, Dict, Any
+from datetime import datetime
+import numpy as np
+from sklearn.cluster import AgglomerativeClustering
+from config import OUTPUT_DIR, STORY_SIMILARITY_THRESHOLD, STORY_MAX_SOURCES
+from embeddings import get_embedding_backend
+
+LEAD_CHARS = 600  # Title plus the opening of the article is enough to identify the story
+
+class StoryClusterer:
+    """Average-linkage agglomerative clustering on cosine distance of lead embeddings"""
+
+    def __init__(self, threshold: float = STORY_SIMILARITY_THRESHOLD, max_sources: int = STORY_MAX_SOURCES):
+        self.threshold = threshold
+        self.max_sources = max(1, max_sources)
+        self.embedder = get_embedding_backend()
+
+    def _lead(self, article: Dict[str, Any]) -> str:
+        lead = article.get('snippet') or ''
+        content = article.get('content') or ''
+        if len(lead) < LEAD_CHARS and content:
+            lead = f"{lead}\n{content[:LEAD_CHARS - len(lead)]}"
+        return f"{article.get('title', '')}\n{lead}".strip()
+
+    def find_clusters(self, articles: List[Dict[str, Any]]) -> List[List[int]]:
+        """Groups of article indices that report the same story, largest first"""
+        if len(articles) < 2:
+            return [[i] for i in range(len(articles))]
+
+        embeddings = np.asarray(self.embedder.embed_batch([self._lead(article) for article in articles]), dtype=np.float32)
+        model = AgglomerativeClustering(
+            n_clusters=None,
+            metric='cosine',
+            linkage='average',
+            distance_threshold=1.0 - self.threshold
+        )
+        labels = model.fit_predict(embeddings)
+
+        clusters: Dict[int, List[int]] = {}
+        for index, label in enumerate(labels):
+            clusters.setdefault(int(label), []).append(index)
+
+        # Cap the sources per LLM call; overflow members form their own story groups
+        groups = []
+        for members in clusters.values():
+            members.sort(key=lambda index: len(articles[index].get('content') or ''), reverse=True)
+            for start in range(0, len(members), self.max_sources):
+                groups.append(sorted(members[start:start + self.max_sources]))
+        return sorted(groups, key=lambda group: (-len(group), group[0]))
+
+    def assign_stories(self, articles: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Return articles annotated with story_id (and story_size for multi-source stories)"""
+        annotated = [dict(article) for article in articles]
+        for story_id, members in enumerate(self.find_clusters(articles)):
+            for index in members:
+                annotated[index]['story_id'] = story_id
+                annotated[index]['story_size'] = len(members)
+        return annotated
+
+def group_by_story(articles: List[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
+    """Articles grouped by story_id in first-seen order; unclustered articles stand alone"""
+    groups: Dict[Any, List[Dict[str, Any]]] = {}
+    for position, article in enumerate(articles):
+        key = article.get('story_id', f"article-{position}")
+        groups.setdefault(key, []).append(article)
+    return list(groups.values())
+
+def main():
+    """Main story clustering execution"""
+    try:
+        input_file = OUTPUT_DIR / "cleaned_text.json"
+        if not input_file.exists():
+            raise FileNotFoundError(f"Cleaned text not found: {input_file}")
+
+        with open(input_file, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+
+        articles = data.get('articles', [])
+        annotated = StoryClusterer().assign_stories(articles)
+        stories = group_by_story(annotated)
+
+        report_file = OUTPUT_DIR / f"story_clusters_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+        with open(report_file, 'w', encoding='utf-8') as f:
+            json.dump({
+                'processed_at': datetime.utcnow().isoformat(),
+                'total_articles': len(articles),
+                'total_stories': len(stories),
+                'stories': [
+                    [{'url': article.get('url', ''), 'title': article.get('title', '')} for article in story]
+                    for story in stories if len(story) > 1
+                ]
+            }, f, indent=2, ensure_ascii=False)
+
+        with open(input_file, 'w', encoding='utf-8') as f:
+            json.dump({**data, 'clustered_at': datetime.utcnow().isoformat(), 'articles': annotated},
+                      f, indent=2, ensure_ascii=False)
+
+        print("Story clustering completed successfully!")
+        print(f"Articles: {len(articles)} -> {len(stories)} stories")
+        print(f"Report: {report_file}")
+
+    except Exception as e:
+        print(f"Story clustering failed: {e}")
+        raise
+
+if __name__ == "__main__":
+    main()
@@ -50,6 +50,11 @@ class Config:
         """Get search configuration"""
         return self.keywords.get('search_config', {})
     
+    @property
+    def feed_sources(self) -> List[str]:
+        """Get RSS/Atom feed and sitemap URLs polled by feeds.py"""
+        return self.keywords.get('feed_sources', []) or []
+    
     @property
     def tag_hierarchy(self) -> Dict[str, List[str]]:
         """Get tag hierarchy for LLM classification"""
@@ -79,13 +84,126 @@ OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
 SUPABASE_URL = os.getenv('SUPABASE_URL')
 SUPABASE_SERVICE_ROLE_KEY = os.getenv('SUPABASE_SERVICE_ROLE_KEY')
 
+# Embedding backend: "openai" (API) or "local" (sentence-transformers on CPU)
+EMBEDDING_BACKEND = os.getenv('EMBEDDING_BACKEND', 'openai').lower()
+EMBEDDING_MODEL = os.getenv('EMBEDDING_MODEL')  # Defaults per backend when unset
+EMBEDDING_BATCH_SIZE = int(os.getenv('EMBEDDING_BATCH_SIZE', '64'))
+LOCAL_EMBEDDING_ONNX = os.getenv('LOCAL_EMBEDDING_ONNX', 'false').lower() == 'true'
+
+# Search API query-embedding cache (QUERY_CACHE_PATH enables the shared SQLite tier)
+QUERY_CACHE_SIZE = int(os.getenv('QUERY_CACHE_SIZE', '1024'))
+QUERY_CACHE_TTL = int(os.getenv('QUERY_CACHE_TTL', '86400'))
+QUERY_CACHE_PATH = os.getenv('QUERY_CACHE_PATH')
+
+# Search API result cache; entries are keyed on the corpus version published by ingestion
+RESULT_CACHE_SIZE = int(os.getenv('RESULT_CACHE_SIZE', '2048'))
+RESULT_CACHE_TTL = int(os.getenv('RESULT_CACHE_TTL', '3600'))
+CORPUS_VERSION_TTL = int(os.getenv('CORPUS_VERSION_TTL', '60'))  # How often workers re-check the marker
+SEARCH_CACHE_MAX_AGE = int(os.getenv('SEARCH_CACHE_MAX_AGE', '300'))  # Cache-Control max-age for clients/CDNs
+HEALTH_CHECK_TTL = float(os.getenv('HEALTH_CHECK_TTL', '15'))  # Seconds a /health database probe is reused
+
+# Search API concurrency: blocking OpenAI/Supabase calls run on a bounded thread pool
+SEARCH_WORKER_THREADS = int(os.getenv('SEARCH_WORKER_THREADS', '16'))
+SEARCH_MAX_CONCURRENCY = int(os.getenv('SEARCH_MAX_CONCURRENCY', '32'))  # In-flight searches per worker
+SEARCH_QUEUE_TIMEOUT = float(os.getenv('SEARCH_QUEUE_TIMEOUT', '2'))  # Wait for a slot before returning 503
+SEARCH_TIMEOUT = float(os.getenv('SEARCH_TIMEOUT', '10'))  # Per-call timeout before returning 504
+
+# Search-side in-memory vector index (VECTOR_INDEX_HNSW requires hnswlib)
+VECTOR_INDEX_ENABLED = os.getenv('VECTOR_INDEX_ENABLED', 'true').lower() == 'true'
+VECTOR_INDEX_HNSW = os.getenv('VECTOR_INDEX_HNSW', 'false').lower() == 'true'
+VECTOR_INDEX_QUANTIZATION = os.getenv('VECTOR_INDEX_QUANTIZATION', 'none').lower()  # none or int8
+VECTOR_INDEX_RERANK_FACTOR = int(os.getenv('VECTOR_INDEX_RERANK_FACTOR', '4'))  # Exact rerank of limit x factor candidates
+# Memory-mapped snapshot published by ingestion and loaded by search workers
+VECTOR_SNAPSHOT_DIR = Path(os.getenv('VECTOR_SNAPSHOT_DIR', str(Path(__file__).resolve().parent.parent / "output" / "vector_snapshot")))
+VECTOR_SNAPSHOT_DTYPE = os.getenv('VECTOR_SNAPSHOT_DTYPE', 'float32')  # float32 or float16
+HYBRID_CANDIDATE_FACTOR = int(os.getenv('HYBRID_CANDIDATE_FACTOR', '3'))  # Candidates per ranking = limit x factor
+SEARCH_BATCH_MAX_QUERIES = int(os.getenv('SEARCH_BATCH_MAX_QUERIES', '100'))  # Queries per POST /search/batch
+
+# Related-articles graph written into generated pages by related.py
+RELATED_ARTICLES_K = int(os.getenv('RELATED_ARTICLES_K', '5'))
+RELATED_MIN_SIMILARITY = float(os.getenv('RELATED_MIN_SIMILARITY', '0.3'))
+
+# Markdown rendering: worker processes for large backfills (0 renders in-process)
+MD_RENDER_WORKERS = int(os.getenv('MD_RENDER_WORKERS', '0'))
+
+# Site-wide tag pages, monthly archives and RSS generated from the article catalog
+SITE_URL = os.getenv('SITE_URL', 'https://yoshifuji.github.io/tech-insight-harvester').rstrip('/')
+RSS_ITEMS = int(os.getenv('RSS_ITEMS', '50'))
+
+# Adaptive crawl scheduling: Custom Search requests go to keywords that keep yielding new URLs
+CRAWL_SCHEDULER_ENABLED = os.getenv('CRAWL_SCHEDULER_ENABLED', 'true').lower() == 'true'
+CRAWL_DAILY_QUOTA = int(os.getenv('CRAWL_DAILY_QUOTA', '100'))  # Custom Search requests per run (free tier: 100/day)
+CRAWL_MAX_PAGES = int(os.getenv('CRAWL_MAX_PAGES', '5'))  # Result pages per keyword (API maximum: 10)
+CRAWL_TARGET_YIELD = float(os.getenv('CRAWL_TARGET_YIELD', '2'))  # New URLs per request that earn a daily search
+CRAWL_MAX_INTERVAL_DAYS = int(os.getenv('CRAWL_MAX_INTERVAL_DAYS', '7'))  # Even dry keywords are searched this often
+CRAWL_YIELD_ALPHA = float(os.getenv('CRAWL_YIELD_ALPHA', '0.3'))  # EWMA weight of the latest run
+CRAWL_PRIOR_YIELD = float(os.getenv('CRAWL_PRIOR_YIELD', '5'))  # Assumed yield of never-searched keywords
+
+# Content extraction: 'hedged' starts the direct fetch READER_HEDGE_DELAY seconds after Mercury
+# (0 starts both at once) and keeps whichever returns usable content first; 'sequential' waits for Mercury
+READER_EXTRACTION_MODE = os.getenv('READER_EXTRACTION_MODE', 'hedged').lower()
+READER_HEDGE_DELAY = float(os.getenv('READER_HEDGE_DELAY', '2.0'))
+READER_HEDGE_TIMEOUT = float(os.getenv('READER_HEDGE_TIMEOUT', '15'))  # Per-call timeout, bounding a losing request
+READER_HEDGE_MIN_CONTENT_CHARS = int(os.getenv('READER_HEDGE_MIN_CONTENT_CHARS', '200'))  # Shorter results do not win the race
+
+# Headless-browser fallback for pages whose static extraction comes back empty
+RENDER_ENABLED = os.getenv('RENDER_ENABLED', 'true').lower() == 'true'
+RENDER_MIN_CONTENT_CHARS = int(os.getenv('RENDER_MIN_CONTENT_CHARS', '200'))  # Render extractions shorter than this
+RENDER_POOL_SIZE = int(os.getenv('RENDER_POOL_SIZE', '3'))  # Browser contexts rendering in parallel
+RENDER_MAX_PAGES = int(os.getenv('RENDER_MAX_PAGES', '30'))  # Pages rendered per run
+RENDER_TIMEOUT = int(os.getenv('RENDER_TIMEOUT', '20'))  # Seconds for navigation
+RENDER_SETTLE_TIMEOUT = int(os.getenv('RENDER_SETTLE_TIMEOUT', '5'))  # Seconds to wait for the network to go idle
+
+# Feed and sitemap discovery (sources are listed under feed_sources in keywords.yaml)
+FEED_MIN_CONTENT_CHARS = int(os.getenv('FEED_MIN_CONTENT_CHARS', '1000'))  # Full text long enough to skip the fetch
+FEED_MAX_ENTRIES = int(os.getenv('FEED_MAX_ENTRIES', '500'))  # Entries read per feed or sitemap
+FEED_MAX_CHILD_SITEMAPS = int(os.getenv('FEED_MAX_CHILD_SITEMAPS', '5'))  # Recent children followed per sitemap index
+
+# Near-duplicate detection between reader.py and llm.py (MinHash over character shingles)
+DEDUP_THRESHOLD = float(os.getenv('DEDUP_THRESHOLD', '0.7'))  # Estimated Jaccard similarity to collapse
+DEDUP_NUM_PERM = int(os.getenv('DEDUP_NUM_PERM', '128'))
+DEDUP_BANDS = int(os.getenv('DEDUP_BANDS', '16'))  # LSH bands; NUM_PERM must be divisible by BANDS
+DEDUP_SHINGLE_SIZE = int(os.getenv('DEDUP_SHINGLE_SIZE', '5'))
+
+# Story clustering: articles whose lead embeddings reach this cosine similarity share one LLM call
+STORY_SIMILARITY_THRESHOLD = float(os.getenv('STORY_SIMILARITY_THRESHOLD', '0.85'))
+STORY_MAX_SOURCES = int(os.getenv('STORY_MAX_SOURCES', '5'))  # Sources per combined summary
+
+# Local triage before the LLM: drop irrelevant pages and pre-fill confident tags
+TRIAGE_MIN_RELEVANCE = float(os.getenv('TRIAGE_MIN_RELEVANCE', '0.2'))  # Drop below this relevance probability
+TRIAGE_TAG_CONFIDENCE = float(os.getenv('TRIAGE_TAG_CONFIDENCE', '0.8'))  # Pre-fill the tag above this probability
+TRIAGE_MIN_CONTENT_CHARS = int(os.getenv('TRIAGE_MIN_CONTENT_CHARS', '200'))  # Shorter extractions are dropped
+TRIAGE_MIN_EXAMPLES = int(os.getenv('TRIAGE_MIN_EXAMPLES', '200'))  # Labelled articles needed before training
+TRIAGE_MAX_EXAMPLES = int(os.getenv('TRIAGE_MAX_EXAMPLES', '20000'))  # Newest examples kept for training
+
+# LLM routing: 'cascade' tries LLM_SMALL_MODEL first and escalates to LLM_LARGE_MODEL when
+# validation fails; long articles and multi-source stories go straight to the large model
+LLM_ROUTING = os.getenv('LLM_ROUTING', 'cascade').lower()  # cascade or single
+LLM_SMALL_MODEL = os.getenv('LLM_SMALL_MODEL', 'gpt-4o-mini')
+LLM_LARGE_MODEL = os.getenv('LLM_LARGE_MODEL', 'gpt-4o')
+LLM_ESCALATE_CONTENT_CHARS = int(os.getenv('LLM_ESCALATE_CONTENT_CHARS', '6000'))
+LLM_SUMMARY_MIN_CHARS = int(os.getenv('LLM_SUMMARY_MIN_CHARS', '120'))  # Small-model summaries outside
+LLM_SUMMARY_MAX_CHARS = int(os.getenv('LLM_SUMMARY_MAX_CHARS', '800'))  # this range are escalated
+LLM_MAX_RETRIES = int(os.getenv('LLM_MAX_RETRIES', '1'))  # Extra attempts on the last model before falling back
+
+# Freshness window applied between crawler.py and reader.py
+FRESHNESS_MAX_AGE_DAYS = int(os.getenv('FRESHNESS_MAX_AGE_DAYS', '0'))  # 0 follows keywords.yaml date_range
+FRESHNESS_KEEP_UNDATED = os.getenv('FRESHNESS_KEEP_UNDATED', 'true').lower() == 'true'
+FRESHNESS_PROBE = os.getenv('FRESHNESS_PROBE', 'true').lower() == 'true'  # Partial fetch for missing dates
+FRESHNESS_PROBE_BYTES = int(os.getenv('FRESHNESS_PROBE_BYTES', '32768'))
+FRESHNESS_PROBE_WORKERS = int(os.getenv('FRESHNESS_PROBE_WORKERS', '8'))
+
 # Determine project root. This file is in src/, so root is its parent directory.
 PROJECT_ROOT = Path(__file__).resolve().parent.parent
 
 # File paths
 DOCS_DIR = PROJECT_ROOT / "docs" / "auto"
+INDEX_DIR = DOCS_DIR / "_index"  # Generated sidecars; Docusaurus skips underscore paths
+TOPICS_DIR = PROJECT_ROOT / "docs" / "topics"
+ARCHIVE_DIR = PROJECT_ROOT / "docs" / "archive"
 TEMPLATES_DIR = PROJECT_ROOT / "templates"
 OUTPUT_DIR = PROJECT_ROOT / "output"
+STATE_DIR = OUTPUT_DIR / "state"  # Learned state carried between runs (actions/cache in CI)
 
 # Ensure directories exist
 DOCS_DIR.mkdir(parents=True, exist_ok=True)
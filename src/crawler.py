@@ -5,9 +5,11 @@ Retrieves fresh URLs for keywords defined in keywords.yaml
 import json
 import requests
 import time
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Tuple
 from datetime import datetime, timedelta
-from config import Config, GOOGLE_API_KEY, GOOGLE_CX_ID, OUTPUT_DIR
+from config import Config, GOOGLE_API_KEY, GOOGLE_CX_ID, OUTPUT_DIR, CRAWL_SCHEDULER_ENABLED
+from freshness import DateResolver
+from scheduler import KeywordScheduler
 
 class TechCrawler:
     """Crawls tech articles using Google Custom Search API"""
@@ -16,12 +18,15 @@ class TechCrawler:
         self.config = Config()
         self.api_key = GOOGLE_API_KEY
         self.cx_id = GOOGLE_CX_ID
+        self.date_resolver = DateResolver()
+        self.scheduler = KeywordScheduler()
+        self.schedule: Dict[str, Dict[str, Any]] = {}
         
         if not self.api_key or not self.cx_id:
             raise ValueError("GOOGLE_API_KEY and GOOGLE_CX_ID must be set")
     
-    def search_keyword(self, keyword: str) -> List[Dict[str, Any]]:
-        """Search for articles related to a specific keyword"""
+    def _search_page(self, keyword: str, start: int = 1) -> List[Dict[str, Any]]:
+        """One Custom Search request (one unit of daily quota); raises on API errors"""
         search_config = self.config.search_config
         max_results = search_config.get('max_results_per_keyword', 10)
         date_range = search_config.get('date_range', 'week')
@@ -36,6 +41,7 @@ class TechCrawler:
             'cx': self.cx_id,
             'q': keyword,
             'num': min(max_results, 10),  # API limit is 10 per request
+            'start': start,  # 1-based index of the first result, for deeper pages
             'lr': f'lang_{language}',
             'dateRestrict': date_restrict,
             'sort': 'date',
@@ -43,31 +49,39 @@ class TechCrawler:
             'siteSearch': '',  # Could be configured to search specific sites
         }
         
-        try:
-            response = requests.get(url, params=params, timeout=30)
-            response.raise_for_status()
-            data = response.json()
-            
-            results = []
-            for item in data.get('items', []):
-                result = {
-                    'title': item.get('title', ''),
-                    'url': item.get('link', ''),
-                    'snippet': item.get('snippet', ''),
-                    'published_date': self._extract_date(item),
-                    'keyword': keyword,
-                    'source_domain': self._extract_domain(item.get('link', '')),
-                    'crawled_at': datetime.utcnow().isoformat()
-                }
-                results.append(result)
-            
-            # Rate limiting
-            time.sleep(0.1)
-            return results
-            
-        except requests.RequestException as e:
-            print(f"Error searching for keyword '{keyword}': {e}")
-            return []
+        response = requests.get(url, params=params, timeout=30)
+        response.raise_for_status()
+        data = response.json()
+        
+        results = []
+        for item in data.get('items', []):
+            domain = self._extract_domain(item.get('link', ''))
+            published_date, date_source = self._extract_date(item, domain)
+            result = {
+                'title': item.get('title', ''),
+                'url': item.get('link', ''),
+                'snippet': item.get('snippet', ''),
+                'published_date': published_date,
+                'date_source': date_source,
+                'keyword': keyword,
+                'source_domain': domain,
+                'crawled_at': datetime.utcnow().isoformat()
+            }
+            results.append(result)
+        
+        # Rate limiting
+        time.sleep(0.1)
+        return results
+    
+    def _is_quota_error(self, error: requests.RequestException) -> bool:
+        """Daily quota or rate limit exhausted: every further request would fail too"""
+        response = getattr(error, 'response', None)
+        if response is None:
+            return False
+        if response.status_code == 429:
+            return True
+        return response.status_code == 403 and any(
+            reason in response.text for reason in ('rateLimitExceeded', 'quotaExceeded', 'dailyLimitExceeded'))
     
     def _get_date_restrict(self, date_range: str) -> str:
         """Convert date range to Google API format"""
@@ -79,21 +93,11 @@ class TechCrawler:
         }
         return mapping.get(date_range, 'd7')
     
-    def _extract_date(self, item: Dict[str, Any]) -> str:
-        """Extract publication date from search result"""
-        # Try to get date from pagemap or other metadata
-        pagemap = item.get('pagemap', {})
-        
-        # Check various date fields
-        for date_field in ['metatags', 'article', 'newsarticle']:
-            if date_field in pagemap:
-                for meta in pagemap[date_field]:
-                    for key in ['publishedtime', 'datepublished', 'article:published_time']:
-                        if key in meta:
-                            return meta[key]
-        
-        # Fallback to current date
-        return datetime.utcnow().isoformat()
+    def _extract_date(self, item: Dict[str, Any], domain: str) -> Tuple[str, str]:
+        """Extract publication date (ISO 8601, UTC) and its source from search result"""
+        # Unknown dates stay empty; freshness.py probes the page head or applies its undated policy
+        published, source = self.date_resolver.resolve_pagemap(item, domain)
+        return (published.isoformat() if published else ''), source
     
     def _extract_domain(self, url: str) -> str:
         """Extract domain from URL"""
@@ -107,14 +111,44 @@ class TechCrawler:
         """Crawl articles for all configured keywords"""
         all_results = []
         keywords = self.config.keyword_list
+        plan = self.scheduler.plan(keywords) if CRAWL_SCHEDULER_ENABLED else {keyword: 1 for keyword in keywords}
+        page_size = min(self.config.search_config.get('max_results_per_keyword', 10), 10)
         
-        print(f"Starting crawl for {len(keywords)} keywords...")
+        print(f"Starting crawl for {len(plan)}/{len(keywords)} keywords due ({sum(plan.values())} requests)...")
         
-        for i, keyword in enumerate(keywords, 1):
-            print(f"[{i}/{len(keywords)}] Searching: {keyword}")
-            results = self.search_keyword(keyword)
-            all_results.extend(results)
-            print(f"  Found {len(results)} articles")
+        quota_exhausted = False
+        for i, (keyword, pages) in enumerate(plan.items(), 1):
+            print(f"[{i}/{len(plan)}] Searching: {keyword} (up to {pages} pages)")
+            requests_made = result_count = new_count = 0
+            for page in range(pages):
+                try:
+                    results = self._search_page(keyword, start=1 + page * page_size)
+                except requests.RequestException as e:
+                    # API errors say nothing about the keyword's yield
+                    print(f"Error searching for keyword '{keyword}': {e}")
+                    quota_exhausted = self._is_quota_error(e)
+                    break
+                requests_made += 1
+                result_count += len(results)
+                new_urls = 0
+                for result in results:
+                    if self.scheduler.is_new(result['url']):
+                        new_urls += 1
+                        # Only within this run; across runs a URL is seen once it is published
+                        self.scheduler.mark_seen(result['url'])
+                new_count += new_urls
+                all_results.extend(results)
+                # A short or fully duplicate page means deeper pages will not pay off
+                if len(results) < page_size or not new_urls:
+                    break
+            
+            self.scheduler.record(keyword, requests_made, result_count, new_count)
+            self.schedule[keyword] = {'planned_pages': pages, 'requests': requests_made, 'results': result_count, 'new_urls': new_count}
+            print(f"  Found {result_count} articles ({new_count} new)")
+            if quota_exhausted:
+                # Keywords not reached keep their statistics and stay due for the next run
+                print(f"Search quota exhausted; skipping the remaining {len(plan) - i} keywords")
+                break
         
         # Remove duplicates based on URL
         seen_urls = set()
@@ -125,6 +159,9 @@ class TechCrawler:
                 unique_results.append(result)
         
         print(f"Total unique articles found: {len(unique_results)}")
+        self.date_resolver.save()
+        if CRAWL_SCHEDULER_ENABLED:
+            self.scheduler.save()
         return unique_results
     
     def save_results(self, results: List[Dict[str, Any]]) -> str:
@@ -135,6 +172,7 @@ class TechCrawler:
             json.dump({
                 'crawled_at': datetime.utcnow().isoformat(),
                 'total_articles': len(results),
+                'schedule': self.schedule,
                 'articles': results
             }, f, indent=2, ensure_ascii=False)
         
@@ -154,6 +192,7 @@ def main():
             json.dump({
                 'crawled_at': datetime.utcnow().isoformat(),
                 'total_articles': len(results),
+                'schedule': crawler.schedule,
                 'articles': results
             }, f, indent=2, ensure_ascii=False)
         
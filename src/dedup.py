@@ -0,0 +1,196 @@
+"""
+Near-duplicate article detection between reader.py and llm.py
+Shingled MinHash with LSH banding collapses syndicated copies to one representative,
+keeping the other URLs as alternate sources
+"""
+import json
+import re
+import unicodedata
+from collections import defaultdict
+from typing import List, Dict, Any, Optional
+from datetime import datetime
+import numpy as np
+from config import OUTPUT_DIR, DEDUP_THRESHOLD, DEDUP_NUM_PERM, DEDUP_BANDS, DEDUP_SHINGLE_SIZE
+
+SHINGLE_BASE = 0x100000001B3  # FNV-1a 64-bit prime
+MIN_CONTENT_CHARS = 200  # Shorter extractions (failures, paywalls) are too thin to compare
+
+def merge_alternate_sources(article: Dict[str, Any], others: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Copy of article listing the other articles (and their own alternates) as alternate_sources"""
+    alternates = list(article.get('alternate_sources', []))
+    known = {article.get('url')} | {source.get('url') for source in alternates}
+    for other in others:
+        for source in [other] + other.get('alternate_sources', []):
+            if source.get('url') and source.get('url') not in known:
+                known.add(source['url'])
+                alternates.append({
+                    'url': source.get('url', ''),
+                    'title': source.get('title', ''),
+                    'source_domain': source.get('source_domain', '')
+                })
+    return {**article, 'alternate_sources': alternates}
+
+class NearDuplicateDetector:
+    """MinHash signatures over character shingles, bucketed by LSH bands"""
+
+    def __init__(self, threshold: float = DEDUP_THRESHOLD, num_perm: int = DEDUP_NUM_PERM,
+                 bands: int = DEDUP_BANDS, shingle_size: int = DEDUP_SHINGLE_SIZE, seed: int = 1):
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+
+        # Multiply-shift hash family h(x) = (a * x + b) >> 32 with odd a, one (a, b) pair per permutation;
+        # uint64 arithmetic wraps, which is what the scheme relies on (no modulo in the hot loop)
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(0, 1 << 63, size=num_perm, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+        self._b = rng.integers(0, 1 << 63, size=num_perm, dtype=np.uint64)
+
+    def _normalize(self, text: str) -> str:
+        # NFKC + whitespace removal makes character shingles work for Japanese and English alike
+        text = unicodedata.normalize('NFKC', text or '').lower()
+        return re.sub(r'\s+', '', text)
+
+    def shingles(self, text: str) -> np.ndarray:
+        """Distinct 32-bit hashes of the text's character k-grams"""
+        text = self._normalize(text)
+        k = self.shingle_size
+        if len(text) < k:
+            return np.zeros(0, dtype=np.uint64)
+        # Polynomial hash of each k-gram over code points, computed for all positions at once
+        codes = np.frombuffer(text.encode('utf-32-le'), dtype=np.uint32).astype(np.uint64)
+        count = len(codes) - k + 1
+        hashes = np.zeros(count, dtype=np.uint64)
+        with np.errstate(over='ignore'):
+            for offset in range(k):
+                hashes = hashes * np.uint64(SHINGLE_BASE) + codes[offset:offset + count]
+        return np.unique(hashes >> np.uint64(32))
+
+    def signature(self, text: str) -> Optional[np.ndarray]:
+        """MinHash signature, or None when the text is too short to compare"""
+        shingles = self.shingles(text)
+        if not len(shingles):
+            return None
+        with np.errstate(over='ignore'):
+            hashed = shingles[:, None] * self._a[None, :] + self._b[None, :]
+        return (hashed >> np.uint64(32)).min(axis=0)
+
+    def find_clusters(self, texts: List[str]) -> List[List[int]]:
+        """Groups of indices whose estimated Jaccard similarity reaches the threshold"""
+        signatures = [self.signature(text) for text in texts]
+
+        # Documents sharing any band land in the same bucket; only those pairs are compared
+        buckets = defaultdict(list)
+        for index, signature in enumerate(signatures):
+            if signature is None:
+                continue
+            for band in range(self.bands):
+                key = (band, signature[band * self.rows:(band + 1) * self.rows].tobytes())
+                buckets[key].append(index)
+
+        parent = list(range(len(texts)))
+
+        def find(index: int) -> int:
+            while parent[index] != index:
+                parent[index] = parent[parent[index]]
+                index = parent[index]
+            return index
+
+        compared = set()
+        for members in buckets.values():
+            if len(members) < 2:
+                continue
+            for position, first in enumerate(members):
+                for second in members[position + 1:]:
+                    if (first, second) in compared:
+                        continue
+                    compared.add((first, second))
+                    similarity = float(np.mean(signatures[first] == signatures[second]))
+                    if similarity >= self.threshold:
+                        parent[find(second)] = find(first)
+
+        clusters = defaultdict(list)
+        for index in range(len(texts)):
+            clusters[find(index)].append(index)
+        return [members for members in clusters.values() if len(members) > 1]
+
+    def deduplicate(self, articles: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Collapse each near-duplicate cluster to its most complete article"""
+        texts = [
+            article.get('content', '') if len(article.get('content') or '') >= MIN_CONTENT_CHARS else ''
+            for article in articles
+        ]
+        clusters = self.find_clusters(texts)
+
+        dropped = set()
+        representatives = {}
+        for members in clusters:
+            # Prefer the longest extraction; ties go to the earlier search result
+            representative = max(members, key=lambda index: (len(articles[index].get('content') or ''), -index))
+            representatives[representative] = [index for index in members if index != representative]
+            dropped.update(representatives[representative])
+
+        kept = []
+        for index, article in enumerate(articles):
+            if index in dropped:
+                continue
+            if index in representatives:
+                article = merge_alternate_sources(article, [articles[other] for other in representatives[index]])
+            kept.append(article)
+
+        return {
+            'articles': kept,
+            'clusters': [
+                {
+                    'representative': articles[representative].get('url', ''),
+                    'duplicates': [articles[index].get('url', '') for index in others]
+                }
+                for representative, others in representatives.items()
+            ]
+        }
+
+def main():
+    """Main deduplication execution"""
+    try:
+        # Deduplicate the reader's latest output in place; the timestamped reader file keeps the raw copy
+        input_file = OUTPUT_DIR / "cleaned_text.json"
+        if not input_file.exists():
+            raise FileNotFoundError(f"Cleaned text not found: {input_file}")
+
+        with open(input_file, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+
+        articles = data.get('articles', [])
+        detector = NearDuplicateDetector()
+        result = detector.deduplicate(articles)
+
+        report_file = OUTPUT_DIR / f"dedup_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+        with open(report_file, 'w', encoding='utf-8') as f:
+            json.dump({
+                'processed_at': datetime.utcnow().isoformat(),
+                'input_articles': len(articles),
+                'kept_articles': len(result['articles']),
+                'clusters': result['clusters']
+            }, f, indent=2, ensure_ascii=False)
+
+        with open(input_file, 'w', encoding='utf-8') as f:
+            json.dump({
+                **data,
+                'deduplicated_at': datetime.utcnow().isoformat(),
+                'total_articles': len(result['articles']),
+                'articles': result['articles']
+            }, f, indent=2, ensure_ascii=False)
+
+        print("Deduplication completed successfully!")
+        print(f"Articles: {len(articles)} -> {len(result['articles'])} ({len(result['clusters'])} clusters)")
+        print(f"Report: {report_file}")
+
+    except Exception as e:
+        print(f"Deduplication failed: {e}")
+        raise
+
+if __name__ == "__main__":
+    main()
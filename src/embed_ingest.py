@@ -4,21 +4,30 @@ Generates embeddings for Markdown documents and stores them in vector database
 """
 import json
 import os
+import re
 import hashlib
 from typing import List, Dict, Any, Optional
 from datetime import datetime
 from pathlib import Path
-import openai
 import numpy as np
+from dateutil import parser as date_parser
 from supabase import create_client, Client
-from config import Config, OPENAI_API_KEY, SUPABASE_URL, SUPABASE_SERVICE_ROLE_KEY, DOCS_DIR, OUTPUT_DIR
+from postgrest.types import CountMethod
+from config import (
+    Config, SUPABASE_URL, SUPABASE_SERVICE_ROLE_KEY, PROJECT_ROOT, DOCS_DIR, OUTPUT_DIR, EMBEDDING_BATCH_SIZE,
+    VECTOR_SNAPSHOT_DIR, VECTOR_SNAPSHOT_DTYPE
+)
+from embeddings import get_embedding_backend
+from vector_index import VectorIndex, SNAPSHOT_PREVIEW_CHARS
+from lexical_index import BM25Index
+from related import strip_related_block
 
 class EmbeddingIngestor:
     """Handles embedding generation and vector database operations"""
     
     def __init__(self):
         self.config = Config()
-        self.openai_client = openai.OpenAI(api_key=OPENAI_API_KEY)
+        self.embedding_backend = get_embedding_backend()
         
         # Initialize Supabase client
         if not SUPABASE_URL or not SUPABASE_SERVICE_ROLE_KEY:
@@ -44,24 +53,30 @@ class EmbeddingIngestor:
             pass
     
     def generate_embedding(self, text: str) -> List[float]:
-        """Generate embedding for text using OpenAI"""
+        """Generate embedding for text using the configured backend"""
         try:
-            response = self.openai_client.embeddings.create(
-                model="text-embedding-3-small",
-                input=text,
-                encoding_format="float"
-            )
-            return response.data[0].embedding
+            return self.embedding_backend.embed(text)
         except Exception as e:
             print(f"Error generating embedding: {e}")
             return []
     
+    def generate_embeddings(self, texts: List[str]) -> List[List[float]]:
+        """Generate embeddings for several texts in batched backend calls"""
+        try:
+            return self.embedding_backend.embed_batch(texts)
+        except Exception as e:
+            print(f"Error generating batch embeddings: {e}")
+            return []
+    
     def extract_text_from_markdown(self, filepath: str) -> Dict[str, Any]:
         """Extract text content from Markdown file"""
         try:
             with open(filepath, 'r', encoding='utf-8') as f:
                 content = f.read()
             
+            # related.py rewrites this section daily; it must not trigger re-embedding
+            content = strip_related_block(content)
+            
             # Split front matter and content
             if content.startswith('---'):
                 parts = content.split('---', 2)
@@ -87,6 +102,7 @@ class EmbeddingIngestor:
             
             return {
                 'title': title,
+                **self._extract_filter_metadata(front_matter, body),
                 'content': clean_text,
                 'full_content': content,
                 'filepath': filepath,
@@ -97,6 +113,49 @@ class EmbeddingIngestor:
             print(f"Error extracting text from {filepath}: {e}")
             return {}
     
+    def _extract_filter_metadata(self, front_matter: str, body: str) -> Dict[str, Any]:
+        """Tag, publish date and source domain used by /search filters"""
+        def front_matter_value(key: str) -> str:
+            match = re.search(rf'^{key}:\s*(.*)$', front_matter, re.MULTILINE)
+            return match.group(1).strip().strip('"\'') if match else ''
+        
+        def body_value(label: str) -> str:
+            # Pages written before these keys were in the front matter still carry them in the body
+            match = re.search(rf'\*\*{label}:\*\*\s*(.*?)\s*$', body, re.MULTILINE)
+            return match.group(1).strip() if match else ''
+        
+        tags = front_matter_value('tags').strip('[]')
+        tag = tags.split(',')[0].strip().strip('"\'') if tags else ''
+        
+        published_date = None
+        raw_date = front_matter_value('published_date') or body_value('Published')
+        if raw_date:
+            try:
+                published_date = date_parser.parse(raw_date.replace(' UTC', '+00:00')).isoformat()
+            except (ValueError, OverflowError):
+                published_date = None  # e.g. "Date not available"
+        
+        return {
+            'tag': tag or None,
+            'published_date': published_date,
+            'source_domain': front_matter_value('source_domain') or body_value('Domain') or None
+        }
+    
+    def resolve_markdown_path(self, filepath: str) -> Optional[Path]:
+        """Map a stored filepath (possibly from another machine) onto this checkout"""
+        if not filepath:
+            return None
+        path = Path(filepath)
+        if path.exists():
+            return path
+        
+        parts = path.parts
+        if 'docs' in parts:
+            candidate = PROJECT_ROOT.joinpath(*parts[parts.index('docs'):])
+            if candidate.exists():
+                return candidate
+        return None
+    
     def _clean_text_for_embedding(self, text: str) -> str:
         """Clean text for better embedding quality"""
         import re
@@ -138,6 +197,9 @@ class EmbeddingIngestor:
             article_record = {
                 'filepath': article_data['filepath'],
                 'title': article_data['title'],
+                'tag': article_data.get('tag'),
+                'published_date': article_data.get('published_date'),
+                'source_domain': article_data.get('source_domain'),
                 'file_hash': article_data['file_hash'],
                 'updated_at': datetime.utcnow().isoformat()
             }
@@ -153,13 +215,16 @@ class EmbeddingIngestor:
         
         return None
     
-    def upsert_embedding(self, article_id: str, embedding: List[float], text: str) -> bool:
+    def upsert_embedding(self, article_id: str, embedding: List[float], text: str, tag: Optional[str] = None) -> bool:
         """Insert or update embedding in database"""
         try:
             embedding_record = {
                 'article_id': article_id,
                 'embedding': embedding,
                 'text_content': text[:2000],  # Truncate for storage
+                'embedding_model': self.embedding_backend.version_tag,
+                'embedding_dim': len(embedding),
+                'tag': tag,  # Denormalized so pgvector can use per-tag partial indexes
                 'updated_at': datetime.utcnow().isoformat()
             }
             
@@ -171,6 +236,23 @@ class EmbeddingIngestor:
             print(f"Error upserting embedding: {e}")
             return False
     
+    def _store_article_embedding(self, article_data: Dict[str, Any], embedding: List[float], embedding_text: str) -> bool:
+        """Upsert an article and its embedding"""
+        filepath = article_data['filepath']
+        
+        article_id = self.upsert_article(article_data)
+        if not article_id:
+            print(f"Failed to upsert article: {filepath}")
+            return False
+        
+        success = self.upsert_embedding(article_id, embedding, embedding_text, article_data.get('tag'))
+        if success:
+            print(f"Successfully processed: {filepath}")
+        else:
+            print(f"Failed to upsert embedding: {filepath}")
+        
+        return success
+    
     def process_markdown_file(self, filepath: str) -> bool:
         """Process a single Markdown file"""
         try:
@@ -193,20 +275,7 @@ class EmbeddingIngestor:
                 print(f"Failed to generate embedding for: {filepath}")
                 return False
             
-            # Upsert article
-            article_id = self.upsert_article(article_data)
-            if not article_id:
-                print(f"Failed to upsert article: {filepath}")
-                return False
-            
-            # Upsert embedding
-            success = self.upsert_embedding(article_id, embedding, embedding_text)
-            if success:
-                print(f"Successfully processed: {filepath}")
-            else:
-                print(f"Failed to upsert embedding: {filepath}")
-            
-            return success
+            return self._store_article_embedding(article_data, embedding, embedding_text)
             
         except Exception as e:
             print(f"Error processing {filepath}: {e}")
@@ -224,28 +293,135 @@ class EmbeddingIngestor:
             'files': []
         }
         
-        print(f"Processing {len(markdown_files)} Markdown files...")
+        print(f"Processing {len(markdown_files)} Markdown files with {self.embedding_backend.version_tag}...")
         
+        # Collect changed files first so embeddings can be generated in batches
+        pending = []
         for i, filepath in enumerate(markdown_files, 1):
-            print(f"[{i}/{len(markdown_files)}] Processing: {filepath.name}")
+            print(f"[{i}/{len(markdown_files)}] Checking: {filepath.name}")
             
-            success = self.process_markdown_file(str(filepath))
+            article_data = self.extract_text_from_markdown(str(filepath))
+            if not article_data:
+                self._record_file_result(results, str(filepath), 'failed')
+                continue
             
-            file_result = {
-                'filepath': str(filepath),
-                'success': success,
-                'processed_at': datetime.utcnow().isoformat()
-            }
+            existing_article = self.get_existing_article(str(filepath))
+            if existing_article and existing_article.get('file_hash') == article_data['file_hash']:
+                print(f"Skipping unchanged file: {filepath}")
+                self._record_file_result(results, str(filepath), 'skipped')
+                continue
             
-            if success:
-                results['processed'] += 1
-            else:
-                results['failed'] += 1
+            pending.append(article_data)
+        
+        for start in range(0, len(pending), EMBEDDING_BATCH_SIZE):
+            batch = pending[start:start + EMBEDDING_BATCH_SIZE]
+            texts = [f"{article['title']} {article['content']}" for article in batch]
+            embeddings = self.generate_embeddings(texts)
             
-            results['files'].append(file_result)
+            for index, article_data in enumerate(batch):
+                embedding = embeddings[index] if index < len(embeddings) else []
+                if not embedding:
+                    print(f"Failed to generate embedding for: {article_data['filepath']}")
+                    success = False
+                else:
+                    success = self._store_article_embedding(article_data, embedding, texts[index])
+                
+                self._record_file_result(results, article_data['filepath'], 'processed' if success else 'failed')
+        
+        if results['processed']:
+            results['corpus_version'] = self.bump_corpus_version()
+            results['corpus_stats'] = self.update_corpus_stats()
+        
+        if results['processed'] or VectorIndex.current_snapshot_version(VECTOR_SNAPSHOT_DIR) is None:
+            results['snapshot'] = self.publish_snapshot(results.get('corpus_version'))
         
         return results
     
+    def publish_snapshot(self, version: Optional[str] = None) -> Optional[str]:
+        """Write a memory-mappable snapshot of every stored vector for the search API"""
+        version = version or datetime.utcnow().strftime('%Y%m%dT%H%M%S%fZ')
+        try:
+            # Rows not yet migrated to the current model stay out of the snapshot
+            index = VectorIndex(
+                embedding_model=self.embedding_backend.version_tag,
+                expected_dimension=self.embedding_backend.dimension
+            )
+            index.load_from_supabase(self.supabase, incremental=False)
+            snapshot_dir = index.save_snapshot(
+                VECTOR_SNAPSHOT_DIR,
+                version,
+                dtype=VECTOR_SNAPSHOT_DTYPE,
+                embedding_model=self.embedding_backend.version_tag
+            )
+            self.build_lexical_index(index).save(snapshot_dir)
+            print(f"Published vector snapshot ({len(index)} vectors): {snapshot_dir}")
+            return str(snapshot_dir)
+        except Exception as e:
+            print(f"Warning: Could not publish vector snapshot: {e}")
+            return None
+    
+    def bump_corpus_version(self) -> Optional[str]:
+        """Publish a new corpus version so search API result caches are invalidated"""
+        version = datetime.utcnow().strftime('%Y%m%dT%H%M%S%fZ')
+        try:
+            self.supabase.table('corpus_meta').upsert({
+                'id': 1,
+                'corpus_version': version,
+                'updated_at': datetime.utcnow().isoformat()
+            }).execute()
+            print(f"Published corpus version: {version}")
+            return version
+        except Exception as e:
+            print(f"Warning: Could not publish corpus version: {e}")
+            return None
+    
+    def update_corpus_stats(self) -> Optional[Dict[str, int]]:
+        """Store article/embedding counts in corpus_meta so /stats never counts rows itself"""
+        try:
+            stats = {
+                'article_count': self._count_rows('articles'),
+                'embedding_count': self._count_rows('embeddings')
+            }
+            self.supabase.table('corpus_meta').update(stats).eq('id', 1).execute()
+            print(f"Published corpus stats: {stats}")
+            return stats
+        except Exception as e:
+            print(f"Warning: Could not publish corpus stats: {e}")
+            return None
+    
+    def _count_rows(self, table: str) -> int:
+        """Exact row count without transferring any rows"""
+        result = self.supabase.table(table).select('id', count=CountMethod.exact, head=True).execute()
+        return result.count or 0
+    
+    def build_lexical_index(self, index: VectorIndex) -> BM25Index:
+        """Build a BM25 index over the same documents (and row order) as the vector snapshot"""
+        titles, bodies = [], []
+        for meta in index.metadata:
+            path = self.resolve_markdown_path(meta.get('filepath', ''))
+            article_data = self.extract_text_from_markdown(str(path)) if path else {}
+            titles.append(article_data.get('title') or meta.get('title', ''))
+            bodies.append(article_data.get('content') or meta.get('text_content', ''))
+        
+        lexical = BM25Index()
+        lexical.build(
+            index.ids,
+            titles,
+            bodies,
+            [{**meta, 'text_content': (meta.get('text_content') or '')[:SNAPSHOT_PREVIEW_CHARS]} for meta in index.metadata]
+        )
+        return lexical
+    
+    def _record_file_result(self, results: Dict[str, Any], filepath: str, status: str):
+        """Record the outcome for a single file in the results summary"""
+        results[status] += 1
+        results['files'].append({
+            'filepath': filepath,
+            'success': status != 'failed',
+            'status': status,
+            'processed_at': datetime.utcnow().isoformat()
+        })
+    
     def save_results(self, results: Dict[str, Any]) -> str:
         """Save processing results to JSON file"""
         output_file = OUTPUT_DIR / f"embedding_results_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
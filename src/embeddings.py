@@ -0,0 +1,142 @@
+"""
+Pluggable embedding backends
+Shared by embedding ingestion and the search API so documents and queries
+are always embedded by the same model
+"""
+from abc import ABC, abstractmethod
+from typing import List, Dict, Optional
+import openai
+from config import (
+    OPENAI_API_KEY, EMBEDDING_BACKEND, EMBEDDING_MODEL,
+    EMBEDDING_BATCH_SIZE, LOCAL_EMBEDDING_ONNX, SEARCH_TIMEOUT
+)
+
+# Known output dimensions for OpenAI embedding models
+OPENAI_EMBEDDING_DIMENSIONS = {
+    'text-embedding-3-small': 1536,
+    'text-embedding-3-large': 3072,
+    'text-embedding-ada-002': 1536,
+}
+
+DEFAULT_MODELS = {
+    'openai': 'text-embedding-3-small',
+    'local': 'sentence-transformers/all-MiniLM-L6-v2',
+}
+
+class EmbeddingBackend(ABC):
+    """Base class for embedding backends"""
+
+    name = "base"
+
+    def __init__(self, model: str, batch_size: int = EMBEDDING_BATCH_SIZE):
+        self.model = model
+        self.batch_size = max(1, batch_size)
+        self.dimension = 0
+
+    @property
+    def version_tag(self) -> str:
+        """Tag stored alongside each vector to identify the model that produced it"""
+        return f"{self.name}:{self.model}"
+
+    def embed_batch(self, texts: List[str]) -> List[List[float]]:
+        """Embed a list of texts, preserving order"""
+        embeddings = []
+        for start in range(0, len(texts), self.batch_size):
+            embeddings.extend(self._embed_chunk(texts[start:start + self.batch_size]))
+        return embeddings
+
+    def embed(self, text: str) -> List[float]:
+        """Embed a single text"""
+        return self.embed_batch([text])[0]
+
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        """Embed search queries; backends with remote calls bound them by the search deadline"""
+        return self.embed_batch(texts)
+
+    @abstractmethod
+    def _embed_chunk(self, texts: List[str]) -> List[List[float]]:
+        """Embed at most batch_size texts in one model call"""
+
+class OpenAIEmbeddingBackend(EmbeddingBackend):
+    """Embeddings from the OpenAI embeddings API"""
+
+    name = "openai"
+
+    def __init__(self, model: str = DEFAULT_MODELS['openai'], batch_size: int = EMBEDDING_BATCH_SIZE):
+        super().__init__(model, batch_size)
+        # Batch ingestion keeps the SDK's default timeout and retries; only query embeddings
+        # are bounded, so a slow API call cannot hold a search worker thread indefinitely
+        self.client = openai.OpenAI(api_key=OPENAI_API_KEY)
+        self.query_client = self.client.with_options(timeout=SEARCH_TIMEOUT, max_retries=1)
+        self.dimension = OPENAI_EMBEDDING_DIMENSIONS.get(model, 0)
+
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        embeddings = []
+        for start in range(0, len(texts), self.batch_size):
+            embeddings.extend(self._embed_chunk(texts[start:start + self.batch_size], self.query_client))
+        return embeddings
+
+    def _embed_chunk(self, texts: List[str], client: Optional[openai.OpenAI] = None) -> List[List[float]]:
+        response = (client or self.client).embeddings.create(
+            model=self.model,
+            input=texts,
+            encoding_format="float"
+        )
+        # The API may return items out of order; restore input order
+        data = sorted(response.data, key=lambda item: item.index)
+        embeddings = [item.embedding for item in data]
+        if embeddings and not self.dimension:
+            self.dimension = len(embeddings[0])
+        return embeddings
+
+class LocalEmbeddingBackend(EmbeddingBackend):
+    """CPU embeddings from a local sentence-transformers model (optionally ONNX)"""
+
+    name = "local"
+
+    def __init__(self, model: str = DEFAULT_MODELS['local'], batch_size: int = EMBEDDING_BATCH_SIZE,
+                 use_onnx: bool = LOCAL_EMBEDDING_ONNX):
+        super().__init__(model, batch_size)
+        try:
+            from sentence_transformers import SentenceTransformer
+        except ImportError:
+            raise ImportError(
+                "The local embedding backend requires sentence-transformers: "
+                "pip install sentence-transformers (add onnxruntime for ONNX)"
+            )
+
+        # Load the model once; the instance is cached by get_embedding_backend
+        kwargs = {'device': 'cpu'}
+        if use_onnx:
+            kwargs['backend'] = 'onnx'
+        self.encoder = SentenceTransformer(model, **kwargs)
+        self.dimension = self.encoder.get_sentence_embedding_dimension()
+
+    def _embed_chunk(self, texts: List[str]) -> List[List[float]]:
+        vectors = self.encoder.encode(
+            texts,
+            batch_size=self.batch_size,
+            normalize_embeddings=True,
+            convert_to_numpy=True,
+            show_progress_bar=False
+        )
+        return vectors.tolist()
+
+BACKENDS = {
+    'openai': OpenAIEmbeddingBackend,
+    'local': LocalEmbeddingBackend,
+}
+
+_backend_cache: Dict[str, EmbeddingBackend] = {}
+
+def get_embedding_backend(name: Optional[str] = None, model: Optional[str] = None) -> EmbeddingBackend:
+    """Return a process-wide embedding backend, loading the model only once"""
+    name = (name or EMBEDDING_BACKEND).lower()
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown embedding backend '{name}'. Available: {', '.join(BACKENDS)}")
+
+    model = model or (EMBEDDING_MODEL if name == EMBEDDING_BACKEND else None) or DEFAULT_MODELS[name]
+    cache_key = f"{name}:{model}"
+    if cache_key not in _backend_cache:
+        _backend_cache[cache_key] = BACKENDS[name](model=model)
+    return _backend_cache[cache_key]
@@ -0,0 +1,340 @@
+"""
+RSS/Atom feed and sitemap discovery alongside Google Custom Search
+Polls the feed_sources in keywords.yaml with conditional GET, stream-parses new entries and
+matches them against the keywords with an Aho-Corasick automaton, without using search quota
+"""
+import json
+import os
+import re
+import xml.etree.ElementTree as ET
+from collections import deque
+from typing import List, Dict, Any, Optional, Set, Tuple
+from datetime import datetime, timedelta, timezone
+from urllib.parse import urlparse, unquote
+import requests
+from bs4 import BeautifulSoup
+from config import Config, OUTPUT_DIR, STATE_DIR, FEED_MIN_CONTENT_CHARS, FEED_MAX_ENTRIES, FEED_MAX_CHILD_SITEMAPS
+from catalog import ArticleCatalog
+from freshness import DateResolver, FreshnessFilter, max_age_days
+
+SITEMAP_NS = '{http://www.sitemaps.org/schemas/sitemap/0.9}'
+FEED_ENTRY_TAGS = {'item', 'entry'}  # RSS/RDF item, Atom entry
+ASCII_WORD = re.compile(r'[a-z0-9]')
+
+def local_name(tag: str) -> str:
+    """Element name without its XML namespace"""
+    return tag.rsplit('}', 1)[-1]
+
+class KeywordMatcher:
+    """Aho-Corasick automaton over every keyword word; a keyword matches when all its words occur"""
+
+    def __init__(self, keywords: List[str]):
+        self.keywords = keywords
+        self.requirements: List[Set[int]] = []
+        words: Dict[str, int] = {}
+        for keyword in keywords:
+            required = set()
+            for word in re.findall(r'\w+', keyword.lower()):
+                required.add(words.setdefault(word, len(words)))
+            self.requirements.append(required)
+        self.words = list(words)
+
+        # Trie of all words, then breadth-first failure links
+        self._goto: List[Dict[str, int]] = [{}]
+        self._output: List[List[int]] = [[]]
+        for index, word in enumerate(self.words):
+            state = 0
+            for char in word:
+                if char not in self._goto[state]:
+                    self._goto.append({})
+                    self._output.append([])
+                    self._goto[state][char] = len(self._goto) - 1
+                state = self._goto[state][char]
+            self._output[state].append(index)
+
+        self._fail = [0] * len(self._goto)
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, child in self._goto[state].items():
+                queue.append(child)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[child] = self._goto[fallback].get(char, 0)
+                self._output[child] = self._output[child] + self._output[self._fail[child]]
+
+    def _found_words(self, text: str) -> Set[int]:
+        """Indices of words occurring in text; ASCII words must sit on word boundaries"""
+        found = set()
+        state = 0
+        for position, char in enumerate(text):
+            while state and char not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(char, 0)
+            for index in self._output[state]:
+                word = self.words[index]
+                start = position - len(word) + 1
+                before = text[start - 1] if start > 0 else ' '
+                after = text[position + 1] if position + 1 < len(text) else ' '
+                # "rag" must not match inside "storage"; CJK words have no spaces to check
+                if ASCII_WORD.match(word[0]) and ASCII_WORD.match(before):
+                    continue
+                if ASCII_WORD.match(word[-1]) and ASCII_WORD.match(after):
+                    continue
+                found.add(index)
+        return found
+
+    def match(self, text: str) -> List[str]:
+        """Keywords whose words all appear in text, in keywords.yaml order"""
+        found = self._found_words(text.lower())
+        return [keyword for keyword, required in zip(self.keywords, self.requirements) if required and required <= found]
+
+class FeedDiscovery:
+    """Conditional-GET poller for feeds and sitemaps with per-source state in output/state"""
+
+    def __init__(self, config: Optional[Config] = None, state_path=None):
+        self.config = config or Config()
+        self.state_path = state_path or STATE_DIR / 'feeds.json'
+        self.matcher = KeywordMatcher(self.config.keyword_list)
+        # Entries count as new until their article is published, so one lost downstream comes back
+        self.published = ArticleCatalog().published_urls()
+        self.resolver = DateResolver()
+        self.cutoff = datetime.now(timezone.utc) - timedelta(days=max_age_days(self.config))
+        self.state: Dict[str, Dict[str, Any]] = {}
+        if self.state_path.exists():
+            try:
+                with open(self.state_path, 'r', encoding='utf-8') as f:
+                    self.state = json.load(f)
+            except Exception as e:
+                print(f"Warning: Could not read feed state {self.state_path}: {e}")
+
+        self.session = requests.Session()
+        self.session.headers.update({
+            'User-Agent': 'Mozilla/5.0 (compatible; TechInsightHarvester/1.0)'
+        })
+
+    def _fetch(self, url: str) -> Optional[requests.Response]:
+        """Streaming GET with If-None-Match/If-Modified-Since; None when unchanged or failed
+
+        The response's validators are stored by poll() only once its body parsed cleanly.
+        """
+        source_state = self.state.setdefault(url, {})
+        headers = {}
+        if source_state.get('etag'):
+            headers['If-None-Match'] = source_state['etag']
+        if source_state.get('last_modified'):
+            headers['If-Modified-Since'] = source_state['last_modified']
+
+        try:
+            response = self.session.get(url, headers=headers, timeout=20, stream=True)
+            if response.status_code == 304:
+                response.close()
+                return None
+            response.raise_for_status()
+        except requests.RequestException as e:
+            print(f"Error fetching feed {url}: {e}")
+            return None
+
+        response.raw.decode_content = True
+        return response
+
+    def _entry_fields(self, element: ET.Element) -> Dict[str, Any]:
+        """Flatten an item/entry/url element into the fields discovery needs"""
+        fields: Dict[str, Any] = {}
+        for child in element.iter():
+            name = local_name(child.tag)
+            text = (child.text or '').strip()
+            if name == 'link':
+                # Atom links carry the URL in href; prefer rel="alternate" (or no rel)
+                href = child.get('href')
+                if href and child.get('rel', 'alternate') == 'alternate':
+                    fields.setdefault('link', href)
+                elif text:
+                    fields.setdefault('link', text)
+            elif name in ('loc', 'guid', 'id', 'title', 'lastmod', 'creator') and text:
+                fields.setdefault(name, text)
+            elif name in ('pubDate', 'published', 'publication_date', 'date', 'updated') and text:
+                fields.setdefault('date', text)
+            elif name in ('description', 'summary') and text:
+                fields.setdefault('summary', text)
+            elif name in ('encoded', 'content') and text:
+                fields.setdefault('content', text)
+            elif name == 'author':
+                author = child.findtext('{http://www.w3.org/2005/Atom}name') or text
+                if author:
+                    fields.setdefault('creator', author)
+        return fields
+
+    def _html_to_text(self, html: str) -> str:
+        soup = BeautifulSoup(html, 'html.parser')
+        paragraphs = [p.get_text(' ', strip=True) for p in soup.find_all(['p', 'li', 'h2', 'h3', 'pre'])]
+        text = '\n\n'.join(paragraph for paragraph in paragraphs if paragraph)
+        return text or soup.get_text(' ', strip=True)
+
+    def _to_article(self, fields: Dict[str, Any], source: str) -> Optional[Dict[str, Any]]:
+        """Discovery record for a fresh, unpublished, keyword-matching entry"""
+        url = fields.get('link') or fields.get('loc')
+        if not url or url in self.published:
+            return None
+        domain = urlparse(url).netloc
+        published = self.resolver.parse(fields.get('date') or fields.get('lastmod'), domain)
+        if published and published < self.cutoff:
+            return None
+
+        summary = self._html_to_text(fields['summary']) if fields.get('summary') else ''
+        # Sitemap entries often have no title: the URL slug is the only text to match
+        slug = unquote(urlparse(url).path.rstrip('/').rsplit('/', 1)[-1]).replace('-', ' ').replace('_', ' ')
+        title = fields.get('title') or slug
+        matched = self.matcher.match(f"{title}\n{summary}\n{slug}")
+        if not matched:
+            return None
+
+        article = {
+            'title': title,
+            'url': url,
+            'snippet': summary[:300],
+            'published_date': published.isoformat() if published else '',
+            'date_source': 'feed' if published else 'unknown',
+            'keyword': matched[0],
+            'matched_keywords': matched,
+            'source_domain': domain,
+            'discovered_via': source,
+            'crawled_at': datetime.utcnow().isoformat()
+        }
+        content = self._html_to_text(fields['content']) if fields.get('content') else ''
+        if len(content) >= FEED_MIN_CONTENT_CHARS:
+            # Full text in the feed: reader.py uses it instead of fetching the page
+            article.update({
+                'content': content,
+                'author': fields.get('creator', ''),
+                'word_count': len(content.split()),
+                'extraction_method': 'feed'
+            })
+        return article
+
+    def poll(self, url: str, depth: int = 0) -> List[Dict[str, Any]]:
+        """New matching entries from one feed or sitemap (following a sitemap index one level)"""
+        response = self._fetch(url)
+        if response is None:
+            return []
+
+        # Per-source entry IDs from earlier versions; publication is now tracked by the catalog
+        self.state[url].pop('seen', None)
+        articles: List[Dict[str, Any]] = []
+        child_sitemaps: List[Tuple[str, Optional[datetime]]] = []
+        entries = 0
+        path: List[str] = []
+        parsed = False
+
+        try:
+            # Stream-parse straight from the socket and free each entry once handled
+            for event, element in ET.iterparse(response.raw, events=('start', 'end')):
+                if event == 'start':
+                    path.append(element.tag)
+                    continue
+                path.pop()
+                parent = path[-1] if path else ''
+                name = local_name(element.tag)
+                if element.tag == f"{SITEMAP_NS}sitemap" and parent == f"{SITEMAP_NS}sitemapindex":
+                    fields = self._entry_fields(element)
+                    if fields.get('loc'):
+                        child_sitemaps.append((fields['loc'], self.resolver.parse(fields.get('lastmod'))))
+                    element.clear()
+                    continue
+                # <url> only counts inside a sitemap <urlset>: RSS channels have <image><url> too
+                is_sitemap_url = element.tag == f"{SITEMAP_NS}url" and parent == f"{SITEMAP_NS}urlset"
+                if not is_sitemap_url and name not in FEED_ENTRY_TAGS:
+                    continue
+
+                entries += 1
+                fields = self._entry_fields(element)
+                element.clear()
+                article = self._to_article(fields, url)
+                if article:
+                    articles.append(article)
+                if entries >= FEED_MAX_ENTRIES:
+                    break
+            parsed = True
+        except Exception as e:
+            # Malformed XML or a connection dropped mid-body (urllib3 errors are not RequestExceptions)
+            print(f"Error parsing feed {url}: {e}")
+        finally:
+            response.close()
+
+        if parsed:
+            # A truncated body keeps the old validators, so the next poll fetches it in full
+            self.state[url].update({
+                'etag': response.headers.get('ETag'),
+                'last_modified': response.headers.get('Last-Modified'),
+                'fetched_at': datetime.utcnow().isoformat()
+            })
+
+        if depth == 0 and child_sitemaps:
+            # Only recently modified child sitemaps can hold new articles
+            recent = [loc for loc, modified in child_sitemaps if modified is None or modified >= self.cutoff]
+            for child_url in recent[:FEED_MAX_CHILD_SITEMAPS]:
+                articles.extend(self.poll(child_url, depth + 1))
+        return articles
+
+    def discover(self) -> List[Dict[str, Any]]:
+        """Poll every configured source; URLs appear once even if several feeds list them"""
+        sources = self.config.feed_sources
+        print(f"Polling {len(sources)} feed sources...")
+        articles: Dict[str, Dict[str, Any]] = {}
+        for i, source in enumerate(sources, 1):
+            found = self.poll(source)
+            print(f"[{i}/{len(sources)}] {source}: {len(found)} new matching entries")
+            for article in found:
+                articles.setdefault(article['url'], article)
+        self.save_state()
+
+        # Undated entries get the same page-head probe and age cutoff as search results
+        result = FreshnessFilter(resolver=self.resolver).filter(list(articles.values()))
+        if result['dropped']:
+            print(f"Dropped {len(result['dropped'])} entries outside the freshness window")
+        return result['kept']
+
+    def save_state(self):
+        self.state_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.state_path.with_suffix('.json.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.state, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.state_path)
+
+def main():
+    """Main feed discovery execution"""
+    try:
+        discovery = FeedDiscovery()
+        found = discovery.discover()
+
+        output_file = OUTPUT_DIR / f"feed_urls_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+        with open(output_file, 'w', encoding='utf-8') as f:
+            json.dump({
+                'crawled_at': datetime.utcnow().isoformat(),
+                'total_articles': len(found),
+                'articles': found
+            }, f, indent=2, ensure_ascii=False)
+
+        # Merge into the latest URL list produced by crawler.py
+        latest_file = OUTPUT_DIR / "url_list.json"
+        data = {'crawled_at': datetime.utcnow().isoformat(), 'articles': []}
+        if latest_file.exists():
+            with open(latest_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        known = {article['url'] for article in data.get('articles', [])}
+        added = [article for article in found if article['url'] not in known]
+        articles = data.get('articles', []) + added
+        with open(latest_file, 'w', encoding='utf-8') as f:
+            json.dump({**data, 'total_articles': len(articles), 'articles': articles}, f, indent=2, ensure_ascii=False)
+
+        print("Feed discovery completed successfully!")
+        print(f"New URLs: {len(added)} ({sum(1 for article in added if article.get('content'))} with full text)")
+        print(f"Results: {output_file}")
+
+    except Exception as e:
+        print(f"Feed discovery failed: {e}")
+        raise
+
+if __name__ == "__main__":
+    main()
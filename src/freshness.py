@@ -0,0 +1,302 @@
+"""
+Publish-date resolution and freshness filtering between crawler.py and reader.py
+Resolves real publish dates from search metadata (and optionally a small partial fetch),
+then drops articles outside the configured window before any full fetch or LLM call
+"""
+import json
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional, Tuple
+from datetime import datetime, timedelta, timezone
+import requests
+from dateutil import parser as date_parser
+from config import (
+    Config, OUTPUT_DIR, STATE_DIR, FRESHNESS_MAX_AGE_DAYS, FRESHNESS_KEEP_UNDATED,
+    FRESHNESS_PROBE, FRESHNESS_PROBE_BYTES, FRESHNESS_PROBE_WORKERS
+)
+
+# Search pagemap sections and keys that carry a publish date, most reliable first
+PAGEMAP_DATE_FIELDS = [
+    ('metatags', 'article:published_time'),
+    ('newsarticle', 'datepublished'),
+    ('article', 'datepublished'),
+    ('blogposting', 'datepublished'),
+    ('metatags', 'og:article:published_time'),
+    ('metatags', 'datepublished'),
+    ('metatags', 'publishedtime'),
+    ('metatags', 'parsely-pub-date'),
+    ('metatags', 'sailthru.date'),
+    ('metatags', 'dc.date'),
+    ('metatags', 'dcterms.created'),
+    ('metatags', 'pubdate'),
+    ('metatags', 'publishdate'),
+    ('metatags', 'date'),
+]
+
+# Tried before dateutil; the format that worked is remembered per domain
+KNOWN_FORMATS = [
+    '%Y-%m-%dT%H:%M:%S%z',
+    '%Y-%m-%dT%H:%M:%S.%f%z',
+    '%Y-%m-%dT%H:%M:%SZ',
+    '%Y-%m-%dT%H:%M:%S',
+    '%Y-%m-%d %H:%M:%S',
+    '%Y-%m-%d',
+    '%Y/%m/%d',
+    '%a, %d %b %Y %H:%M:%S %Z',
+    '%B %d, %Y',
+    '%b %d, %Y',
+]
+
+SNIPPET_ABSOLUTE = re.compile(r'^([A-Z][a-z]{2,8} \d{1,2}, \d{4})\s*(?:\.\.\.|·|-)')
+SNIPPET_RELATIVE = re.compile(r'^(\d+) (minute|hour|day|week)s? ago\b')
+PAGE_DATE_PATTERNS = [
+    re.compile(r'<meta[^>]+(?:property|name)=["\'](?:article:published_time|og:published_time|datePublished|pubdate)["\'][^>]*content=["\']([^"\']+)', re.I),
+    re.compile(r'<meta[^>]+content=["\']([^"\']+)["\'][^>]*(?:property|name)=["\'](?:article:published_time|og:published_time|datePublished|pubdate)["\']', re.I),
+    re.compile(r'"datePublished"\s*:\s*"([^"]+)"'),
+    re.compile(r'<time[^>]+datetime=["\']([^"\']+)', re.I),
+]
+
+class DateResolver:
+    """Parses publish dates and remembers, per domain, which field and format yielded one"""
+
+    def __init__(self, cache_path=None):
+        self.cache_path = cache_path or STATE_DIR / 'date_formats.json'
+        self.domains: Dict[str, Dict[str, Any]] = {}
+        self._dirty = False
+        if self.cache_path.exists():
+            try:
+                with open(self.cache_path, 'r', encoding='utf-8') as f:
+                    self.domains = json.load(f)
+            except Exception as e:
+                print(f"Warning: Could not read date format cache {self.cache_path}: {e}")
+
+    def parse(self, value: Any, domain: str = '') -> Optional[datetime]:
+        """UTC datetime from a date string, trying the domain's cached format first"""
+        if not value or not isinstance(value, str):
+            return None
+        value = value.strip()
+        cached = self.domains.get(domain, {}).get('format')
+        if cached == 'dateutil':
+            formats = []  # This domain's dates never match a fixed format
+        elif cached:
+            formats = [cached] + [fmt for fmt in KNOWN_FORMATS if fmt != cached]
+        else:
+            formats = KNOWN_FORMATS
+
+        parsed, used = None, 'dateutil'
+        for fmt in formats:
+            try:
+                parsed, used = datetime.strptime(value, fmt), fmt
+                break
+            except ValueError:
+                continue
+        if parsed is None:
+            try:
+                parsed = date_parser.parse(value)
+            except (ValueError, OverflowError):
+                return None
+
+        if parsed.tzinfo is None:
+            parsed = parsed.replace(tzinfo=timezone.utc)
+        parsed = parsed.astimezone(timezone.utc)
+        # Dates in the future or before the web are metadata noise
+        if parsed > datetime.now(timezone.utc) + timedelta(days=1) or parsed.year < 1995:
+            return None
+
+        if domain and self.domains.get(domain, {}).get('format') != used:
+            self.domains.setdefault(domain, {})['format'] = used
+            self._dirty = True
+        return parsed
+
+    def resolve_pagemap(self, item: Dict[str, Any], domain: str) -> Tuple[Optional[datetime], str]:
+        """Publish date from a search result's pagemap or snippet, with where it came from"""
+        pagemap = item.get('pagemap', {})
+        fields = PAGEMAP_DATE_FIELDS
+        cached_field = self.domains.get(domain, {}).get('field')
+        if cached_field:
+            section, key = cached_field.split(':', 1)
+            fields = [(section, key)] + [field for field in fields if field != (section, key)]
+
+        for section, key in fields:
+            for meta in pagemap.get(section, []):
+                parsed = self.parse(meta.get(key), domain)
+                if parsed:
+                    field = f"{section}:{key}"
+                    if cached_field != field:
+                        self.domains.setdefault(domain, {})['field'] = field
+                        self._dirty = True
+                    return parsed, f"pagemap {field}"
+
+        parsed = self.parse_snippet(item.get('snippet', ''))
+        if parsed:
+            return parsed, 'snippet'
+        return None, 'unknown'
+
+    def parse_snippet(self, snippet: str) -> Optional[datetime]:
+        """Google prefixes many snippets with 'Jan 5, 2026 ...' or '3 days ago ...'"""
+        match = SNIPPET_ABSOLUTE.match(snippet or '')
+        if match:
+            return self.parse(match.group(1))
+        match = SNIPPET_RELATIVE.match(snippet or '')
+        if match:
+            return datetime.now(timezone.utc) - timedelta(**{f"{match.group(2)}s": int(match.group(1))})
+        return None
+
+    def parse_page_head(self, html: str, domain: str) -> Optional[datetime]:
+        """Publish date from the first bytes of a page (meta tags, JSON-LD or <time>)"""
+        for pattern in PAGE_DATE_PATTERNS:
+            match = pattern.search(html)
+            if match:
+                parsed = self.parse(match.group(1), domain)
+                if parsed:
+                    return parsed
+        return None
+
+    def save(self) -> Optional[str]:
+        """Persist the per-domain cache if it changed"""
+        if not self._dirty:
+            return None
+        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.cache_path.with_suffix('.json.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.domains, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.cache_path)
+        self._dirty = False
+        return str(self.cache_path)
+
+def max_age_days(config: Optional[Config] = None) -> int:
+    """Configured window, or the crawler's search date_range when unset"""
+    if FRESHNESS_MAX_AGE_DAYS:
+        return FRESHNESS_MAX_AGE_DAYS
+    date_range = (config or Config()).search_config.get('date_range', 'week')
+    return {'day': 1, 'week': 7, 'month': 31, 'year': 366}.get(date_range, 7)
+
+class FreshnessFilter:
+    """Fills in missing publish dates with a partial fetch and drops stale articles"""
+
+    def __init__(self, resolver: Optional[DateResolver] = None, probe: bool = FRESHNESS_PROBE):
+        self.resolver = resolver or DateResolver()
+        self.probe = probe
+        self.max_age = timedelta(days=max_age_days())
+        self.session = requests.Session()
+        self.session.headers.update({
+            'User-Agent': 'Mozilla/5.0 (compatible; TechInsightHarvester/1.0)'
+        })
+
+    def probe_date(self, article: Dict[str, Any]) -> Optional[datetime]:
+        """Fetch only the first FRESHNESS_PROBE_BYTES of the page and look for a publish date"""
+        try:
+            response = self.session.get(
+                article['url'],
+                headers={'Range': f"bytes=0-{FRESHNESS_PROBE_BYTES - 1}"},
+                timeout=5,
+                stream=True
+            )
+            try:
+                if response.status_code >= 400:
+                    return None
+                # Servers that ignore Range still stop here: only the head of the body is read
+                chunk = response.raw.read(FRESHNESS_PROBE_BYTES, decode_content=True) or b''
+            finally:
+                response.close()
+            html = chunk.decode(response.encoding or 'utf-8', errors='ignore')
+            return self.resolver.parse_page_head(html, article.get('source_domain', ''))
+        except Exception as e:
+            print(f"Date probe failed for {article.get('url', 'unknown')}: {e}")
+            return None
+
+    def filter(self, articles: List[Dict[str, Any]]) -> Dict[str, List[Dict[str, Any]]]:
+        """Split articles into fresh (with normalized published_date) and dropped"""
+        resolved = []
+        undated = []
+        for article in articles:
+            # Crawler dates are already normalized ISO strings, so they must not touch the domain cache
+            published = self.resolver.parse(article.get('published_date'))
+            if published:
+                resolved.append((article, published))
+            else:
+                undated.append(article)
+
+        if self.probe and undated:
+            with ThreadPoolExecutor(max_workers=FRESHNESS_PROBE_WORKERS) as executor:
+                probed = list(executor.map(self.probe_date, undated))
+            still_undated = []
+            for article, published in zip(undated, probed):
+                if published:
+                    resolved.append(({**article, 'date_source': 'page head'}, published))
+                else:
+                    still_undated.append(article)
+            undated = still_undated
+
+        cutoff = datetime.now(timezone.utc) - self.max_age
+        kept, dropped = [], []
+        for article, published in resolved:
+            article = {**article, 'published_date': published.isoformat()}
+            if published < cutoff:
+                dropped.append({**article, 'freshness_reason': 'stale'})
+            else:
+                kept.append(article)
+        for article in undated:
+            article = {**article, 'published_date': '', 'date_source': 'unknown'}
+            if FRESHNESS_KEEP_UNDATED:
+                kept.append(article)
+            else:
+                dropped.append({**article, 'freshness_reason': 'no publish date'})
+
+        # Keep the crawler's order for the articles that survive
+        order = {article['url']: position for position, article in enumerate(articles)}
+        kept.sort(key=lambda article: order.get(article['url'], 0))
+        self.resolver.save()
+        return {'kept': kept, 'dropped': dropped}
+
+def main():
+    """Main freshness filtering execution"""
+    try:
+        input_file = OUTPUT_DIR / "url_list.json"
+        if not input_file.exists():
+            raise FileNotFoundError(f"URL list not found: {input_file}")
+
+        with open(input_file, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+
+        articles = data.get('articles', [])
+        freshness = FreshnessFilter()
+        result = freshness.filter(articles)
+
+        report_file = OUTPUT_DIR / f"freshness_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+        with open(report_file, 'w', encoding='utf-8') as f:
+            json.dump({
+                'processed_at': datetime.utcnow().isoformat(),
+                'max_age_days': freshness.max_age.days,
+                'input_articles': len(articles),
+                'kept_articles': len(result['kept']),
+                'dropped': [
+                    {
+                        'url': article.get('url', ''),
+                        'published_date': article.get('published_date', ''),
+                        'reason': article['freshness_reason']
+                    }
+                    for article in result['dropped']
+                ]
+            }, f, indent=2, ensure_ascii=False)
+
+        # Overwrite the latest URL list; the timestamped crawler output keeps the full list
+        with open(input_file, 'w', encoding='utf-8') as f:
+            json.dump({
+                **data,
+                'filtered_at': datetime.utcnow().isoformat(),
+                'total_articles': len(result['kept']),
+                'articles': result['kept']
+            }, f, indent=2, ensure_ascii=False)
+
+        print("Freshness filtering completed successfully!")
+        print(f"Articles: {len(articles)} -> {len(result['kept'])} ({len(result['dropped'])} outside {freshness.max_age.days} days)")
+        print(f"Report: {report_file}")
+
+    except Exception as e:
+        print(f"Freshness filtering failed: {e}")
+        raise
+
+if __name__ == "__main__":
+    main()
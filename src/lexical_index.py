@@ -0,0 +1,176 @@
+"""
+BM25 inverted index for lexical search
+Built by embed_ingest.py next to the vector snapshot so /search can answer
+exact product-name queries without an embedding call
+"""
+import json
+import re
+import unicodedata
+from collections import Counter
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Tuple
+import numpy as np
+from vector_index import FilterColumns
+
+# Latin words keep characters common in tech names (c++, c#, node.js, ci/cd parts)
+LATIN_TOKEN = re.compile(r'[a-z0-9][a-z0-9+#]*(?:\.[a-z0-9]+)*')
+# Hiragana, Katakana (incl. prolonged sound mark) and CJK ideographs
+CJK_RUN = re.compile(r'[぀-ゟ゠-ヿ一-鿿㐀-䶿]+')
+TOKEN_PATTERN = re.compile(f'{LATIN_TOKEN.pattern}|{CJK_RUN.pattern}')
+
+TITLE_WEIGHT = 3  # Title terms count this many times toward term frequency
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased Latin words plus character bigrams for Japanese/CJK runs"""
+    text = unicodedata.normalize('NFKC', text or '').lower()
+    tokens = []
+    for match in TOKEN_PATTERN.finditer(text):
+        token = match.group(0)
+        if CJK_RUN.fullmatch(token):
+            # Japanese has no spaces; overlapping bigrams need no dictionary
+            if len(token) == 1:
+                tokens.append(token)
+            else:
+                tokens.extend(token[i:i + 2] for i in range(len(token) - 1))
+        else:
+            tokens.append(token)
+    return tokens
+
+class BM25Index:
+    """Okapi BM25 over a CSR-style postings layout"""
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.ids: List[str] = []
+        self.metadata: List[Dict[str, Any]] = []
+        self.vocabulary: Dict[str, int] = {}
+        self.term_offsets = np.zeros(1, dtype=np.int64)
+        self.postings_docs = np.zeros(0, dtype=np.int32)
+        self.postings_tf = np.zeros(0, dtype=np.float32)
+        self.doc_lengths = np.zeros(0, dtype=np.float32)
+        self.idf = np.zeros(0, dtype=np.float32)
+        self._filter_columns: Optional[FilterColumns] = None
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def build(self, ids: List[str], titles: List[str], bodies: List[str], metadata: List[Dict[str, Any]]):
+        """Index documents; title terms are weighted by TITLE_WEIGHT"""
+        postings: Dict[str, List[Tuple[int, int]]] = {}
+        lengths = []
+        for position, (title, body) in enumerate(zip(titles, bodies)):
+            counts = Counter(tokenize(body))
+            for token in tokenize(title):
+                counts[token] += TITLE_WEIGHT
+            lengths.append(sum(counts.values()))
+            for token, count in counts.items():
+                postings.setdefault(token, []).append((position, count))
+
+        terms = sorted(postings)
+        self.ids = list(ids)
+        self.metadata = list(metadata)
+        self.vocabulary = {term: index for index, term in enumerate(terms)}
+        sizes = np.array([len(postings[term]) for term in terms], dtype=np.int64)
+        self.term_offsets = np.concatenate([[0], np.cumsum(sizes)]).astype(np.int64)
+        self.postings_docs = np.array([doc for term in terms for doc, _ in postings[term]], dtype=np.int32)
+        self.postings_tf = np.array([tf for term in terms for _, tf in postings[term]], dtype=np.float32)
+        self.doc_lengths = np.array(lengths, dtype=np.float32)
+        self._compute_idf()
+
+    def _compute_idf(self):
+        document_frequency = np.diff(self.term_offsets).astype(np.float32)
+        count = max(len(self.ids), 1)
+        self.idf = np.log(1.0 + (count - document_frequency + 0.5) / (document_frequency + 0.5)).astype(np.float32)
+
+    def scores(self, query: str) -> np.ndarray:
+        """BM25 score of every document for the query"""
+        scores = np.zeros(len(self.ids), dtype=np.float32)
+        if not len(self.ids):
+            return scores
+
+        average_length = float(self.doc_lengths.mean()) or 1.0
+        for token in set(tokenize(query)):
+            term = self.vocabulary.get(token)
+            if term is None:
+                continue
+            start, end = self.term_offsets[term], self.term_offsets[term + 1]
+            docs = self.postings_docs[start:end]
+            tf = self.postings_tf[start:end]
+            norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[docs] / average_length)
+            scores[docs] += self.idf[term] * tf * (self.k1 + 1) / (tf + norm)
+        return scores
+
+    def search(self, query: str, limit: int = 10, filters: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """Top documents with a positive BM25 score, best first"""
+        scores = self.scores(query)
+        if filters:
+            if self._filter_columns is None:
+                self._filter_columns = FilterColumns(self.metadata)
+            rows = self._filter_columns.candidates(filters)
+            mask = np.zeros(len(scores), dtype=bool)
+            mask[rows] = True
+            scores[~mask] = 0
+        matched = np.flatnonzero(scores > 0)
+        if not len(matched):
+            return []
+        if len(matched) > limit:
+            matched = matched[np.argpartition(-scores[matched], limit - 1)[:limit]]
+        matched = matched[np.argsort(-scores[matched])]
+        return [
+            {'id': self.ids[position], **self.metadata[position], 'score': float(scores[position])}
+            for position in matched
+        ]
+
+    def save(self, directory: Path):
+        """Write lexical.npz and lexical_meta.json into a snapshot directory"""
+        directory = Path(directory)
+        terms = sorted(self.vocabulary, key=self.vocabulary.get)
+        np.savez(
+            directory / 'lexical.npz',
+            term_offsets=self.term_offsets,
+            postings_docs=self.postings_docs,
+            postings_tf=self.postings_tf,
+            doc_lengths=self.doc_lengths
+        )
+        with open(directory / 'lexical_meta.json', 'w', encoding='utf-8') as f:
+            json.dump({
+                'k1': self.k1,
+                'b': self.b,
+                'terms': terms,
+                'ids': self.ids,
+                'metadata': self.metadata
+            }, f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, directory: Path) -> Optional['BM25Index']:
+        """Load an index saved by save(), or None if the snapshot has none"""
+        directory = Path(directory)
+        if not (directory / 'lexical.npz').exists():
+            return None
+
+        with open(directory / 'lexical_meta.json', 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        arrays = np.load(directory / 'lexical.npz')
+
+        index = cls(k1=meta['k1'], b=meta['b'])
+        index.ids = meta['ids']
+        index.metadata = meta['metadata']
+        index.vocabulary = {term: position for position, term in enumerate(meta['terms'])}
+        index.term_offsets = arrays['term_offsets']
+        index.postings_docs = arrays['postings_docs']
+        index.postings_tf = arrays['postings_tf']
+        index.doc_lengths = arrays['doc_lengths']
+        index._compute_idf()
+        return index
+
+def reciprocal_rank_fusion(result_lists: List[List[Dict[str, Any]]], limit: int, k: int = 60) -> List[Dict[str, Any]]:
+    """Fuse ranked lists by summing 1 / (k + rank); robust to incomparable score scales"""
+    fused: Dict[str, Dict[str, Any]] = {}
+    for results in result_lists:
+        for rank, result in enumerate(results):
+            entry = fused.setdefault(result['id'], {**result, 'score': 0.0})
+            entry['score'] += 1.0 / (k + rank + 1)
+            if 'similarity' in result:
+                entry['similarity'] = result['similarity']
+    return sorted(fused.values(), key=lambda item: item['score'], reverse=True)[:limit]
@@ -1,12 +1,51 @@
 """
-LLM processing using OpenAI GPT-4o
+LLM processing using OpenAI GPT-4o, optionally behind a cheaper first-tier model
 Generates SEO titles, summaries, tags, and JSON-LD metadata
 """
 import json
+import time
 import openai
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Tuple
 from datetime import datetime
-from config import Config, OPENAI_API_KEY, OUTPUT_DIR
+from config import (
+    Config, OPENAI_API_KEY, OUTPUT_DIR, LLM_ROUTING, LLM_SMALL_MODEL, LLM_LARGE_MODEL,
+    LLM_ESCALATE_CONTENT_CHARS, LLM_SUMMARY_MIN_CHARS, LLM_SUMMARY_MAX_CHARS, LLM_MAX_RETRIES
+)
+from clustering import group_by_story
+from dedup import merge_alternate_sources
+
+MAX_CONTENT_LENGTH = 8000  # Leave room for prompt and response (GPT-4o context limit)
+
+# USD per million (input, output) tokens, for the per-call cost estimate
+MODEL_PRICING = {
+    'gpt-4o': (2.50, 10.00),
+    'gpt-4o-mini': (0.15, 0.60),
+}
+MAX_OUTPUT_TOKENS = 400  # Title, summary, tag and relevance only; JSON-LD is built locally
+
+def usage_summary(articles: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Per-model calls, outcomes, latency and cost across a run's cascade records"""
+    models: Dict[str, Dict[str, Any]] = {}
+    for article in articles:
+        for call in article.get('llm_cascade', []):
+            stats = models.setdefault(call['model'], {
+                'calls': 0, 'accepted': 0, 'escalated': 0, 'retried': 0, 'failed': 0,
+                'latency_ms': 0.0, 'prompt_tokens': 0, 'completion_tokens': 0, 'cost_usd': 0.0
+            })
+            stats['calls'] += 1
+            stats[call['outcome']] += 1
+            for field in ('latency_ms', 'prompt_tokens', 'completion_tokens', 'cost_usd'):
+                stats[field] += call.get(field, 0)
+    
+    for stats in models.values():
+        stats['avg_latency_ms'] = round(stats['latency_ms'] / stats['calls'], 1)
+        stats['latency_ms'] = round(stats['latency_ms'], 1)
+        stats['cost_usd'] = round(stats['cost_usd'], 6)
+    return {
+        'routing': LLM_ROUTING,
+        'models': models,
+        'total_cost_usd': round(sum(stats['cost_usd'] for stats in models.values()), 6)
+    }
 
 class LLMProcessor:
     """Processes articles using OpenAI GPT-4o"""
@@ -20,21 +59,81 @@ class LLMProcessor:
     
     def process_article(self, article: Dict[str, Any]) -> Dict[str, Any]:
         """Process a single article with LLM"""
-        try:
-            # Prepare content for LLM
-            content = self._prepare_content(article)
-            
-            # Generate LLM response
-            llm_response = self._call_llm(content)
-            
-            # Parse and validate response
-            processed_data = self._parse_llm_response(llm_response, article)
-            
-            return processed_data
+        # Prepare content for LLM
+        content = self._prepare_content(article)
+        
+        # Generate, parse and validate the LLM response
+        return self._generate(content, article)
+    
+    def process_story(self, articles: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Summarize several articles about one story with a single LLM call"""
+        # The most complete extraction becomes the page; every other source is listed on it
+        lead = max(articles, key=lambda article: len(article.get('content') or ''))
+        story = merge_alternate_sources(lead, [article for article in articles if article is not lead])
+        content = self._prepare_story_content(articles)
+        return self._generate(content, story, source_count=len(articles))
+    
+    def _route(self, content: str, source_count: int) -> Tuple[List[str], str]:
+        """Models to try in order, and why"""
+        if LLM_ROUTING != 'cascade':
+            return [LLM_LARGE_MODEL], 'single model'
+        if source_count > 1:
+            return [LLM_LARGE_MODEL], 'multi-source story'
+        if len(content) > LLM_ESCALATE_CONTENT_CHARS:
+            return [LLM_LARGE_MODEL], 'long article'
+        return [LLM_SMALL_MODEL, LLM_LARGE_MODEL], 'cascade'
+    
+    def _generate(self, content: str, article: Dict[str, Any], source_count: int = 1) -> Dict[str, Any]:
+        """Run the routed models in turn; earlier tiers are validated strictly and escalate on failure"""
+        models, route = self._route(content, source_count)
+        # The last model gets LLM_MAX_RETRIES more attempts (transient API errors, truncated or refused answers)
+        attempts = models + [models[-1]] * max(0, LLM_MAX_RETRIES)
+        tag = self._prefilled_tag(article)
+        cascade = []
+        error = None
+        
+        for position, model in enumerate(attempts):
+            final = position == len(attempts) - 1
+            # Filled in by _call_llm even when the call or validation fails, so every tier's cost is counted
+            call = {'model': model}
+            try:
+                llm_response = self._call_llm(content, call, source_count=source_count, tag=tag, model=model)
+                result = self._parse_llm_response(llm_response, article, model=model, strict=model != models[-1])
+                cascade.append({**call, 'outcome': 'accepted'})
+                return {**result, 'llm_route': route, 'llm_cascade': cascade}
             
-        except Exception as e:
-            print(f"Error processing article {article.get('url', 'unknown')}: {e}")
-            return self._create_fallback_response(article, str(e))
+            except Exception as e:
+                error = str(e)
+                if final:
+                    outcome = 'failed'
+                else:
+                    outcome = 'retried' if attempts[position + 1] == model else 'escalated'
+                cascade.append({**call, 'outcome': outcome, 'reason': error})
+        
+        print(f"Error processing article {article.get('url', 'unknown')}: {error}")
+        return {**self._create_fallback_response(article, error), 'llm_route': route, 'llm_cascade': cascade}
+    
+    def _prefilled_tag(self, article: Dict[str, Any]) -> Optional[str]:
+        """Tag already chosen by the local triage classifier, if any"""
+        return article.get('tag') if article.get('tag_source') == 'triage' else None
+    
+    def _prepare_story_content(self, articles: List[Dict[str, Any]]) -> str:
+        """Prepare several sources for one prompt, sharing the content budget between them"""
+        budget = MAX_CONTENT_LENGTH // len(articles)
+        sources = []
+        for i, article in enumerate(articles, 1):
+            content = article.get('content', '')
+            if len(content) > budget:
+                content = content[:budget] + "..."
+            sources.append(f"""
+Source {i}: {article.get('title', '')} ({article.get('source_domain', '')})
+
+Snippet: {article.get('snippet', '')}
+
+Content:
+{content}
+""".strip())
+        return "\n\n---\n\n".join(sources)
     
     def _prepare_content(self, article: Dict[str, Any]) -> str:
         """Prepare article content for LLM processing"""
@@ -42,10 +141,9 @@ class LLMProcessor:
         content = article.get('content', '')
         snippet = article.get('snippet', '')
         
-        # Truncate content if too long (GPT-4o context limit)
-        max_content_length = 8000  # Leave room for prompt and response
-        if len(content) > max_content_length:
-            content = content[:max_content_length] + "..."
+        # Truncate content if too long
+        if len(content) > MAX_CONTENT_LENGTH:
+            content = content[:MAX_CONTENT_LENGTH] + "..."
         
         return f"""
 Title: {title}
@@ -56,87 +154,151 @@ Content:
 {content}
 """.strip()
     
-    def _call_llm(self, content: str) -> str:
-        """Call OpenAI GPT-4o with structured prompt"""
-        # Get available tags for the prompt
-        all_tags = self.config.all_tags
+    def _response_schema(self, tag: Optional[str]) -> Dict[str, Any]:
+        """JSON schema the reply must match; the tag is an enum of tags.yaml unless pre-filled"""
+        properties = {
+            'seo_title': {'type': 'string'},
+            'summary': {'type': 'string'},
+            'relevant': {'type': 'boolean'}
+        }
+        if not tag:
+            properties['tag'] = {'type': 'string', 'enum': sorted(self.config.all_tags)}
+        return {
+            'type': 'json_schema',
+            'json_schema': {
+                'name': 'article_metadata',
+                'strict': True,
+                'schema': {
+                    'type': 'object',
+                    'properties': properties,
+                    'required': list(properties),
+                    'additionalProperties': False
+                }
+            }
+        }
+    
+    def _call_llm(self, content: str, call: Dict[str, Any], source_count: int = 1, tag: Optional[str] = None,
+                  model: str = LLM_LARGE_MODEL) -> str:
+        """Call OpenAI with a schema-constrained prompt; a pre-filled tag drops the taxonomy from it
+        
+        Records the call's latency, token usage and estimated cost in call, including for calls
+        that fail or are refused.
+        """
         tag_hierarchy = self.config.tag_hierarchy
         tag_rules = self.config.tag_rules
         
-        system_prompt = f"""You are an expert technical content analyst. Your task is to analyze technology articles and generate structured metadata.
-
-Available tags (choose ONE that best fits):
+        if tag:
+            tag_section = f"""The article is already tagged "{tag}"; do not choose a tag.
+"""
+            fields = """3. "relevant": false if the page is off-topic, a login wall or has no real article content, otherwise true"""
+        else:
+            tag_section = f"""Available tags (choose ONE that best fits):
 {json.dumps(tag_hierarchy, indent=2)}
 
 Tag selection rules:
 - Choose exactly {tag_rules.get('max_tags_per_article', 1)} tag
 - Prefer specific tags over general categories when applicable
 - If no tag fits well, use "{tag_rules.get('fallback_tag', 'development')}"
+"""
+            fields = """3. "tag": Single most relevant tag from the provided taxonomy
+4. "relevant": false if the page is off-topic, a login wall or has no real article content, otherwise true"""
+        
+        system_prompt = f"""You are an expert technical content analyst. Your task is to analyze technology articles and generate structured metadata.
 
-You must respond with a valid JSON object containing:
+{tag_section}
+Respond with a JSON object containing:
 1. "seo_title": An engaging, SEO-optimized title (50-60 characters)
 2. "summary": A compelling 3-sentence summary highlighting key insights
-3. "tag": Single most relevant tag from the provided taxonomy
-4. "json_ld": TechArticle JSON-LD structured data
-
-Example response format:
-{{
-  "seo_title": "Revolutionary AI Framework Transforms Enterprise Development",
-  "summary": "A new AI framework promises to revolutionize how enterprises approach software development. The technology combines machine learning with traditional coding practices to automate routine tasks. Early adopters report 40% faster development cycles and improved code quality.",
-  "tag": "ai",
-  "json_ld": {{
-    "@context": "https://schema.org",
-    "@type": "TechArticle",
-    "headline": "Revolutionary AI Framework Transforms Enterprise Development",
-    "description": "A new AI framework promises to revolutionize...",
-    "author": {{"@type": "Person", "name": "Author Name"}},
-    "datePublished": "2024-01-01T00:00:00Z",
-    "publisher": {{"@type": "Organization", "name": "Publisher Name"}},
-    "mainEntityOfPage": "https://example.com/article"
-  }}
-}}"""
-
-        user_prompt = f"""Analyze this technology article and generate the required metadata:
+{fields}"""
 
-{content}
+        if source_count > 1:
+            user_prompt = f"""These {source_count} technology articles report the same story. Generate one set of metadata for the story, with a summary that combines the key facts from every source:
+
+{content}"""
+        else:
+            user_prompt = f"""Analyze this technology article and generate the required metadata:
 
-Respond with valid JSON only."""
+{content}"""
 
+        start = time.perf_counter()
         try:
-            response = self.client.chat.completions.create(
-                model="gpt-4o",
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                temperature=0.3,
-                max_tokens=1500
-            )
+            try:
+                response = self.client.chat.completions.create(
+                    model=model,
+                    messages=[
+                        {"role": "system", "content": system_prompt},
+                        {"role": "user", "content": user_prompt}
+                    ],
+                    response_format=self._response_schema(tag),
+                    temperature=0.3,
+                    max_tokens=MAX_OUTPUT_TOKENS
+                )
+            finally:
+                call['latency_ms'] = round((time.perf_counter() - start) * 1000, 1)
+            
+            usage = getattr(response, 'usage', None)
+            if usage is not None:
+                call['prompt_tokens'] = usage.prompt_tokens
+                call['completion_tokens'] = usage.completion_tokens
+                if model in MODEL_PRICING:
+                    input_price, output_price = MODEL_PRICING[model]
+                    call['cost_usd'] = round(
+                        (usage.prompt_tokens * input_price + usage.completion_tokens * output_price) / 1_000_000, 6
+                    )
+            
+            message = response.choices[0].message
+            if getattr(message, 'refusal', None):
+                raise ValueError(f"Model refused: {message.refusal}")
+            if response.choices[0].finish_reason == 'length':
+                raise ValueError("Response truncated at max_tokens")
             
-            return response.choices[0].message.content.strip()
+            return message.content
             
         except Exception as e:
             raise Exception(f"OpenAI API call failed: {e}")
     
-    def _parse_llm_response(self, llm_response: str, original_article: Dict[str, Any]) -> Dict[str, Any]:
-        """Parse and validate LLM response"""
+    def _build_json_ld(self, article: Dict[str, Any], headline: str, description: str, tag: str) -> Dict[str, Any]:
+        """TechArticle JSON-LD assembled from fields already known locally"""
+        json_ld = {
+            "@context": "https://schema.org",
+            "@type": "TechArticle",
+            "headline": headline,
+            "description": description,
+            "datePublished": article.get('published_date') or article.get('crawled_at') or datetime.utcnow().isoformat(),
+            "mainEntityOfPage": article.get('url', ''),
+            "keywords": tag
+        }
+        if article.get('author'):
+            json_ld["author"] = {"@type": "Person", "name": article['author']}
+        if article.get('source_domain'):
+            json_ld["publisher"] = {"@type": "Organization", "name": article['source_domain']}
+        return json_ld
+    
+    def _parse_llm_response(self, llm_response: str, original_article: Dict[str, Any],
+                            model: str = LLM_LARGE_MODEL, strict: bool = False) -> Dict[str, Any]:
+        """Parse and validate LLM response; strict mode rejects answers worth escalating"""
         try:
-            # Extract JSON from response (handle potential markdown formatting)
-            json_start = llm_response.find('{')
-            json_end = llm_response.rfind('}') + 1
-            
-            if json_start == -1 or json_end == 0:
-                raise ValueError("No JSON found in LLM response")
+            # The response format guarantees a bare JSON object matching the schema
+            parsed_data = json.loads(llm_response)
             
-            json_str = llm_response[json_start:json_end]
-            parsed_data = json.loads(json_str)
+            # A tag pre-filled by triage is kept; the LLM was not asked for one
+            prefilled_tag = self._prefilled_tag(original_article)
+            if prefilled_tag:
+                parsed_data['tag'] = prefilled_tag
             
             # Validate required fields
-            required_fields = ['seo_title', 'summary', 'tag', 'json_ld']
+            required_fields = ['seo_title', 'summary', 'tag']
             for field in required_fields:
                 if field not in parsed_data:
                     raise ValueError(f"Missing required field: {field}")
             
+            if strict:
+                summary_length = len(parsed_data['summary'] or '')
+                if not LLM_SUMMARY_MIN_CHARS <= summary_length <= LLM_SUMMARY_MAX_CHARS:
+                    raise ValueError(f"Summary length {summary_length} outside {LLM_SUMMARY_MIN_CHARS}-{LLM_SUMMARY_MAX_CHARS}")
+                if parsed_data['tag'] not in self.config.all_tags:
+                    raise ValueError(f"Invalid tag '{parsed_data['tag']}'")
+            
             # Validate tag is in allowed list
             if parsed_data['tag'] not in self.config.all_tags:
                 print(f"Warning: Invalid tag '{parsed_data['tag']}', using fallback")
@@ -148,9 +310,12 @@ Respond with valid JSON only."""
                 'seo_title': parsed_data['seo_title'],
                 'summary': parsed_data['summary'],
                 'tag': parsed_data['tag'],
-                'json_ld': parsed_data['json_ld'],
+                'json_ld': self._build_json_ld(
+                    original_article, parsed_data['seo_title'], parsed_data['summary'], parsed_data['tag']
+                ),
+                'llm_relevant': parsed_data.get('relevant', True) is not False,
                 'llm_processed_at': datetime.utcnow().isoformat(),
-                'llm_model': 'gpt-4o'
+                'llm_model': model
             }
             
             return result
@@ -163,35 +328,33 @@ Respond with valid JSON only."""
     def _create_fallback_response(self, article: Dict[str, Any], error: str) -> Dict[str, Any]:
         """Create fallback response when LLM processing fails"""
         title = article.get('title', 'Technology Article')
+        tag = self._prefilled_tag(article) or self.config.tag_rules.get('fallback_tag', 'development')
         
         return {
             **article,
             'seo_title': title[:60] if len(title) > 60 else title,
             'summary': article.get('snippet', 'Technology article summary not available.'),
-            'tag': self.config.tag_rules.get('fallback_tag', 'development'),
-            'json_ld': {
-                "@context": "https://schema.org",
-                "@type": "TechArticle",
-                "headline": title,
-                "description": article.get('snippet', ''),
-                "datePublished": article.get('published_date', datetime.utcnow().isoformat()),
-                "mainEntityOfPage": article.get('url', '')
-            },
+            'tag': tag,
+            'json_ld': self._build_json_ld(article, title, article.get('snippet', ''), tag),
             'llm_error': error,
             'llm_processed_at': datetime.utcnow().isoformat(),
             'llm_model': 'fallback'
         }
     
     def process_articles(self, articles: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """Process multiple articles"""
+        """Process multiple articles, one LLM call per story"""
         processed_articles = []
+        stories = group_by_story(articles)
         
-        print(f"Processing {len(articles)} articles with LLM...")
+        print(f"Processing {len(articles)} articles ({len(stories)} stories) with LLM...")
         
-        for i, article in enumerate(articles, 1):
-            print(f"[{i}/{len(articles)}] Processing: {article.get('title', 'Unknown')[:50]}...")
+        for i, story in enumerate(stories, 1):
+            print(f"[{i}/{len(stories)}] Processing: {story[0].get('title', 'Unknown')[:50]}...")
             
-            processed_article = self.process_article(article)
+            if len(story) > 1:
+                processed_article = self.process_story(story)
+            else:
+                processed_article = self.process_article(story[0])
             processed_articles.append(processed_article)
         
         return processed_articles
@@ -204,6 +367,7 @@ Respond with valid JSON only."""
             json.dump({
                 'processed_at': datetime.utcnow().isoformat(),
                 'total_articles': len(articles),
+                'llm_usage': usage_summary(articles),
                 'articles': articles
             }, f, indent=2, ensure_ascii=False)
         
@@ -233,6 +397,7 @@ def main():
             json.dump({
                 'processed_at': datetime.utcnow().isoformat(),
                 'total_articles': len(processed_articles),
+                'llm_usage': usage_summary(processed_articles),
                 'articles': processed_articles
             }, f, indent=2, ensure_ascii=False)
         
@@ -0,0 +1,103 @@
+"""
+Load test for the search API
+Measures requests/sec and latency percentiles as concurrency rises
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+from typing import List, Dict, Any
+from datetime import datetime
+import aiohttp
+import numpy as np
+from config import Config, OUTPUT_DIR
+
+async def _worker(session: aiohttp.ClientSession, url: str, queries: List[str], deadline: float,
+                  latencies: List[float], errors: Dict[str, int], unique: bool, counter: List[int]):
+    """Issue requests back-to-back until the deadline"""
+    while time.perf_counter() < deadline:
+        query = random.choice(queries)
+        if unique:
+            # Defeat the result/embedding caches so every request does real work
+            counter[0] += 1
+            query = f"{query} {counter[0]}"
+
+        start = time.perf_counter()
+        try:
+            async with session.get(url, params={'q': query}) as response:
+                await response.read()
+                if response.status != 200:
+                    errors[str(response.status)] = errors.get(str(response.status), 0) + 1
+                    continue
+        except Exception as e:
+            errors[type(e).__name__] = errors.get(type(e).__name__, 0) + 1
+            continue
+        latencies.append((time.perf_counter() - start) * 1000)
+
+async def run_level(base_url: str, queries: List[str], concurrency: int, duration: float, unique: bool) -> Dict[str, Any]:
+    """Run one concurrency level and summarize throughput and latency"""
+    latencies: List[float] = []
+    errors: Dict[str, int] = {}
+    counter = [0]
+    url = f"{base_url.rstrip('/')}/search"
+    timeout = aiohttp.ClientTimeout(total=60)
+
+    async with aiohttp.ClientSession(timeout=timeout, connector=aiohttp.TCPConnector(limit=concurrency)) as session:
+        start = time.perf_counter()
+        deadline = start + duration
+        await asyncio.gather(*[
+            _worker(session, url, queries, deadline, latencies, errors, unique, counter)
+            for _ in range(concurrency)
+        ])
+        elapsed = time.perf_counter() - start
+
+    result = {
+        'concurrency': concurrency,
+        'requests': len(latencies),
+        'errors': errors,
+        'requests_per_sec': round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+    }
+    if latencies:
+        values = np.array(latencies)
+        result.update({
+            'p50_ms': round(float(np.percentile(values, 50)), 2),
+            'p95_ms': round(float(np.percentile(values, 95)), 2),
+            'p99_ms': round(float(np.percentile(values, 99)), 2),
+            'max_ms': round(float(values.max()), 2),
+        })
+    return result
+
+def main():
+    """Main load test execution"""
+    parser = argparse.ArgumentParser(description="Load test the /search endpoint")
+    parser.add_argument('--url', default='http://localhost:12001', help="Search API base URL")
+    parser.add_argument('--concurrency', default='1,2,4,8,16,32', help="Comma-separated concurrency levels")
+    parser.add_argument('--duration', type=float, default=20, help="Seconds per concurrency level")
+    parser.add_argument('--unique-queries', action='store_true', help="Make every query unique to bypass caches")
+    args = parser.parse_args()
+
+    queries = Config().keyword_list or ['kubernetes deployment']
+    levels = [int(level) for level in args.concurrency.split(',') if level.strip()]
+
+    results = []
+    print(f"{'conc':>5} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>7}")
+    for concurrency in levels:
+        level = asyncio.run(run_level(args.url, queries, concurrency, args.duration, args.unique_queries))
+        results.append(level)
+        print(f"{concurrency:>5} {level['requests_per_sec']:>9} {level.get('p50_ms', '-'):>9} "
+              f"{level.get('p95_ms', '-'):>9} {level.get('p99_ms', '-'):>9} {sum(level['errors'].values()):>7}")
+
+    output_file = OUTPUT_DIR / f"load_test_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    with open(output_file, 'w', encoding='utf-8') as f:
+        json.dump({
+            'url': args.url,
+            'duration_per_level': args.duration,
+            'unique_queries': args.unique_queries,
+            'run_at': datetime.utcnow().isoformat(),
+            'levels': results
+        }, f, indent=2)
+    print(f"Load test results saved to: {output_file}")
+
+if __name__ == "__main__":
+    main()
@@ -4,28 +4,41 @@ Converts processed articles to Markdown files with front-matter
 """
 import json
 import re
-from typing import Dict, List, Any
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Any, Optional, Tuple
 from datetime import datetime
 from pathlib import Path
 from jinja2 import Environment, FileSystemLoader
 from slugify import slugify
-from config import Config, DOCS_DIR, TEMPLATES_DIR, OUTPUT_DIR
+from config import Config, DOCS_DIR, TEMPLATES_DIR, OUTPUT_DIR, MD_RENDER_WORKERS
+from slug_registry import SlugRegistry
+from catalog import ArticleCatalog, catalog_entry
+
+WRITE_BUFFER_BYTES = 1 << 16
+PROGRESS_EVERY = 100  # Bulk renders report progress every N articles
 
 class MarkdownWriter:
     """Converts processed articles to Docusaurus-compatible Markdown"""
     
-    def __init__(self):
+    def __init__(self, docs_dir: Optional[Path] = None):
         self.config = Config()
         
+        # One timestamp per run keeps the directory, filenames and slug checks consistent
+        self.run_started_at = datetime.now()
+        self.run_date = self.run_started_at.strftime('%Y%m%d')
+        
         # Create a new timestamped directory for this run
-        run_timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        self.docs_dir = DOCS_DIR / run_timestamp
+        self.docs_dir = Path(docs_dir) if docs_dir else DOCS_DIR / self.run_started_at.strftime('%Y%m%d_%H%M%S')
 
         self.templates_dir = TEMPLATES_DIR
         
         # Ensure directories exist
         self.docs_dir.mkdir(parents=True, exist_ok=True)
         
+        # Slugs are unique across every run directory; the registry loads lazily on first use
+        self.slug_registry = SlugRegistry(self.docs_dir.parent)
+        self.catalog_entries: List[Dict[str, Any]] = []
+        
         # Setup Jinja2 environment
         self.jinja_env = Environment(
             loader=FileSystemLoader(str(self.templates_dir)),
@@ -35,6 +48,9 @@ class MarkdownWriter:
         
         # Add custom filters
         self.jinja_env.filters['tojson'] = self._tojson_filter
+        
+        # Compile the article template once for the whole run
+        self.template = self.jinja_env.get_template('article.md')
     
     def _tojson_filter(self, value, indent=None):
         """Custom JSON filter for Jinja2"""
@@ -45,19 +61,11 @@ class MarkdownWriter:
         try:
             # Generate slug and filename
             slug = self._generate_slug(article)
-            filename = f"{datetime.now().strftime('%Y%m%d')}-{slug}.md"
-            filepath = self.docs_dir / filename
+            filepath = self.docs_dir / self._filename(slug)
             
-            # Prepare template context
-            context = self._prepare_context(article, slug)
-            
-            # Load and render template
-            template = self.jinja_env.get_template('article.md')
-            content = template.render(**context)
-            
-            # Write file
-            with open(filepath, 'w', encoding='utf-8') as f:
-                f.write(content)
+            # Render with the precompiled template and write the file
+            self._write_file(filepath, self.render_article(article, slug))
+            self.catalog_entries.append(catalog_entry(article, filepath, slug, self.run_started_at))
             
             print(f"Created: {filepath}")
             return str(filepath)
@@ -66,6 +74,18 @@ class MarkdownWriter:
             print(f"Error creating markdown for article: {e}")
             return ""
     
+    def render_article(self, article: Dict[str, Any], slug: str) -> str:
+        """Render one article to Markdown text"""
+        return self.template.render(**self._prepare_context(article, slug))
+    
+    def _filename(self, slug: str) -> str:
+        return f"{self.run_date}-{slug}.md"
+    
+    def _write_file(self, filepath: Path, content: str):
+        """Write a rendered page with a single buffered write"""
+        with open(filepath, 'w', encoding='utf-8', buffering=WRITE_BUFFER_BYTES) as f:
+            f.write(content)
+    
     def _generate_slug(self, article: Dict[str, Any]) -> str:
         """Generate URL-friendly slug from article title"""
         title = article.get('seo_title') or article.get('title', 'untitled')
@@ -73,22 +93,16 @@ class MarkdownWriter:
         # Create base slug
         base_slug = slugify(title, max_length=50)
         
-        # Ensure uniqueness by checking existing files
-        slug = base_slug
-        counter = 1
-        
-        while True:
-            test_filename = f"{datetime.now().strftime('%Y%m%d')}-{slug}.md"
-            test_filepath = self.docs_dir / test_filename
-            
-            if not test_filepath.exists():
-                break
-            
-            slug = f"{base_slug}-{counter}"
-            counter += 1
-        
+        # Ensure site-wide uniqueness with an in-memory lookup instead of probing files
+        slug = self.slug_registry.claim(base_slug)
+        self.slug_registry.assign(slug, f"{self.docs_dir.name}/{self._filename(slug)}")
         return slug
     
+    def save_slug_index(self) -> List[str]:
+        """Persist this run's slug shard, marking the run directory as indexed"""
+        self.slug_registry.add_run(self.docs_dir.name)
+        return self.slug_registry.save()
+    
     def _prepare_context(self, article: Dict[str, Any], slug: str) -> Dict[str, Any]:
         """Prepare template context with cleaned data"""
         context = dict(article)
@@ -109,6 +123,7 @@ class MarkdownWriter:
         context.setdefault('extraction_method', 'unknown')
         context.setdefault('llm_model', 'unknown')
         context.setdefault('json_ld', {})
+        context.setdefault('alternate_sources', [])
         
         # Format dates
         for date_field in ['crawled_at', 'llm_processed_at', 'published_date']:
@@ -145,19 +160,57 @@ class MarkdownWriter:
         except:
             return date_str
     
-    def process_articles(self, articles: List[Dict[str, Any]]) -> List[str]:
-        """Process multiple articles into Markdown files"""
+    def process_articles(self, articles: List[Dict[str, Any]], workers: int = MD_RENDER_WORKERS) -> List[str]:
+        """Render all articles with the precompiled template and write them in one pass
+        
+        workers > 0 renders in a process pool, which pays off for large backfills.
+        """
         created_files = []
         
         print(f"Creating Markdown files for {len(articles)} articles...")
         
-        for i, article in enumerate(articles, 1):
-            title = article.get('seo_title') or article.get('title', 'Unknown')
-            print(f"[{i}/{len(articles)}] Creating: {title[:50]}...")
+        # Slugs are assigned up front so uniqueness does not depend on render order
+        jobs = [(article, self._generate_slug(article)) for article in articles]
+        
+        if workers > 0 and len(jobs) > 1:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_render_worker, initargs=(str(self.docs_dir),)) as executor:
+                rendered = executor.map(_render_in_worker, jobs, chunksize=max(1, len(jobs) // (workers * 4)))
+                created_files = self._write_rendered(jobs, rendered)
+        else:
+            created_files = self._write_rendered(jobs, map(self._render_job, jobs))
+        
+        return created_files
+    
+    def _render_job(self, job: Tuple[Dict[str, Any], str]) -> Optional[str]:
+        """Render one (article, slug) job, returning None on failure"""
+        article, slug = job
+        try:
+            return self.render_article(article, slug)
+        except Exception as e:
+            print(f"Error creating markdown for article: {e}")
+            return None
+    
+    def _write_rendered(self, jobs: List[Tuple[Dict[str, Any], str]], rendered) -> List[str]:
+        """Write rendered pages in job order"""
+        created_files = []
+        for i, ((article, slug), content) in enumerate(zip(jobs, rendered), 1):
+            if content is None:
+                # Failed renders give their slug back before save_slug_index persists it
+                self.slug_registry.release(slug)
+                continue
             
-            filepath = self.create_markdown_file(article)
-            if filepath:
-                created_files.append(filepath)
+            filepath = self.docs_dir / self._filename(slug)
+            try:
+                self._write_file(filepath, content)
+            except Exception as e:
+                print(f"Error writing {filepath}: {e}")
+                self.slug_registry.release(slug)
+            else:
+                created_files.append(str(filepath))
+                self.catalog_entries.append(catalog_entry(article, filepath, slug, self.run_started_at))
+            
+            if i % PROGRESS_EVERY == 0 or i == len(jobs):
+                print(f"[{i}/{len(jobs)}] Created: {filepath.name}")
         
         return created_files
     
@@ -195,7 +248,7 @@ Welcome to our automatically curated collection of technology articles and insig
                 
                 index_content += f"- **[{title}]({url})** - {summary}\n"
         
-        index_content += f"\n\n*Last updated: {datetime.now().strftime('%Y-%m-%d %H:%M UTC')}*\n"
+        index_content += f"\n\n*Last updated: {self.run_started_at.strftime('%Y-%m-%d %H:%M UTC')}*\n"
         
         # Write index file
         index_file = self.docs_dir / "intro.md"
@@ -218,7 +271,7 @@ Welcome to our automatically curated collection of technology articles and insig
 
         category_data = {
             "label": f"Crawl: {category_label}",
-            "position": -int(datetime.now().timestamp()),
+            "position": -int(self.run_started_at.timestamp()),
             "link": {
                 "type": "doc",
                 "id": "intro"
@@ -231,6 +284,16 @@ Welcome to our automatically curated collection of technology articles and insig
         print(f"Created category file: {category_file_path}")
         return str(category_file_path)
 
+_worker_writer: Optional[MarkdownWriter] = None
+
+def _init_render_worker(docs_dir: str):
+    """Process pool initializer: compile the template once per worker"""
+    global _worker_writer
+    _worker_writer = MarkdownWriter(docs_dir=Path(docs_dir))
+
+def _render_in_worker(job: Tuple[Dict[str, Any], str]) -> Optional[str]:
+    return _worker_writer._render_job(job)
+
 def main():
     """Main markdown writer execution"""
     try:
@@ -246,6 +309,12 @@ def main():
         
         articles = data.get('articles', [])
         
+        # Articles the LLM judged off-topic are kept in llm_processed.json for triage training only
+        relevant = [article for article in articles if article.get('llm_relevant', True) is not False]
+        if len(relevant) < len(articles):
+            print(f"Skipping {len(articles) - len(relevant)} articles marked not relevant by the LLM")
+        articles = relevant
+        
         if not articles:
             print("No articles to process. Markdown generation skipped.")
             return
@@ -259,12 +328,18 @@ def main():
         # Create category file for Docusaurus
         category_file = writer.create_category_file()
         
+        # Record this run's slugs for future runs
+        slug_shards = writer.save_slug_index()
+        
+        # Append to the site-wide catalog and refresh only the tag/archive pages this run touches
+        catalog_pages = ArticleCatalog().publish(writer.catalog_entries)
+        
         print(f"Markdown generation completed successfully!")
         print(f"Created {len(created_files)} article files")
         print(f"Index file: {index_file}")
         
         # Save file list for commit
-        file_list = created_files + [index_file, category_file]
+        file_list = created_files + [index_file, category_file] + slug_shards + catalog_pages
         with open(OUTPUT_DIR / "created_files.json", 'w') as f:
             json.dump({
                 'created_at': datetime.utcnow().isoformat(),
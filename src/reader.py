@@ -4,37 +4,75 @@ Fetches HTML and extracts main content using multiple strategies
 """
 import json
 import requests
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from typing import Dict, List, Any, Optional
 from datetime import datetime
+import numpy as np
 from bs4 import BeautifulSoup
 from urllib.parse import urljoin, urlparse
-from config import OUTPUT_DIR, MERCURY_API_KEY
+from config import (
+    OUTPUT_DIR, MERCURY_API_KEY, READER_EXTRACTION_MODE, READER_HEDGE_DELAY, READER_HEDGE_TIMEOUT,
+    READER_HEDGE_MIN_CONTENT_CHARS, RENDER_ENABLED, RENDER_MIN_CONTENT_CHARS, RENDER_MAX_PAGES
+)
+from renderer import PageRenderer
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+HEDGE_WORKERS = 8  # A losing call may still be waiting on its timeout when the next article starts
 
 class ArticleReader:
     """Extracts clean article content from URLs"""
     
     def __init__(self):
         self.mercury_api_key = MERCURY_API_KEY
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        })
+        # requests.Session is not thread-safe: hedged calls each use their worker thread's own session
+        self._local = threading.local()
+        self.hedged = bool(self.mercury_api_key) and READER_EXTRACTION_MODE == 'hedged'
+        self.timeout = READER_HEDGE_TIMEOUT if self.hedged else 30
+        self.executor: Optional[ThreadPoolExecutor] = None
+        self.latencies: Dict[str, List[float]] = {}
+    
+    @property
+    def session(self) -> requests.Session:
+        """HTTP session of the calling thread"""
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = requests.Session()
+            session.headers.update({'User-Agent': USER_AGENT})
+            self._local.session = session
+        return session
+    
+    def close(self):
+        """Stop the hedge pool; a later hedged read starts a new one"""
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
     
     def read_article(self, url: str) -> Dict[str, Any]:
         """Extract article content from URL"""
+        started = time.monotonic()
         try:
+            if self.hedged:
+                content = self._read_hedged(url, started)
+                self._record(content['extraction_method'], started)
+                return content
+            
             # Try Mercury Parser API first if available
             if self.mercury_api_key:
                 content = self._extract_with_mercury(url)
                 if content:
+                    self._record('mercury', started)
                     return content
             
             # Fallback to custom extraction
-            return self._extract_with_beautifulsoup(url)
+            content = self._extract_with_beautifulsoup(url)
+            self._record('beautifulsoup', started)
+            return content
             
         except Exception as e:
             print(f"Error reading article {url}: {e}")
+            self._record('failed', started)
             return {
                 'url': url,
                 'title': '',
@@ -45,7 +83,79 @@ class ArticleReader:
                 'extracted_at': datetime.utcnow().isoformat()
             }
     
-    def _extract_with_mercury(self, url: str) -> Optional[Dict[str, Any]]:
+    def _read_hedged(self, url: str, started: float) -> Dict[str, Any]:
+        """Race Mercury against the direct fetch, which starts after READER_HEDGE_DELAY or once Mercury fails"""
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(max_workers=HEDGE_WORKERS, thread_name_prefix="reader-hedge")
+        cancel = threading.Event()
+        pending = {self.executor.submit(self._extract_with_mercury, url, cancel): 'mercury'}
+        hedge_started = False
+        candidates = []
+        error = None
+        
+        while pending:
+            timeout = None if hedge_started else max(0.0, READER_HEDGE_DELAY - (time.monotonic() - started))
+            done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            for future in done:
+                pending.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    error = e
+                    continue
+                if result and len(result.get('content') or '') >= READER_HEDGE_MIN_CONTENT_CHARS:
+                    # Stop the other request: a queued one never starts, a running one stops reading
+                    # its body, and one still waiting for a response gives up at READER_HEDGE_TIMEOUT
+                    cancel.set()
+                    for other in pending:
+                        other.cancel()
+                    return result
+                if result:
+                    candidates.append(result)
+            
+            if not hedge_started and (not pending or time.monotonic() - started >= READER_HEDGE_DELAY):
+                pending[self.executor.submit(self._extract_with_beautifulsoup, url, cancel)] = 'beautifulsoup'
+                hedge_started = True
+        
+        # Neither method produced usable content: keep the longer extraction
+        if candidates:
+            return max(candidates, key=lambda result: len(result.get('content') or ''))
+        raise error or Exception("No content extracted")
+    
+    def _record(self, method: str, started: float):
+        self.latencies.setdefault(method, []).append(time.monotonic() - started)
+    
+    def extraction_summary(self) -> Dict[str, Any]:
+        """Win rate and end-to-end p50/p95 latency per extraction method"""
+        total = sum(len(values) for values in self.latencies.values())
+        methods = {}
+        for method, values in sorted(self.latencies.items()):
+            milliseconds = np.array(values) * 1000
+            methods[method] = {
+                'wins': len(values),
+                'win_rate': round(len(values) / total, 3),
+                'p50_ms': round(float(np.percentile(milliseconds, 50)), 1),
+                'p95_ms': round(float(np.percentile(milliseconds, 95)), 1)
+            }
+        return {
+            'mode': 'hedged' if self.hedged else 'sequential',
+            'hedge_delay_s': READER_HEDGE_DELAY if self.hedged else None,
+            'articles': total,
+            'methods': methods
+        }
+    
+    def _read_body(self, url: str, cancel: Optional[threading.Event] = None, **kwargs) -> bytes:
+        """GET a response body in chunks, abandoning it once the hedge has been decided"""
+        with self.session.get(url, timeout=self.timeout, stream=True, **kwargs) as response:
+            response.raise_for_status()
+            chunks = []
+            for chunk in response.iter_content(chunk_size=65536):
+                if cancel is not None and cancel.is_set():
+                    raise Exception("cancelled by hedged extraction")
+                chunks.append(chunk)
+        return b''.join(chunks)
+    
+    def _extract_with_mercury(self, url: str, cancel: Optional[threading.Event] = None) -> Optional[Dict[str, Any]]:
         """Extract content using Mercury Parser API"""
         try:
             api_url = "https://mercury.postlight.com/parser"
@@ -55,10 +165,8 @@ class ArticleReader:
             }
             params = {'url': url}
             
-            response = requests.get(api_url, headers=headers, params=params, timeout=30)
-            
-            if response.status_code == 200:
-                data = response.json()
+            data = json.loads(self._read_body(api_url, cancel, headers=headers, params=params))
+            if data:
                 return {
                     'url': url,
                     'title': data.get('title', ''),
@@ -74,42 +182,44 @@ class ArticleReader:
                 }
             
         except Exception as e:
-            print(f"Mercury API failed for {url}: {e}")
+            if cancel is None or not cancel.is_set():
+                print(f"Mercury API failed for {url}: {e}")
         
         return None
     
-    def _extract_with_beautifulsoup(self, url: str) -> Dict[str, Any]:
+    def _extract_with_beautifulsoup(self, url: str, cancel: Optional[threading.Event] = None) -> Dict[str, Any]:
         """Extract content using BeautifulSoup with heuristics"""
         try:
-            response = self.session.get(url, timeout=30)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # Extract title
-            title = self._extract_title(soup)
-            
-            # Extract main content
-            content = self._extract_content(soup)
-            
-            # Extract metadata
-            author = self._extract_author(soup)
-            published_date = self._extract_published_date(soup)
-            
-            return {
-                'url': url,
-                'title': title,
-                'content': content,
-                'author': author,
-                'published_date': published_date,
-                'word_count': len(content.split()) if content else 0,
-                'extraction_method': 'beautifulsoup',
-                'extracted_at': datetime.utcnow().isoformat()
-            }
+            return self._parse_html(url, self._read_body(url, cancel), 'beautifulsoup')
             
         except Exception as e:
             raise Exception(f"BeautifulSoup extraction failed: {e}")
     
+    def _parse_html(self, url: str, html, extraction_method: str) -> Dict[str, Any]:
+        """Extract article fields from fetched or rendered HTML"""
+        soup = BeautifulSoup(html, 'html.parser')
+        
+        # Extract title
+        title = self._extract_title(soup)
+        
+        # Extract main content
+        content = self._extract_content(soup)
+        
+        # Extract metadata
+        author = self._extract_author(soup)
+        published_date = self._extract_published_date(soup)
+        
+        return {
+            'url': url,
+            'title': title,
+            'content': content,
+            'author': author,
+            'published_date': published_date,
+            'word_count': len(content.split()) if content else 0,
+            'extraction_method': extraction_method,
+            'extracted_at': datetime.utcnow().isoformat()
+        }
+    
     def _extract_title(self, soup: BeautifulSoup) -> str:
         """Extract article title"""
         # Try various title selectors
@@ -232,19 +342,72 @@ class ArticleReader:
         
         for i, article in enumerate(articles, 1):
             url = article['url']
+            
+            # Feed entries with full text need no fetch
+            if article.get('extraction_method') == 'feed' and article.get('content'):
+                print(f"[{i}/{len(articles)}] Using feed content: {url}")
+                processed_articles.append({**article, 'extracted_at': datetime.utcnow().isoformat()})
+                continue
+            
             print(f"[{i}/{len(articles)}] Reading: {url}")
             
             content_data = self.read_article(url)
             
-            # Merge with original crawler data
+            # Merge with original crawler data; a date resolved by freshness.py wins over page scraping
             merged_data = {**article, **content_data}
+            if article.get('published_date'):
+                merged_data['published_date'] = article['published_date']
             processed_articles.append(merged_data)
             
             # Rate limiting
             time.sleep(0.5)
         
+        self.close()
+        
+        summary = self.extraction_summary()
+        print(f"Extraction ({summary['mode']}): " + ", ".join(
+            f"{method} {stats['win_rate']:.0%} p50 {stats['p50_ms']:.0f} ms p95 {stats['p95_ms']:.0f} ms"
+            for method, stats in summary['methods'].items()
+        ))
+        
+        if RENDER_ENABLED:
+            processed_articles = self._render_fallback(processed_articles)
+        
         return processed_articles
     
+    def _render_fallback(self, articles: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Re-extract pages whose static extraction looks empty from headless-browser HTML"""
+        candidates = [
+            i for i, article in enumerate(articles)
+            if article.get('extraction_method') != 'feed'
+            and len(article.get('content') or '') < RENDER_MIN_CONTENT_CHARS
+        ][:RENDER_MAX_PAGES]
+        if not candidates:
+            return articles
+        
+        print(f"Rendering {len(candidates)} articles with little static content...")
+        renderer = PageRenderer()
+        rendered = renderer.render_all([articles[i]['url'] for i in candidates])
+        
+        recovered = 0
+        for i in candidates:
+            article = articles[i]
+            html = rendered.get(article['url'])
+            if not html:
+                continue
+            content_data = self._parse_html(article['url'], html, 'rendered')
+            if len(content_data['content']) <= len(article.get('content') or ''):
+                continue
+            merged_data = {key: value for key, value in article.items() if key != 'error'}
+            merged_data.update({key: value for key, value in content_data.items() if value or key == 'content'})
+            if article.get('published_date'):
+                merged_data['published_date'] = article['published_date']
+            articles[i] = merged_data
+            recovered += 1
+        
+        print(f"Rendering recovered {recovered}/{len(candidates)} articles ({renderer.stats['blocked_requests']} requests blocked)")
+        return articles
+    
     def save_results(self, articles: List[Dict[str, Any]]) -> str:
         """Save processed articles to JSON file"""
         output_file = OUTPUT_DIR / f"cleaned_text_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
@@ -253,6 +416,7 @@ class ArticleReader:
             json.dump({
                 'processed_at': datetime.utcnow().isoformat(),
                 'total_articles': len(articles),
+                'extraction_stats': self.extraction_summary(),
                 'articles': articles
             }, f, indent=2, ensure_ascii=False)
         
@@ -278,6 +442,7 @@ def main():
             json.dump({
                 'processed_at': datetime.utcnow().isoformat(),
                 'total_articles': len(articles),
+                'extraction_stats': reader.extraction_summary(),
                 'articles': articles
             }, f, indent=2, ensure_ascii=False)
         
@@ -0,0 +1,137 @@
+"""
+Re-embedding migration for switching embedding backends
+Regenerates every stored vector whose model tag differs from the configured backend
+"""
+import argparse
+import json
+from typing import List, Dict, Any
+from datetime import datetime
+from config import OUTPUT_DIR, EMBEDDING_BATCH_SIZE
+from embed_ingest import EmbeddingIngestor
+from embeddings import get_embedding_backend
+
+PAGE_SIZE = 1000
+
+class ReEmbedder:
+    """Migrates stored embeddings to a different backend/model"""
+
+    def __init__(self, backend: str = None, model: str = None, force: bool = False, dry_run: bool = False):
+        self.ingestor = EmbeddingIngestor()
+        self.backend = get_embedding_backend(backend, model)
+        self.ingestor.embedding_backend = self.backend
+        self.supabase = self.ingestor.supabase
+        self.force = force
+        self.dry_run = dry_run
+
+    def fetch_stale_rows(self) -> List[Dict[str, Any]]:
+        """Fetch embedding rows not produced by the target backend"""
+        rows = []
+        start = 0
+        while True:
+            query = self.supabase.table('embeddings') \
+                .select('id, article_id, text_content, embedding_model, articles(filepath, title)')
+            if not self.force:
+                # NULL != tag is NULL in SQL, so untagged legacy rows need their own condition
+                query = query.or_(f'embedding_model.is.null,embedding_model.neq."{self.backend.version_tag}"')
+            result = query.order('id').range(start, start + PAGE_SIZE - 1).execute()
+            page = result.data or []
+            rows.extend(page)
+            if len(page) < PAGE_SIZE:
+                break
+            start += PAGE_SIZE
+        return rows
+
+    def _source_text(self, row: Dict[str, Any]) -> str:
+        """Prefer the full Markdown source; fall back to the stored (truncated) text"""
+        article = row.get('articles') or {}
+        path = self.ingestor.resolve_markdown_path(article.get('filepath', ''))
+        if path:
+            article_data = self.ingestor.extract_text_from_markdown(str(path))
+            if article_data:
+                return f"{article_data['title']} {article_data['content']}"
+        return row.get('text_content') or article.get('title', '')
+
+    def run(self) -> Dict[str, Any]:
+        """Re-embed all stale rows in batches"""
+        rows = self.fetch_stale_rows()
+        results = {
+            'target_model': self.backend.version_tag,
+            'total_rows': len(rows),
+            'updated': 0,
+            'failed': 0,
+            'dry_run': self.dry_run,
+            'started_at': datetime.utcnow().isoformat()
+        }
+
+        print(f"Re-embedding {len(rows)} rows with {self.backend.version_tag}...")
+        if self.dry_run:
+            return results
+
+        for start in range(0, len(rows), EMBEDDING_BATCH_SIZE):
+            batch = rows[start:start + EMBEDDING_BATCH_SIZE]
+            texts = [self._source_text(row) for row in batch]
+            embeddings = self.ingestor.generate_embeddings(texts)
+
+            for index, row in enumerate(batch):
+                embedding = embeddings[index] if index < len(embeddings) else []
+                if embedding and self._update_row(row['id'], embedding, texts[index]):
+                    results['updated'] += 1
+                else:
+                    results['failed'] += 1
+
+            print(f"  [{min(start + len(batch), len(rows))}/{len(rows)}] re-embedded")
+
+        if results['updated']:
+            # Search workers cache results per corpus version and load vectors from the snapshot
+            results['corpus_version'] = self.ingestor.bump_corpus_version()
+            results['corpus_stats'] = self.ingestor.update_corpus_stats()
+            results['snapshot'] = self.ingestor.publish_snapshot(results['corpus_version'])
+
+        results['completed_at'] = datetime.utcnow().isoformat()
+        return results
+
+    def _update_row(self, row_id: str, embedding: List[float], text: str) -> bool:
+        """Overwrite a single embedding row in place"""
+        try:
+            result = self.supabase.table('embeddings').update({
+                'embedding': embedding,
+                'text_content': text[:2000],
+                'embedding_model': self.backend.version_tag,
+                'embedding_dim': len(embedding),
+                'updated_at': datetime.utcnow().isoformat()
+            }).eq('id', row_id).execute()
+            return bool(result.data)
+        except Exception as e:
+            print(f"Error updating embedding {row_id}: {e}")
+            return False
+
+def main():
+    """Main re-embedding execution"""
+    parser = argparse.ArgumentParser(description="Re-embed stored vectors with a different backend")
+    parser.add_argument('--backend', help="Target backend (defaults to EMBEDDING_BACKEND)")
+    parser.add_argument('--model', help="Target model (defaults to EMBEDDING_MODEL or the backend default)")
+    parser.add_argument('--force', action='store_true', help="Re-embed rows even if already tagged with the target model")
+    parser.add_argument('--dry-run', action='store_true', help="Only report how many rows would change")
+    args = parser.parse_args()
+
+    try:
+        reembedder = ReEmbedder(args.backend, args.model, force=args.force, dry_run=args.dry_run)
+        results = reembedder.run()
+
+        output_file = OUTPUT_DIR / f"reembed_results_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+        with open(output_file, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+
+        print("\nRe-embedding completed!")
+        print(f"Target model: {results['target_model']}")
+        print(f"Rows: {results['total_rows']} (updated: {results['updated']}, failed: {results['failed']})")
+        if results.get('snapshot'):
+            print(f"Snapshot: {results['snapshot']}")
+        print(f"Results: {output_file}")
+
+    except Exception as e:
+        print(f"Re-embedding failed: {e}")
+        raise
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,250 @@
+"""
+Related-articles graph for generated pages
+Computes top-k nearest neighbours from the vector snapshot after embedding ingestion,
+stores them in a JSON sidecar and writes a "Related Articles" section into each page
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+from typing import List, Dict, Any, Optional, Set
+from datetime import datetime
+from pathlib import Path
+import numpy as np
+from jinja2 import Environment, FileSystemLoader
+from config import (
+    DOCS_DIR, INDEX_DIR, TEMPLATES_DIR, OUTPUT_DIR, VECTOR_SNAPSHOT_DIR,
+    RELATED_ARTICLES_K, RELATED_MIN_SIMILARITY
+)
+from vector_index import VectorIndex
+
+RELATED_START = '<!-- related-articles:start -->'
+RELATED_END = '<!-- related-articles:end -->'
+RELATED_BLOCK = re.compile(re.escape(RELATED_START) + r'.*?' + re.escape(RELATED_END) + r'\n?', re.DOTALL)
+BLOCK_ROWS = 1024  # Query rows per all-pairs block (block x corpus float32 scores)
+
+def strip_related_block(content: str) -> str:
+    """Remove the generated related section so it never affects hashes or embeddings"""
+    # Also drop the blank line write_page inserts, so legacy pages hash exactly as before
+    return re.sub(r'\n?' + RELATED_BLOCK.pattern, '', content, flags=re.DOTALL)
+
+def doc_key(filepath: str) -> Optional[str]:
+    """Path of a generated page relative to docs/auto, or None for other documents"""
+    parts = Path(filepath).parts
+    for start in range(len(parts) - 1):
+        if parts[start:start + 2] == ('docs', 'auto'):
+            key = Path(*parts[start + 2:])
+            return key.as_posix() if (DOCS_DIR / key).exists() else None
+    return None
+
+class RelatedArticlesBuilder:
+    """Maintains docs/auto/_index/related.json and the related section of each page"""
+
+    def __init__(self, k: int = RELATED_ARTICLES_K, min_similarity: float = RELATED_MIN_SIMILARITY):
+        self.k = k
+        self.min_similarity = min_similarity
+        self.sidecar_path = INDEX_DIR / 'related.json'
+
+        self.jinja_env = Environment(
+            loader=FileSystemLoader(str(TEMPLATES_DIR)),
+            trim_blocks=True,
+            lstrip_blocks=True
+        )
+
+    def load_graph(self) -> Dict[str, Any]:
+        """Load the previous graph, or an empty one if missing or built with different settings"""
+        empty = {'k': self.k, 'min_similarity': self.min_similarity, 'articles': {}}
+        if not self.sidecar_path.exists():
+            return empty
+        try:
+            with open(self.sidecar_path, 'r', encoding='utf-8') as f:
+                graph = json.load(f)
+        except Exception as e:
+            print(f"Warning: Could not read {self.sidecar_path}: {e}")
+            return empty
+        if graph.get('k') != self.k or graph.get('min_similarity') != self.min_similarity:
+            return empty
+        return graph
+
+    @staticmethod
+    def _fingerprint(vector: np.ndarray) -> str:
+        """Short hash of a vector; float16 so float32 and float16 snapshots agree"""
+        return hashlib.sha1(np.asarray(vector, dtype=np.float16).tobytes()).hexdigest()[:16]
+
+    def _top_neighbours(self, scores: np.ndarray, exclude: int) -> List[int]:
+        """Indices of the k best scores above min_similarity, excluding the article itself"""
+        scores[exclude] = -np.inf
+        k = min(self.k, len(scores) - 1)
+        if k <= 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [int(i) for i in top if scores[i] >= self.min_similarity]
+
+    def update(self, index: VectorIndex, graph: Dict[str, Any], full: bool = False) -> Set[str]:
+        """Update graph in place for new, changed and removed articles; return keys whose list changed"""
+        keys, rows = [], []
+        for position, meta in enumerate(index.metadata):
+            key = doc_key(meta.get('filepath', ''))
+            if key is not None:
+                keys.append(key)
+                rows.append(position)
+        if not rows:
+            return set()
+
+        # One float32 copy of the page vectors; rows are already L2-normalized
+        matrix = np.asarray(index.matrix[np.array(rows)], dtype=np.float32)
+        titles = [index.metadata[position].get('title', '') for position in rows]
+        fingerprints = [self._fingerprint(vector) for vector in matrix]
+        position_of = {key: i for i, key in enumerate(keys)}
+
+        previous = graph['articles']
+        removed = set(previous) - set(position_of)
+        changed = {
+            i for i, key in enumerate(keys)
+            if full or previous.get(key, {}).get('fingerprint') != fingerprints[i]
+        }
+        changed_keys = {keys[i] for i in changed}
+
+        # Articles whose stored list points at a removed or re-embedded page need a full recompute;
+        # every other existing article only has to be compared against the changed rows
+        dirty = set(changed)
+        for i, key in enumerate(keys):
+            related = previous.get(key, {}).get('related', [])
+            if any(item['doc'] in removed or item['doc'] in changed_keys for item in related):
+                dirty.add(i)
+        clean = [i for i in range(len(keys)) if i not in dirty]
+
+        articles = {}
+        updated: Set[str] = set()
+
+        dirty_rows = sorted(dirty)
+        for start in range(0, len(dirty_rows), BLOCK_ROWS):
+            block = dirty_rows[start:start + BLOCK_ROWS]
+            scores = matrix[block] @ matrix.T
+            for row, i in enumerate(block):
+                neighbours = self._top_neighbours(scores[row], i)
+                articles[keys[i]] = {
+                    'fingerprint': fingerprints[i],
+                    'related': [
+                        {'doc': keys[j], 'title': titles[j], 'similarity': round(float(scores[row, j]), 4)}
+                        for j in neighbours
+                    ]
+                }
+
+        changed_rows = sorted(changed)
+        changed_matrix = matrix[changed_rows] if changed_rows else None
+        for start in range(0, len(clean), BLOCK_ROWS):
+            block = clean[start:start + BLOCK_ROWS]
+            scores = matrix[block] @ changed_matrix.T if changed_matrix is not None else None
+            for row, i in enumerate(block):
+                entry = previous[keys[i]]
+                if scores is None:
+                    articles[keys[i]] = entry
+                    continue
+                candidates = {item['doc']: item for item in entry['related']}
+                for column, j in enumerate(changed_rows):
+                    similarity = float(scores[row, column])
+                    if j != i and similarity >= self.min_similarity:
+                        candidates[keys[j]] = {'doc': keys[j], 'title': titles[j], 'similarity': round(similarity, 4)}
+                related = sorted(candidates.values(), key=lambda item: item['similarity'], reverse=True)[:self.k]
+                articles[keys[i]] = {'fingerprint': entry['fingerprint'], 'related': related}
+
+        for key, entry in articles.items():
+            if previous.get(key, {}).get('related') != entry['related']:
+                updated.add(key)
+
+        graph['articles'] = articles
+        if updated or removed:
+            # Untouched runs rewrite an identical file, so the daily commit is skipped
+            graph['updated_at'] = datetime.utcnow().isoformat()
+        return updated
+
+    def save_graph(self, graph: Dict[str, Any]):
+        """Write the sidecar atomically; Docusaurus ignores the underscore directory"""
+        self.sidecar_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.sidecar_path.with_suffix('.json.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(graph, f, indent=1, ensure_ascii=False, sort_keys=True)
+        os.replace(tmp_path, self.sidecar_path)
+
+    def render_block(self, key: str, related: List[Dict[str, Any]]) -> str:
+        """Render templates/related.md with links relative to the page"""
+        page_dir = (DOCS_DIR / key).parent
+        related_articles = [
+            {**item, 'link': Path(os.path.relpath(DOCS_DIR / item['doc'], page_dir)).as_posix()}
+            for item in related
+        ]
+        return self.jinja_env.get_template('related.md').render(related_articles=related_articles)
+
+    def write_page(self, key: str, related: List[Dict[str, Any]]) -> bool:
+        """Replace the page's related section, adding one to pages generated before it existed"""
+        path = DOCS_DIR / key
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                content = f.read()
+
+            block = self.render_block(key, related)
+            if RELATED_BLOCK.search(content):
+                new_content = RELATED_BLOCK.sub(lambda _: block, content, count=1)
+            elif '\n## Metadata' in content:
+                new_content = content.replace('\n## Metadata', f"\n{block}\n## Metadata", 1)
+            else:
+                new_content = content.rstrip('\n') + f"\n\n{block}"
+
+            if new_content == content:
+                return False
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(new_content)
+            return True
+
+        except Exception as e:
+            print(f"Error writing related articles to {path}: {e}")
+            return False
+
+    def run(self, full: bool = False) -> Dict[str, Any]:
+        """Update the graph from the current vector snapshot and rewrite affected pages"""
+        index = VectorIndex.from_snapshot(VECTOR_SNAPSHOT_DIR)
+        if index is None or not len(index):
+            print("No vector snapshot available; run embed_ingest.py first")
+            return {'articles': 0, 'updated': 0, 'pages_written': 0}
+
+        graph = self.load_graph()
+        updated = self.update(index, graph, full=full)
+        self.save_graph(graph)
+
+        pages_written = sum(self.write_page(key, graph['articles'][key]['related']) for key in sorted(updated))
+        return {
+            'snapshot_version': index.snapshot_version,
+            'articles': len(graph['articles']),
+            'updated': len(updated),
+            'pages_written': pages_written,
+            'generated_at': datetime.utcnow().isoformat()
+        }
+
+def main():
+    """Main related-articles execution"""
+    parser = argparse.ArgumentParser(description="Update the related-articles graph after embedding ingestion")
+    parser.add_argument('--full', action='store_true', help="Recompute every article instead of only new/changed ones")
+    args = parser.parse_args()
+
+    try:
+        results = RelatedArticlesBuilder().run(full=args.full)
+
+        output_file = OUTPUT_DIR / f"related_results_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+        with open(output_file, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+
+        print("\nRelated articles updated!")
+        print(f"Articles: {results['articles']}")
+        print(f"Updated lists: {results['updated']}")
+        print(f"Pages written: {results['pages_written']}")
+        print(f"Results: {output_file}")
+
+    except Exception as e:
+        print(f"Related articles update failed: {e}")
+        raise
+
+if __name__ == "__main__":
+    main()
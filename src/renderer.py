@@ -0,0 +1,100 @@
+"""
+Headless-browser rendering fallback for JavaScript-heavy pages
+Renders the pages whose static extraction came back empty through a small pool of reusable
+Playwright browser contexts, blocking images, fonts, media, ads and analytics
+"""
+import asyncio
+from typing import List, Dict, Optional
+from urllib.parse import urlparse
+from config import RENDER_POOL_SIZE, RENDER_TIMEOUT, RENDER_SETTLE_TIMEOUT
+
+BLOCKED_RESOURCE_TYPES = {'image', 'media', 'font', 'stylesheet', 'imageset'}
+
+# Ad, analytics and tag-manager hosts (matched as the host or any parent domain)
+BLOCKED_HOSTS = {
+    'doubleclick.net', 'googlesyndication.com', 'googleadservices.com', 'google-analytics.com',
+    'googletagmanager.com', 'googletagservices.com', 'adservice.google.com', 'amazon-adsystem.com',
+    'adnxs.com', 'criteo.com', 'criteo.net', 'taboola.com', 'outbrain.com', 'scorecardresearch.com',
+    'quantserve.com', 'chartbeat.com', 'chartbeat.net', 'hotjar.com', 'segment.com', 'segment.io',
+    'mixpanel.com', 'newrelic.com', 'nr-data.net', 'facebook.net', 'connect.facebook.net',
+    'ads-twitter.com', 'analytics.twitter.com', 'licdn.com', 'clarity.ms', 'optimizely.com',
+}
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+
+def is_blocked_host(url: str) -> bool:
+    host = (urlparse(url).hostname or '').lower()
+    parts = host.split('.')
+    return any('.'.join(parts[i:]) in BLOCKED_HOSTS for i in range(len(parts) - 1))
+
+class PageRenderer:
+    """Renders URLs to HTML with bounded parallelism: one page at a time per pooled context"""
+
+    def __init__(self, pool_size: int = RENDER_POOL_SIZE, timeout: float = RENDER_TIMEOUT):
+        self.pool_size = max(1, pool_size)
+        self.timeout_ms = int(timeout * 1000)
+        self.stats = {'rendered': 0, 'failed': 0, 'blocked_requests': 0}
+
+    async def _route(self, route):
+        request = route.request
+        if request.resource_type in BLOCKED_RESOURCE_TYPES or is_blocked_host(request.url):
+            self.stats['blocked_requests'] += 1
+            await route.abort()
+        else:
+            await route.continue_()
+
+    async def _render(self, pool: asyncio.Queue, url: str) -> Optional[str]:
+        context = await pool.get()
+        page = None
+        try:
+            page = await context.new_page()
+            response = await page.goto(url, wait_until='domcontentloaded', timeout=self.timeout_ms)
+            if response is not None and response.status >= 400:
+                raise Exception(f"HTTP {response.status}")
+            try:
+                # Client-side rendering usually finishes once the network goes quiet
+                await page.wait_for_load_state('networkidle', timeout=RENDER_SETTLE_TIMEOUT * 1000)
+            except Exception:
+                pass  # Long-polling pages never go idle; take what has rendered so far
+            html = await page.content()
+            self.stats['rendered'] += 1
+            return html
+        except Exception as e:
+            print(f"Rendering failed for {url}: {e}")
+            self.stats['failed'] += 1
+            return None
+        finally:
+            if page is not None:
+                await page.close()
+            await context.clear_cookies()
+            pool.put_nowait(context)
+
+    async def _render_all(self, urls: List[str]) -> Dict[str, str]:
+        from playwright.async_api import async_playwright
+
+        async with async_playwright() as playwright:
+            browser = await playwright.chromium.launch(headless=True)
+            try:
+                pool: asyncio.Queue = asyncio.Queue()
+                for _ in range(min(self.pool_size, len(urls))):
+                    context = await browser.new_context(user_agent=USER_AGENT, service_workers='block')
+                    await context.route('**/*', self._route)
+                    pool.put_nowait(context)
+
+                pages = await asyncio.gather(*[self._render(pool, url) for url in urls])
+            finally:
+                await browser.close()
+        return {url: html for url, html in zip(urls, pages) if html}
+
+    def render_all(self, urls: List[str]) -> Dict[str, str]:
+        """Rendered HTML per URL; URLs that failed to render are left out"""
+        if not urls:
+            return {}
+        try:
+            return asyncio.run(self._render_all(urls))
+        except ImportError:
+            print("Warning: Playwright is not installed; skipping rendering fallback "
+                  "(pip install playwright && playwright install chromium)")
+        except Exception as e:
+            print(f"Warning: Rendering fallback failed: {e}")
+        return {}
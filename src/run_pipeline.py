@@ -36,7 +36,12 @@ def main():
     # Pipeline steps in order
     steps = [
         ("Article Crawling", "crawler"),
+        ("Feed Discovery", "feeds"),
+        ("Freshness Filtering", "freshness"),
         ("Content Reading", "reader"),
+        ("Near-Duplicate Removal", "dedup"),
+        ("Triage", "triage"),
+        ("Story Clustering", "clustering"),
         ("LLM Processing", "llm"),
         ("Markdown Generation", "md_writer"),
     ]
@@ -0,0 +1,117 @@
+"""
+Adaptive per-keyword crawl scheduling
+Tracks each keyword's new-URL yield and duplicate rate across runs and spends the daily
+Custom Search quota where new content is likely: low-yield keywords are searched less often,
+high-yield keywords get more result pages
+"""
+import hashlib
+import heapq
+import json
+import math
+import os
+from typing import List, Dict, Any, Optional, Set
+from datetime import datetime
+from config import (
+    STATE_DIR, CRAWL_DAILY_QUOTA, CRAWL_MAX_PAGES, CRAWL_TARGET_YIELD,
+    CRAWL_MAX_INTERVAL_DAYS, CRAWL_YIELD_ALPHA, CRAWL_PRIOR_YIELD
+)
+from catalog import ArticleCatalog
+
+PAGE_DECAY = 0.6  # Expected new URLs drop with each deeper result page
+
+def url_key(url: str) -> str:
+    """Compact fingerprint for the seen-URL set"""
+    return hashlib.sha1(url.strip().rstrip('/').encode('utf-8')).hexdigest()[:16]
+
+class KeywordScheduler:
+    """Per-keyword EWMA statistics plus the set of URLs already published or found this run"""
+
+    def __init__(self, state_path=None, quota: int = CRAWL_DAILY_QUOTA, published_urls=None):
+        self.state_path = state_path or STATE_DIR / 'crawl_schedule.json'
+        self.quota = quota
+        self.keywords: Dict[str, Dict[str, Any]] = {}
+        if self.state_path.exists():
+            try:
+                with open(self.state_path, 'r', encoding='utf-8') as f:
+                    self.keywords = json.load(f).get('keywords', {})
+            except Exception as e:
+                print(f"Warning: Could not read crawl schedule {self.state_path}: {e}")
+        # The catalog only records articles that made it to a page, so a URL that fails later in
+        # the pipeline is still new on the next run
+        if published_urls is None:
+            published_urls = ArticleCatalog().published_urls()
+        self.seen: Set[str] = {url_key(url) for url in published_urls}
+
+    def _score(self, keyword: str) -> float:
+        """Expected new URLs for the first result page"""
+        return self.keywords.get(keyword, {}).get('yield', CRAWL_PRIOR_YIELD)
+
+    def interval_days(self, keyword: str) -> int:
+        """Days between searches: daily at CRAWL_TARGET_YIELD or better, longer as yield falls"""
+        score = self._score(keyword)
+        return max(1, min(CRAWL_MAX_INTERVAL_DAYS, math.ceil(CRAWL_TARGET_YIELD / max(score, 0.05))))
+
+    def days_since(self, keyword: str, now: datetime) -> Optional[float]:
+        last_run = self.keywords.get(keyword, {}).get('last_run')
+        if not last_run:
+            return None
+        return (now - datetime.fromisoformat(last_run)).total_seconds() / 86400
+
+    def plan(self, keywords: List[str], now: Optional[datetime] = None) -> Dict[str, int]:
+        """Result pages to request per keyword this run, within the daily quota"""
+        now = now or datetime.utcnow()
+        due = []
+        for keyword in keywords:
+            elapsed = self.days_since(keyword, now)
+            # Small slack so a run a few minutes early still counts as a full day
+            if elapsed is None or elapsed + 0.1 >= self.interval_days(keyword):
+                overdue = (elapsed or 0) / self.interval_days(keyword)
+                due.append((self._score(keyword) * max(1.0, overdue), keyword))
+
+        # Every due keyword gets a first page (best first if the quota is short) ...
+        due.sort(reverse=True)
+        pages = {keyword: 1 for _, keyword in due[:self.quota]}
+        budget = self.quota - len(pages)
+
+        # ... then spare requests go to the highest expected marginal yield, one page at a time
+        heap = [(-self._score(keyword) * PAGE_DECAY, keyword) for keyword in pages]
+        heapq.heapify(heap)
+        while budget > 0 and heap:
+            negative_value, keyword = heapq.heappop(heap)
+            if -negative_value < CRAWL_TARGET_YIELD / 2 or pages[keyword] >= CRAWL_MAX_PAGES:
+                continue
+            pages[keyword] += 1
+            budget -= 1
+            heapq.heappush(heap, (negative_value * PAGE_DECAY, keyword))
+
+        return {keyword: pages[keyword] for keyword in keywords if keyword in pages}
+
+    def is_new(self, url: str) -> bool:
+        return url_key(url) not in self.seen
+
+    def mark_seen(self, url: str):
+        self.seen.add(url_key(url))
+
+    def record(self, keyword: str, requests_made: int, results: int, new_urls: int, now: Optional[datetime] = None):
+        """Fold one run's outcome for a keyword into its moving averages"""
+        if requests_made <= 0:
+            return
+        stats = self.keywords.setdefault(keyword, {'yield': CRAWL_PRIOR_YIELD, 'duplicate_rate': 0.0, 'runs': 0})
+        new_per_request = new_urls / requests_made
+        duplicate_rate = 1 - new_urls / results if results else 1.0
+        # First observation replaces the prior outright
+        alpha = CRAWL_YIELD_ALPHA if stats['runs'] else 1.0
+        stats['yield'] = round((1 - alpha) * stats['yield'] + alpha * new_per_request, 4)
+        stats['duplicate_rate'] = round((1 - alpha) * stats['duplicate_rate'] + alpha * duplicate_rate, 4)
+        stats['runs'] += 1
+        stats['requests'] = stats.get('requests', 0) + requests_made
+        stats['last_run'] = (now or datetime.utcnow()).isoformat()
+        stats['last_new_urls'] = new_urls
+
+    def save(self):
+        """Persist the per-keyword statistics"""
+        STATE_DIR.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.state_path.with_suffix('.json.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'updated_at': datetime.utcnow().isoformat(), 'keywords': self.keywords}, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.state_path)
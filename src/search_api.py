@@ -2,15 +2,33 @@
 FastAPI semantic search API
 Provides /search endpoint for cosine similarity search in pgvector
 """
-from typing import List, Dict, Any, Optional
+import asyncio
+import functools
+import hashlib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import List, Dict, Any, Optional, Literal
 from datetime import datetime
-import openai
-from fastapi import FastAPI, HTTPException, Query
+from fastapi import FastAPI, HTTPException, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
-from pydantic import BaseModel
-from supabase import create_client, Client
-from config import OPENAI_API_KEY, SUPABASE_URL, SUPABASE_SERVICE_ROLE_KEY
+from pydantic import BaseModel, Field
+from supabase import create_client, Client, ClientOptions
+from postgrest.types import CountMethod
+from config import (
+    Config, SUPABASE_URL, SUPABASE_SERVICE_ROLE_KEY,
+    QUERY_CACHE_SIZE, QUERY_CACHE_TTL, QUERY_CACHE_PATH,
+    RESULT_CACHE_SIZE, RESULT_CACHE_TTL, CORPUS_VERSION_TTL, SEARCH_CACHE_MAX_AGE, HEALTH_CHECK_TTL,
+    SEARCH_WORKER_THREADS, SEARCH_MAX_CONCURRENCY, SEARCH_QUEUE_TIMEOUT, SEARCH_TIMEOUT,
+    VECTOR_INDEX_ENABLED, VECTOR_INDEX_HNSW, VECTOR_INDEX_QUANTIZATION, VECTOR_INDEX_RERANK_FACTOR,
+    VECTOR_SNAPSHOT_DIR, HYBRID_CANDIDATE_FACTOR, SEARCH_BATCH_MAX_QUERIES
+)
+from embeddings import get_embedding_backend
+from cache import LRUCache, QueryEmbeddingCache, normalize_query
+from vector_index import VectorIndex
+from lexical_index import BM25Index, reciprocal_rank_fusion
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -28,9 +46,46 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Initialize clients
-openai_client = openai.OpenAI(api_key=OPENAI_API_KEY)
-supabase_client: Client = create_client(SUPABASE_URL, SUPABASE_SERVICE_ROLE_KEY)
+# Initialize clients (the embedding model is loaded once at startup)
+embedding_backend = get_embedding_backend()
+supabase_client: Client = create_client(
+    SUPABASE_URL,
+    SUPABASE_SERVICE_ROLE_KEY,
+    options=ClientOptions(postgrest_client_timeout=SEARCH_TIMEOUT)
+)
+
+# The OpenAI and Supabase clients are synchronous; run their calls on a bounded
+# pool so the event loop keeps serving other requests while I/O is in flight
+io_executor = ThreadPoolExecutor(max_workers=SEARCH_WORKER_THREADS, thread_name_prefix="search-io")
+search_slots = asyncio.Semaphore(SEARCH_MAX_CONCURRENCY)
+concurrency_stats = {'in_flight': 0, 'rejected': 0, 'timed_out': 0}
+
+async def run_blocking(func, *args, timeout: float = SEARCH_TIMEOUT):
+    """Run a blocking call on the I/O pool, failing with 504 after timeout seconds"""
+    loop = asyncio.get_running_loop()
+    try:
+        return await asyncio.wait_for(
+            loop.run_in_executor(io_executor, functools.partial(func, *args)),
+            timeout
+        )
+    except asyncio.TimeoutError:
+        concurrency_stats['timed_out'] += 1
+        raise HTTPException(status_code=504, detail="Upstream search call timed out")
+
+@asynccontextmanager
+async def search_slot():
+    """Limit in-flight searches per worker, shedding load with 503 when saturated"""
+    try:
+        await asyncio.wait_for(search_slots.acquire(), SEARCH_QUEUE_TIMEOUT)
+    except asyncio.TimeoutError:
+        concurrency_stats['rejected'] += 1
+        raise HTTPException(status_code=503, detail="Search API is busy, please retry")
+    concurrency_stats['in_flight'] += 1
+    try:
+        yield
+    finally:
+        concurrency_stats['in_flight'] -= 1
+        search_slots.release()
 
 class SearchResult(BaseModel):
     """Search result model"""
@@ -40,6 +95,7 @@ class SearchResult(BaseModel):
     similarity: float
     text_preview: str
     url: Optional[str] = None
+    score: Optional[float] = None  # BM25 (lexical) or fused rank score (hybrid)
 
 class SearchResponse(BaseModel):
     """Search response model"""
@@ -47,80 +103,377 @@ class SearchResponse(BaseModel):
     results: List[SearchResult]
     total_results: int
     search_time_ms: float
+    mode: str = "vector"
+
+class BatchSearchRequest(BaseModel):
+    """Batch search request model; every query shares the same options"""
+    queries: List[str] = Field(..., min_length=1, max_length=SEARCH_BATCH_MAX_QUERIES)
+    limit: int = Field(10, ge=1, le=50)
+    threshold: float = Field(0.7, ge=0.0, le=1.0)
+    mode: Literal['vector', 'lexical', 'hybrid'] = 'vector'
+    tag: Optional[str] = None
+    domain: Optional[str] = None
+    published_after: Optional[datetime] = None
+    published_before: Optional[datetime] = None
+
+class BatchSearchResponse(BaseModel):
+    """Batch search response model, one SearchResponse per query in request order"""
+    responses: List[SearchResponse]
+    total_queries: int
+    search_time_ms: float
 
 class SearchAPI:
     """Semantic search functionality"""
     
     def __init__(self):
-        self.openai_client = openai_client
+        self.embedding_backend = embedding_backend
         self.supabase = supabase_client
+        self.query_cache = QueryEmbeddingCache(
+            embedding_backend.version_tag,
+            max_size=QUERY_CACHE_SIZE,
+            ttl=QUERY_CACHE_TTL,
+            shared_path=QUERY_CACHE_PATH
+        )
+        self.result_cache = LRUCache(max_size=RESULT_CACHE_SIZE, ttl=RESULT_CACHE_TTL)
+        self._corpus_version = None
+        self._corpus_version_checked_at = 0.0
+        self._refresh_lock = threading.Lock()  # Held by the single background index refresh
+        self._corpus_stats: Dict[str, Any] = {}
+        self._database_status: Optional[str] = None
+        self._database_checked_at = 0.0
+        self.vector_index = self._new_vector_index() if VECTOR_INDEX_ENABLED else None
+        self._index_lock = threading.Lock()
+        self.lexical_index: Optional[BM25Index] = None
+        self._lexical_version: Optional[str] = None
+        self.tag_hierarchy = Config().tag_hierarchy
+    
+    def build_filters(self, tag: Optional[str] = None, domain: Optional[str] = None,
+                      published_after: Optional[str] = None, published_before: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Normalize filter parameters; a category tag also matches its child tags"""
+        filters = {}
+        if tag:
+            filters['tags'] = sorted({tag, *self.tag_hierarchy.get(tag, [])})
+        if domain:
+            filters['source_domain'] = domain
+        if published_after:
+            filters['published_after'] = published_after
+        if published_before:
+            filters['published_before'] = published_before
+        return filters or None
+    
+    def refresh_lexical_index(self) -> bool:
+        """Load the BM25 index published with the current snapshot, if it changed"""
+        version = VectorIndex.current_snapshot_version(VECTOR_SNAPSHOT_DIR)
+        if version is None or version == self._lexical_version:
+            return False
+        try:
+            lexical = BM25Index.load(VECTOR_SNAPSHOT_DIR / version)
+        except Exception as e:
+            print(f"Warning: Could not load lexical index {version}: {e}")
+            return False
+        if lexical is not None:
+            self.lexical_index = lexical
+            self._lexical_version = version
+            print(f"Lexical index loaded: {len(lexical)} documents ({version})")
+        return lexical is not None
+    
+    def _new_vector_index(self) -> VectorIndex:
+        """Empty index configured from the environment"""
+        return VectorIndex(
+            use_hnsw=VECTOR_INDEX_HNSW,
+            quantization=VECTOR_INDEX_QUANTIZATION,
+            rerank_factor=VECTOR_INDEX_RERANK_FACTOR,
+            embedding_model=self.embedding_backend.version_tag,
+            expected_dimension=self.embedding_backend.dimension
+        )
+    
+    def refresh_vector_index(self, incremental: bool = True, raise_errors: bool = False) -> int:
+        """Load new or updated vectors into the in-memory index
+
+        Errors are logged and reported as 0 vectors loaded unless raise_errors is set.
+        """
+        if self.vector_index is None:
+            return 0
+        with self._index_lock:
+            # Prefer a newer memory-mapped snapshot: no rebuild, and the pages are shared across workers
+            snapshot_version = VectorIndex.current_snapshot_version(VECTOR_SNAPSHOT_DIR)
+            if snapshot_version and snapshot_version != self.vector_index.snapshot_version:
+                try:
+                    self.vector_index = VectorIndex.from_snapshot(
+                        VECTOR_SNAPSHOT_DIR,
+                        use_hnsw=VECTOR_INDEX_HNSW,
+                        quantization=VECTOR_INDEX_QUANTIZATION,
+                        rerank_factor=VECTOR_INDEX_RERANK_FACTOR,
+                        embedding_model=self.embedding_backend.version_tag
+                    )
+                except Exception as e:
+                    print(f"Warning: Could not load vector snapshot {snapshot_version}: {e}")
+            
+            try:
+                loaded = self.vector_index.load_from_supabase(self.supabase, incremental=incremental)
+                print(f"Vector index refreshed: {loaded} vectors loaded, {len(self.vector_index)} total")
+                return loaded
+            except Exception as e:
+                if raise_errors:
+                    raise
+                print(f"Warning: Could not refresh vector index: {e}")
+                return 0
+    
+    def get_corpus_version(self) -> str:
+        """Return the corpus version marker published by ingestion (re-checked every CORPUS_VERSION_TTL seconds)"""
+        now = time.monotonic()
+        if self._corpus_version is not None and now - self._corpus_version_checked_at < CORPUS_VERSION_TTL:
+            return self._corpus_version
+        
+        try:
+            # One read returns the version and the counts ingestion stores next to it
+            result = self.supabase.table('corpus_meta').select('*').eq('id', 1).execute()
+            self._corpus_stats = result.data[0] if result.data else {}
+            version = self._corpus_stats.get('corpus_version') or 'unversioned'
+        except Exception as e:
+            print(f"Warning: Could not read corpus version: {e}")
+            version = self._corpus_version or 'unversioned'
+        
+        self._corpus_version_checked_at = now
+        if version != self._corpus_version:
+            if self._corpus_version is None:
+                self.result_cache.clear()
+                self._corpus_version = version
+            else:
+                # A new corpus may carry new vectors: reload off the request path and keep serving
+                # (and caching under) the current version until the new indexes are swapped in
+                self._start_index_refresh(version)
+        return self._corpus_version
+    
+    def _start_index_refresh(self, version: str):
+        """Start one background refresh for a new corpus version; no-op while one is running"""
+        if not self._refresh_lock.acquire(blocking=False):
+            return
+        
+        def refresh():
+            try:
+                self.refresh_vector_index(raise_errors=True)
+                self.refresh_lexical_index()
+                # A new corpus makes every cached result stale
+                self.result_cache.clear()
+                self._corpus_version = version
+            except Exception as e:
+                # Keep reporting the version the index actually serves; the next check retries
+                print(f"Warning: Could not refresh indexes for corpus version {version}: {e}")
+            finally:
+                self._refresh_lock.release()
+        
+        threading.Thread(target=refresh, name="index-refresh", daemon=True).start()
+    
+    def result_cache_key(self, query: str, limit: int, threshold: float, corpus_version: str, mode: str = 'vector',
+                         filters: Optional[Dict[str, Any]] = None) -> tuple:
+        """Cache key for a full search response"""
+        filter_key = tuple(sorted((key, str(value)) for key, value in (filters or {}).items()))
+        return (normalize_query(query), limit, round(threshold, 4), mode, filter_key, corpus_version)
+    
+    def etag_for(self, cache_key: tuple) -> str:
+        """Strong ETag derived from the result cache key"""
+        digest = hashlib.sha1(repr(cache_key).encode('utf-8')).hexdigest()
+        return f'"{digest}"'
     
     def generate_query_embedding(self, query: str) -> List[float]:
-        """Generate embedding for search query"""
+        """Generate embedding for search query, reusing cached embeddings"""
+        cached = self.query_cache.get(query)
+        if cached is not None:
+            return cached
+        
         try:
-            response = self.openai_client.embeddings.create(
-                model="text-embedding-3-small",
-                input=query,
-                encoding_format="float"
-            )
-            return response.data[0].embedding
+            embedding = self.embedding_backend.embed_queries([query])[0]
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Failed to generate embedding: {e}")
+        
+        self.query_cache.set(query, embedding)
+        return embedding
+    
+    def generate_query_embeddings(self, queries: List[str]) -> List[List[float]]:
+        """Embed several queries, sending every cache miss in one batched request"""
+        embeddings = [self.query_cache.get(query) for query in queries]
+        missing = list(dict.fromkeys(query for query, embedding in zip(queries, embeddings) if embedding is None))
+        if missing:
+            try:
+                fresh = dict(zip(missing, self.embedding_backend.embed_queries(missing)))
+            except Exception as e:
+                raise HTTPException(status_code=500, detail=f"Failed to generate embedding: {e}")
+            for query, embedding in fresh.items():
+                self.query_cache.set(query, embedding)
+            embeddings = [fresh[query] if embedding is None else embedding for query, embedding in zip(queries, embeddings)]
+        return embeddings
     
-    def search_similar_articles(self, query_embedding: List[float], limit: int = 10, threshold: float = 0.7) -> List[Dict[str, Any]]:
-        """Search for similar articles using cosine similarity"""
+    def _rpc_filter_params(self, filters: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """Filter arguments for the search RPC functions; only vectors of the query's model are ranked"""
+        params = {'filter_model': self.embedding_backend.version_tag}
+        if not filters:
+            return params
+        return {
+            **params,
+            'filter_tags': filters.get('tags'),
+            'filter_domain': filters.get('source_domain'),
+            'published_after': filters.get('published_after'),
+            'published_before': filters.get('published_before')
+        }
+    
+    def search_similar_articles(self, query_embedding: List[float], limit: int = 10, threshold: float = 0.7,
+                                filters: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """Search for similar articles using cosine similarity, pre-filtered by metadata"""
+        if self.vector_index is not None and len(self.vector_index):
+            try:
+                return self.vector_index.search(query_embedding, limit, threshold, filters)
+            except ValueError as e:
+                raise HTTPException(status_code=500, detail=f"Search failed: {e}")
+        
         try:
             # Use Supabase RPC function for vector similarity search
+            params = {
+                'query_embedding': query_embedding,
+                'match_threshold': threshold,
+                'match_count': limit,
+                **self._rpc_filter_params(filters)
+            }
+            result = self.supabase.rpc('search_articles', params).execute()
+            
+            return result.data if result.data else []
+            
+        except Exception as e:
+            # Fallback to manual similarity calculation if RPC not available
+            return self._manual_similarity_search(query_embedding, limit, threshold, filters)
+    
+    def search_similar_articles_batch(self, query_embeddings: List[List[float]], limit: int = 10, threshold: float = 0.7,
+                                      filters: Optional[Dict[str, Any]] = None) -> List[List[Dict[str, Any]]]:
+        """Search several query embeddings together: one matrix-matrix product or one RPC"""
+        if self.vector_index is not None and len(self.vector_index):
+            try:
+                return self.vector_index.search_batch(query_embeddings, limit, threshold, filters)
+            except ValueError as e:
+                raise HTTPException(status_code=500, detail=f"Search failed: {e}")
+        
+        try:
             result = self.supabase.rpc(
-                'search_articles',
+                'search_articles_batch',
                 {
-                    'query_embedding': query_embedding,
+                    'query_embeddings': query_embeddings,
                     'match_threshold': threshold,
-                    'match_count': limit
+                    'match_count': limit,
+                    **self._rpc_filter_params(filters)
                 }
             ).execute()
             
-            return result.data if result.data else []
+            grouped = [[] for _ in query_embeddings]
+            for row in result.data or []:
+                grouped[row.pop('query_index')].append(row)
+            return grouped
             
-        except Exception as e:
+        except Exception:
             # Fallback to manual similarity calculation if RPC not available
-            return self._manual_similarity_search(query_embedding, limit, threshold)
+            try:
+                return self._fallback_index().search_batch(query_embeddings, limit, threshold, filters)
+            except Exception as e:
+                raise HTTPException(status_code=500, detail=f"Search failed: {e}")
     
-    def _manual_similarity_search(self, query_embedding: List[float], limit: int, threshold: float) -> List[Dict[str, Any]]:
-        """Manual similarity search fallback"""
+    def _fallback_index(self) -> VectorIndex:
+        """Vector index for searches when the RPC is unavailable"""
+        index = self.vector_index
+        if index is None:
+            # Index disabled: build a throwaway one for this request
+            index = self._new_vector_index()
+            index.load_from_supabase(self.supabase, incremental=False)
+        elif not len(index):
+            self.refresh_vector_index(incremental=False)
+            # The refresh may have swapped in a snapshot-backed index
+            with self._index_lock:
+                index = self.vector_index
+        return index
+    
+    def _manual_similarity_search(self, query_embedding: List[float], limit: int, threshold: float,
+                                  filters: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """Vectorized similarity search fallback when the RPC is unavailable"""
         try:
-            # Get all embeddings
-            result = self.supabase.table('embeddings').select('*, articles(*)').execute()
-            
-            if not result.data:
-                return []
-            
-            import numpy as np
-            
-            query_vec = np.array(query_embedding)
-            similarities = []
-            
-            for row in result.data:
-                if row['embedding']:
-                    doc_vec = np.array(row['embedding'])
-                    similarity = np.dot(query_vec, doc_vec) / (np.linalg.norm(query_vec) * np.linalg.norm(doc_vec))
-                    
-                    if similarity >= threshold:
-                        similarities.append({
-                            'id': row['article_id'],
-                            'title': row['articles']['title'] if row['articles'] else '',
-                            'filepath': row['articles']['filepath'] if row['articles'] else '',
-                            'similarity': float(similarity),
-                            'text_content': row['text_content']
-                        })
-            
-            # Sort by similarity and return top results
-            similarities.sort(key=lambda x: x['similarity'], reverse=True)
-            return similarities[:limit]
-            
+            return self._fallback_index().search(query_embedding, limit, threshold, filters)
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Search failed: {e}")
     
+    def lexical_search(self, query: str, limit: int, filters: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """BM25 search; needs no embedding call"""
+        if self.lexical_index is None:
+            raise HTTPException(status_code=503, detail="Lexical index not available")
+        return self.lexical_index.search(query, limit, filters)
+    
+    def run_search(self, query: str, limit: int, threshold: float, mode: str = 'vector',
+                   filters: Optional[Dict[str, Any]] = None) -> List[SearchResult]:
+        """Embed, search and format in one blocking call (runs on the I/O pool)"""
+        if mode == 'lexical':
+            raw_results = self.lexical_search(query, limit, filters)
+        elif mode == 'hybrid':
+            # Fuse deeper candidate lists so documents strong in only one ranking can surface
+            candidates = limit * HYBRID_CANDIDATE_FACTOR
+            query_embedding = self.generate_query_embedding(query)
+            vector_results = self.search_similar_articles(query_embedding, candidates, threshold, filters)
+            lexical_results = self.lexical_search(query, candidates, filters)
+            raw_results = reciprocal_rank_fusion([vector_results, lexical_results], limit)
+        else:
+            query_embedding = self.generate_query_embedding(query)
+            raw_results = self.search_similar_articles(query_embedding, limit, threshold, filters)
+        return self.format_search_results(raw_results, query)
+    
+    def run_search_batch(self, queries: List[str], limit: int, threshold: float, mode: str = 'vector',
+                         filters: Optional[Dict[str, Any]] = None) -> List[List[SearchResult]]:
+        """Batched run_search: one embedding request and one scoring pass for all queries"""
+        if mode == 'lexical':
+            return [self.run_search(query, limit, threshold, mode, filters) for query in queries]
+        
+        candidates = limit * HYBRID_CANDIDATE_FACTOR if mode == 'hybrid' else limit
+        query_embeddings = self.generate_query_embeddings(queries)
+        vector_results = self.search_similar_articles_batch(query_embeddings, candidates, threshold, filters)
+        
+        formatted = []
+        for query, raw_results in zip(queries, vector_results):
+            if mode == 'hybrid':
+                lexical_results = self.lexical_search(query, candidates, filters)
+                raw_results = reciprocal_rank_fusion([raw_results, lexical_results], limit)
+            formatted.append(self.format_search_results(raw_results, query))
+        return formatted
+    
+    def cached_database_status(self) -> Optional[str]:
+        """Last probe result while it is younger than HEALTH_CHECK_TTL, else None"""
+        if self._database_status is not None and time.monotonic() - self._database_checked_at < HEALTH_CHECK_TTL:
+            return self._database_status
+        return None
+    
+    def check_database(self) -> str:
+        """Probe the database connection with a single-row read"""
+        try:
+            self.supabase.table('articles').select('id').limit(1).execute()
+            status = "healthy"
+        except Exception:
+            status = "unhealthy"
+        
+        self._database_status = status
+        self._database_checked_at = time.monotonic()
+        return status
+    
+    def count_rows(self, table: str) -> int:
+        """Exact row count without transferring any rows"""
+        result = self.supabase.table(table).select('id', count=CountMethod.exact, head=True).execute()
+        return result.count or 0
+    
+    def get_counts(self) -> Dict[str, Any]:
+        """Count articles and embeddings from the stats ingestion keeps in corpus_meta"""
+        self.get_corpus_version()
+        stats = self._corpus_stats
+        if stats.get('article_count') is not None and stats.get('embedding_count') is not None:
+            return {
+                'articles': stats['article_count'],
+                'embeddings': stats['embedding_count'],
+                'as_of': stats.get('updated_at')
+            }
+        
+        # Stats not published yet: fall back to count-only queries
+        return {'articles': self.count_rows('articles'), 'embeddings': self.count_rows('embeddings'), 'as_of': None}
+    
     def format_search_results(self, results: List[Dict[str, Any]], query: str) -> List[SearchResult]:
         """Format search results for API response"""
         formatted_results = []
@@ -145,7 +498,8 @@ class SearchAPI:
                 filepath=filepath,
                 similarity=result.get('similarity', 0.0),
                 text_preview=text_preview,
-                url=url
+                url=url,
+                score=result.get('score')
             ))
         
         return formatted_results
@@ -153,6 +507,13 @@ class SearchAPI:
 # Initialize search API
 search_api = SearchAPI()
 
+@app.on_event("startup")
+async def load_vector_index():
+    """Load all vectors into the in-memory index before serving traffic"""
+    if search_api.vector_index is not None:
+        await run_blocking(search_api.refresh_vector_index, timeout=None)
+    await run_blocking(search_api.refresh_lexical_index, timeout=None)
+
 @app.get("/")
 async def root():
     """API root endpoint"""
@@ -161,6 +522,7 @@ async def root():
         "version": "1.0.0",
         "endpoints": {
             "search": "/search?q=your_query",
+            "batch_search": "POST /search/batch",
             "health": "/health"
         }
     }
@@ -168,12 +530,13 @@ async def root():
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
-    try:
-        # Test database connection
-        result = search_api.supabase.table('articles').select('count').execute()
-        db_status = "healthy" if result else "unhealthy"
-    except:
-        db_status = "unhealthy"
+    # Frequent liveness probes reuse the last database check instead of querying each time
+    db_status = search_api.cached_database_status()
+    if db_status is None:
+        try:
+            db_status = await run_blocking(search_api.check_database)
+        except HTTPException:
+            db_status = "unhealthy"
     
     return {
         "status": "healthy",
@@ -183,9 +546,16 @@ async def health_check():
 
 @app.get("/search", response_model=SearchResponse)
 async def search_articles(
+    request: Request,
+    response: Response,
     q: str = Query(..., description="Search query"),
     limit: int = Query(10, ge=1, le=50, description="Maximum number of results"),
-    threshold: float = Query(0.7, ge=0.0, le=1.0, description="Similarity threshold")
+    threshold: float = Query(0.7, ge=0.0, le=1.0, description="Similarity threshold"),
+    mode: Literal['vector', 'lexical', 'hybrid'] = Query('vector', description="Ranking: vector, lexical (BM25) or hybrid"),
+    tag: Optional[str] = Query(None, description="Only articles with this tag (a category includes its child tags)"),
+    domain: Optional[str] = Query(None, description="Only articles from this source domain"),
+    published_after: Optional[datetime] = Query(None, description="Only articles published at or after this time"),
+    published_before: Optional[datetime] = Query(None, description="Only articles published at or before this time")
 ):
     """
     Semantic search for technology articles
@@ -193,18 +563,37 @@ async def search_articles(
     - **q**: Search query (required)
     - **limit**: Maximum number of results (1-50, default: 10)
     - **threshold**: Similarity threshold (0.0-1.0, default: 0.7)
+    - **mode**: `vector` (embeddings), `lexical` (BM25, no embedding call) or `hybrid` (rank fusion)
+    - **tag**, **domain**, **published_after**, **published_before**: metadata filters applied before scoring
     """
     start_time = datetime.now()
     
     try:
-        # Generate query embedding
-        query_embedding = search_api.generate_query_embedding(q)
+        # Serve repeated queries from the result cache until the corpus changes
+        corpus_version = await run_blocking(search_api.get_corpus_version)
+        filters = search_api.build_filters(
+            tag,
+            domain,
+            published_after.isoformat() if published_after else None,
+            published_before.isoformat() if published_before else None
+        )
+        cache_key = search_api.result_cache_key(q, limit, threshold, corpus_version, mode, filters)
+        etag = search_api.etag_for(cache_key)
+        cache_headers = {
+            "ETag": etag,
+            "Cache-Control": f"public, max-age={SEARCH_CACHE_MAX_AGE}"
+        }
         
-        # Search for similar articles
-        raw_results = search_api.search_similar_articles(query_embedding, limit, threshold)
+        if request.headers.get("if-none-match") == etag:
+            return Response(status_code=304, headers=cache_headers)
+        response.headers.update(cache_headers)
         
-        # Format results
-        formatted_results = search_api.format_search_results(raw_results, q)
+        formatted_results = search_api.result_cache.get(cache_key)
+        if formatted_results is None:
+            # Embedding and vector search block on network I/O; keep them off the event loop
+            async with search_slot():
+                formatted_results = await run_blocking(search_api.run_search, q, limit, threshold, mode, filters)
+            search_api.result_cache.set(cache_key, formatted_results)
         
         # Calculate search time
         search_time = (datetime.now() - start_time).total_seconds() * 1000
@@ -213,7 +602,8 @@ async def search_articles(
             query=q,
             results=formatted_results,
             total_results=len(formatted_results),
-            search_time_ms=round(search_time, 2)
+            search_time_ms=round(search_time, 2),
+            mode=mode
         )
         
     except HTTPException:
@@ -221,24 +611,91 @@ async def search_articles(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Search failed: {e}")
 
+@app.post("/search/batch", response_model=BatchSearchResponse)
+async def search_articles_batch(batch: BatchSearchRequest):
+    """
+    Run many searches in one request
+    
+    Uncached queries are embedded in a single embedding call and scored together,
+    so site-wide related-article generation needs one request instead of one per page.
+    Each query's results match what `GET /search` returns for the same options.
+    """
+    start_time = datetime.now()
+    
+    try:
+        corpus_version = await run_blocking(search_api.get_corpus_version)
+        filters = search_api.build_filters(
+            batch.tag,
+            batch.domain,
+            batch.published_after.isoformat() if batch.published_after else None,
+            batch.published_before.isoformat() if batch.published_before else None
+        )
+        cache_keys = [
+            search_api.result_cache_key(query, batch.limit, batch.threshold, corpus_version, batch.mode, filters)
+            for query in batch.queries
+        ]
+        results = [search_api.result_cache.get(cache_key) for cache_key in cache_keys]
+        
+        pending = [index for index, cached in enumerate(results) if cached is None]
+        if pending:
+            async with search_slot():
+                computed = await run_blocking(
+                    search_api.run_search_batch,
+                    [batch.queries[index] for index in pending],
+                    batch.limit, batch.threshold, batch.mode, filters
+                )
+            for index, formatted_results in zip(pending, computed):
+                results[index] = formatted_results
+                search_api.result_cache.set(cache_keys[index], formatted_results)
+        
+        search_time = round((datetime.now() - start_time).total_seconds() * 1000, 2)
+        
+        return BatchSearchResponse(
+            responses=[
+                SearchResponse(
+                    query=query,
+                    results=formatted_results,
+                    total_results=len(formatted_results),
+                    search_time_ms=search_time,
+                    mode=batch.mode
+                )
+                for query, formatted_results in zip(batch.queries, results)
+            ],
+            total_queries=len(batch.queries),
+            search_time_ms=search_time
+        )
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Batch search failed: {e}")
+
 @app.get("/stats")
 async def get_stats():
     """Get database statistics"""
     try:
-        # Get article count
-        articles_result = search_api.supabase.table('articles').select('count').execute()
-        article_count = len(articles_result.data) if articles_result.data else 0
-        
-        # Get embedding count
-        embeddings_result = search_api.supabase.table('embeddings').select('count').execute()
-        embedding_count = len(embeddings_result.data) if embeddings_result.data else 0
+        counts = await run_blocking(search_api.get_counts)
+        corpus_version = await run_blocking(search_api.get_corpus_version)
         
         return {
-            "total_articles": article_count,
-            "total_embeddings": embedding_count,
+            "total_articles": counts['articles'],
+            "total_embeddings": counts['embeddings'],
+            "counts_as_of": counts['as_of'],
+            "corpus_version": corpus_version,
+            "query_embedding_cache": search_api.query_cache.stats,
+            "result_cache": search_api.result_cache.stats,
+            "vector_index_size": len(search_api.vector_index) if search_api.vector_index is not None else None,
+            "lexical_index_size": len(search_api.lexical_index) if search_api.lexical_index is not None else None,
+            "search_concurrency": {
+                **concurrency_stats,
+                "max_in_flight": SEARCH_MAX_CONCURRENCY,
+                "worker_threads": SEARCH_WORKER_THREADS
+            },
             "last_updated": datetime.utcnow().isoformat()
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get stats: {e}")
 
@@ -0,0 +1,127 @@
+"""
+Site-wide slug registry for generated pages
+Keeps the slugs of each run directory under docs/auto in its own shard,
+docs/auto/_index/slugs/<run>.json, so new slugs are unique across all run directories without
+probing the filesystem, and runs never rewrite a file another run wrote
+"""
+import json
+import os
+import re
+from typing import Dict, List, Optional
+from pathlib import Path
+
+PAGE_FILENAME = re.compile(r'^\d{8}-(?P<slug>.+)\.md$')
+
+class SlugRegistry:
+    """In-memory slug set seeded once from the per-run shards and unindexed run directories"""
+
+    def __init__(self, docs_root: Path, shard_dir: Optional[Path] = None):
+        self.docs_root = Path(docs_root)
+        self.shard_dir = Path(shard_dir) if shard_dir else self.docs_root / '_index' / 'slugs'
+        # Single-file index written before shards; still read so its runs are not rescanned
+        self.legacy_index_path = self.docs_root / '_index' / 'slugs.json'
+        self.slugs: Dict[str, Optional[str]] = {}
+        self.runs: set = set()
+        self._next_suffix: Dict[str, int] = {}
+        self._loaded = False
+        self._dirty_runs: set = set()
+
+    def _load(self):
+        """Read every shard, then list only run directories without one"""
+        if self._loaded:
+            return
+        self._loaded = True
+
+        if self.legacy_index_path.exists():
+            try:
+                with open(self.legacy_index_path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                self.slugs.update(data.get('slugs', {}))
+                self.runs.update(data.get('runs', []))
+            except Exception as e:
+                print(f"Warning: Could not read slug index {self.legacy_index_path}: {e}")
+
+        if self.shard_dir.exists():
+            for shard_path in sorted(self.shard_dir.glob('*.json')):
+                try:
+                    with open(shard_path, 'r', encoding='utf-8') as f:
+                        self.slugs.update(json.load(f))
+                    self.runs.add(shard_path.stem)
+                except Exception as e:
+                    print(f"Warning: Could not read slug shard {shard_path}: {e}")
+
+        if not self.docs_root.exists():
+            return
+        for run_dir in self.docs_root.iterdir():
+            if not run_dir.is_dir() or run_dir.name.startswith('_') or run_dir.name in self.runs:
+                continue
+            for name in os.listdir(run_dir):
+                match = PAGE_FILENAME.match(name)
+                if match:
+                    self.slugs.setdefault(match.group('slug'), f"{run_dir.name}/{name}")
+            self.runs.add(run_dir.name)
+            self._dirty_runs.add(run_dir.name)
+
+    def __contains__(self, slug: str) -> bool:
+        self._load()
+        return slug in self.slugs
+
+    def __len__(self) -> int:
+        self._load()
+        return len(self.slugs)
+
+    def claim(self, base_slug: str) -> str:
+        """Reserve and return base_slug, or base_slug-N for the lowest free N"""
+        self._load()
+        slug = base_slug
+        if slug in self.slugs:
+            # Resume from the last suffix handed out, so repeated titles never rescan from 1
+            counter = self._next_suffix.get(base_slug, 1)
+            while f"{base_slug}-{counter}" in self.slugs:
+                counter += 1
+            slug = f"{base_slug}-{counter}"
+            self._next_suffix[base_slug] = counter + 1
+
+        self.slugs[slug] = None
+        return slug
+
+    def release(self, slug: str):
+        """Give back a claimed slug whose page was never written"""
+        self._load()
+        path = self.slugs.pop(slug, None)
+        if path:
+            self._dirty_runs.add(path.split('/', 1)[0])
+
+    def assign(self, slug: str, path: str):
+        """Record the page path (relative to docs/auto) for a claimed slug"""
+        self._load()
+        self.slugs[slug] = path
+        self._dirty_runs.add(path.split('/', 1)[0])
+
+    def add_run(self, run_name: str):
+        """Mark a run directory as fully indexed, even if it produced no pages"""
+        self._load()
+        self.runs.add(run_name)
+        self._dirty_runs.add(run_name)
+
+    def save(self) -> List[str]:
+        """Write the shard of every run that changed, atomically; returns the paths written"""
+        if not self._dirty_runs:
+            return []
+        by_run: Dict[str, Dict[str, str]] = {run: {} for run in self._dirty_runs}
+        for slug, path in self.slugs.items():
+            run = path.split('/', 1)[0] if path else None
+            if run in by_run:
+                by_run[run][slug] = path
+
+        self.shard_dir.mkdir(parents=True, exist_ok=True)
+        written = []
+        for run, slugs in sorted(by_run.items()):
+            shard_path = self.shard_dir / f"{run}.json"
+            tmp_path = shard_path.with_suffix('.json.tmp')
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(dict(sorted(slugs.items())), f, indent=1, ensure_ascii=False)
+            os.replace(tmp_path, shard_path)
+            written.append(str(shard_path))
+        self._dirty_runs.clear()
+        return written
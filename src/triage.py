@@ -0,0 +1,222 @@
+"""
+Local relevance and tag pre-classifier run before the LLM stage
+A TF-IDF + logistic regression model trained on accumulated llm_processed outputs drops
+off-topic pages, login walls and empty extractions and pre-fills confident tags
+"""
+import argparse
+import json
+from typing import List, Dict, Any, Optional
+from datetime import datetime
+import joblib
+import numpy as np
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.linear_model import LogisticRegression
+from config import (
+    Config, OUTPUT_DIR, STATE_DIR, TRIAGE_MIN_RELEVANCE, TRIAGE_TAG_CONFIDENCE,
+    TRIAGE_MIN_CONTENT_CHARS, TRIAGE_MIN_EXAMPLES, TRIAGE_MAX_EXAMPLES
+)
+
+FEATURE_CONTENT_CHARS = 2000  # Title, snippet and the opening of the page carry the signal
+
+def triage_text(article: Dict[str, Any]) -> str:
+    """Text the classifier sees for an article"""
+    content = (article.get('content') or '')[:FEATURE_CONTENT_CHARS]
+    return f"{article.get('title', '')}\n{article.get('snippet', '')}\n{content}"
+
+class TriageClassifier:
+    """Relevance and tag models sharing one TF-IDF vocabulary"""
+
+    def __init__(self, model_path=None, examples_path=None):
+        self.model_path = model_path or STATE_DIR / 'triage_model.joblib'
+        self.examples_path = examples_path or STATE_DIR / 'triage_examples.jsonl'
+        self.config = Config()
+        self.model: Optional[Dict[str, Any]] = None
+
+    def load(self) -> bool:
+        """Load the trained model; False when none has been trained yet"""
+        if not self.model_path.exists():
+            return False
+        try:
+            self.model = joblib.load(self.model_path)
+            return True
+        except Exception as e:
+            print(f"Warning: Could not load triage model {self.model_path}: {e}")
+            return False
+
+    def _label(self, article: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Training example from an LLM-processed article, or None if it carries no usable label"""
+        if article.get('llm_model') == 'fallback' and len(article.get('content') or '') >= TRIAGE_MIN_CONTENT_CHARS:
+            return None  # LLM call failed on a real page: no judgement to learn from
+        relevant = article.get('llm_relevant', True) is not False and \
+            len(article.get('content') or '') >= TRIAGE_MIN_CONTENT_CHARS
+        return {
+            'url': article.get('url', ''),
+            'text': triage_text(article),
+            'relevant': relevant,
+            'tag': article.get('tag') if relevant and article.get('tag_source') != 'triage' else None
+        }
+
+    def collect_examples(self) -> List[Dict[str, Any]]:
+        """Merge new llm_processed outputs into the accumulated example set (latest label per URL wins)"""
+        examples: Dict[str, Dict[str, Any]] = {}
+        if self.examples_path.exists():
+            with open(self.examples_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    if line.strip():
+                        example = json.loads(line)
+                        examples[example['url']] = example
+
+        for path in sorted(OUTPUT_DIR.glob('llm_processed_*.json')):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    articles = json.load(f).get('articles', [])
+            except Exception as e:
+                print(f"Warning: Could not read {path}: {e}")
+                continue
+            for article in articles:
+                example = self._label(article)
+                if example and example['url']:
+                    examples.pop(example['url'], None)  # Re-insert so newest examples sort last
+                    examples[example['url']] = example
+
+        kept = list(examples.values())[-TRIAGE_MAX_EXAMPLES:]
+        self.examples_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.examples_path, 'w', encoding='utf-8') as f:
+            f.write(''.join(json.dumps(example, ensure_ascii=False) + '\n' for example in kept))
+        return kept
+
+    def train(self, examples: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Fit and save both models; a model is skipped while its labels have a single class"""
+        if len(examples) < TRIAGE_MIN_EXAMPLES:
+            return {'trained': False, 'examples': len(examples), 'reason': f"need {TRIAGE_MIN_EXAMPLES} examples"}
+
+        vectorizer = TfidfVectorizer(sublinear_tf=True, ngram_range=(1, 2), min_df=2, max_features=50000)
+        features = vectorizer.fit_transform([example['text'] for example in examples])
+
+        relevance = None
+        labels = np.array([example['relevant'] for example in examples])
+        if len(set(labels)) > 1:
+            relevance = LogisticRegression(max_iter=1000, class_weight='balanced').fit(features, labels)
+
+        tagger = None
+        tagged = [i for i, example in enumerate(examples) if example.get('tag')]
+        if len({examples[i]['tag'] for i in tagged}) > 1:
+            tagger = LogisticRegression(max_iter=1000).fit(features[tagged], [examples[i]['tag'] for i in tagged])
+
+        self.model = {
+            'vectorizer': vectorizer,
+            'relevance': relevance,
+            'tagger': tagger,
+            'trained_at': datetime.utcnow().isoformat(),
+            'examples': len(examples)
+        }
+        self.model_path.parent.mkdir(parents=True, exist_ok=True)
+        joblib.dump(self.model, self.model_path)
+        return {
+            'trained': True,
+            'examples': len(examples),
+            'relevance_model': relevance is not None,
+            'tag_model': tagger is not None,
+            'tags': [str(tag) for tag in tagger.classes_] if tagger is not None else []
+        }
+
+    def triage(self, articles: List[Dict[str, Any]]) -> Dict[str, List[Dict[str, Any]]]:
+        """Split articles into kept (annotated, maybe with a pre-filled tag) and dropped"""
+        kept, dropped, candidates = [], [], []
+        for article in articles:
+            if len(article.get('content') or '') < TRIAGE_MIN_CONTENT_CHARS:
+                dropped.append({**article, 'triage_reason': 'empty extraction'})
+            else:
+                candidates.append(article)
+
+        if not candidates or self.model is None:
+            return {'kept': candidates, 'dropped': dropped}
+
+        features = self.model['vectorizer'].transform([triage_text(article) for article in candidates])
+        relevance = self.model['relevance']
+        tagger = self.model['tagger']
+        scores = relevance.predict_proba(features)[:, list(relevance.classes_).index(True)] if relevance is not None else None
+        tag_probabilities = tagger.predict_proba(features) if tagger is not None else None
+        allowed_tags = set(self.config.all_tags)
+
+        for i, article in enumerate(candidates):
+            article = dict(article)
+            if scores is not None:
+                article['relevance_score'] = round(float(scores[i]), 4)
+                if scores[i] < TRIAGE_MIN_RELEVANCE:
+                    dropped.append({**article, 'triage_reason': 'low relevance'})
+                    continue
+            if tag_probabilities is not None:
+                best = int(np.argmax(tag_probabilities[i]))
+                tag = str(tagger.classes_[best])
+                # Tags removed from tags.yaml since training are left to the LLM
+                if tag_probabilities[i][best] >= TRIAGE_TAG_CONFIDENCE and tag in allowed_tags:
+                    article['tag'] = tag
+                    article['tag_source'] = 'triage'
+            kept.append(article)
+
+        return {'kept': kept, 'dropped': dropped}
+
+def main():
+    """Main triage execution"""
+    parser = argparse.ArgumentParser(description="Triage cleaned articles, or retrain the triage model")
+    parser.add_argument('--train', action='store_true', help="Add llm_processed outputs to the example set and retrain")
+    args = parser.parse_args()
+
+    try:
+        classifier = TriageClassifier()
+
+        if args.train:
+            results = classifier.train(classifier.collect_examples())
+            print(f"Triage training: {results}")
+            return
+
+        input_file = OUTPUT_DIR / "cleaned_text.json"
+        if not input_file.exists():
+            raise FileNotFoundError(f"Cleaned text not found: {input_file}")
+
+        with open(input_file, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+
+        if not classifier.load():
+            print("No triage model yet; only empty extractions are dropped")
+
+        articles = data.get('articles', [])
+        result = classifier.triage(articles)
+
+        report_file = OUTPUT_DIR / f"triage_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+        with open(report_file, 'w', encoding='utf-8') as f:
+            json.dump({
+                'processed_at': datetime.utcnow().isoformat(),
+                'input_articles': len(articles),
+                'kept_articles': len(result['kept']),
+                'prefilled_tags': sum(1 for article in result['kept'] if article.get('tag_source') == 'triage'),
+                'dropped': [
+                    {
+                        'url': article.get('url', ''),
+                        'title': article.get('title', ''),
+                        'reason': article['triage_reason'],
+                        'relevance_score': article.get('relevance_score')
+                    }
+                    for article in result['dropped']
+                ]
+            }, f, indent=2, ensure_ascii=False)
+
+        with open(input_file, 'w', encoding='utf-8') as f:
+            json.dump({
+                **data,
+                'triaged_at': datetime.utcnow().isoformat(),
+                'total_articles': len(result['kept']),
+                'articles': result['kept']
+            }, f, indent=2, ensure_ascii=False)
+
+        print("Triage completed successfully!")
+        print(f"Articles: {len(articles)} -> {len(result['kept'])} ({len(result['dropped'])} dropped)")
+        print(f"Report: {report_file}")
+
+    except Exception as e:
+        print(f"Triage failed: {e}")
+        raise
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,490 @@
+"""
+In-memory vector index for the search API
+Keeps every document vector in one contiguous, pre-normalized float32 matrix so a
+query is scored with a single matrix-vector product
+"""
+import json
+import shutil
+import threading
+import time
+from pathlib import Path
+from typing import List, Dict, Any, Optional
+import numpy as np
+from dateutil import parser as date_parser
+
+PAGE_SIZE = 1000
+SCORE_BLOCK_ROWS = 8192  # Rows upcast at a time when scoring a float16/int8 matrix
+SNAPSHOT_PREVIEW_CHARS = 203  # Sidecar keeps only what format_search_results shows
+SNAPSHOTS_TO_KEEP = 2
+
+class FilterColumns:
+    """Per-tag and per-domain row partitions plus a publish-time column for pre-filtering"""
+
+    def __init__(self, metadata: List[Dict[str, Any]]):
+        tags: Dict[str, List[int]] = {}
+        domains: Dict[str, List[int]] = {}
+        self.published = np.full(len(metadata), np.nan)
+        for position, item in enumerate(metadata):
+            tags.setdefault(item.get('tag') or '', []).append(position)
+            domains.setdefault(item.get('source_domain') or '', []).append(position)
+            timestamp = self._timestamp(item.get('published_date'))
+            if timestamp is not None:
+                self.published[position] = timestamp
+        self.tags = {tag: np.array(rows, dtype=np.int64) for tag, rows in tags.items()}
+        self.domains = {domain: np.array(rows, dtype=np.int64) for domain, rows in domains.items()}
+
+    @staticmethod
+    def _timestamp(value: Any) -> Optional[float]:
+        if not value:
+            return None
+        try:
+            return date_parser.parse(str(value)).timestamp()
+        except (ValueError, OverflowError):
+            return None
+
+    def candidates(self, filters: Optional[Dict[str, Any]]) -> Optional[np.ndarray]:
+        """Sorted row positions matching every filter, or None when unfiltered"""
+        if not filters:
+            return None
+
+        rows = None
+        if filters.get('tags'):
+            # Partition lookup: only rows of the requested tags are ever scored
+            parts = [self.tags.get(tag) for tag in filters['tags']]
+            rows = np.unique(np.concatenate([part for part in parts if part is not None] or [np.zeros(0, np.int64)]))
+        if filters.get('source_domain'):
+            domain_rows = self.domains.get(filters['source_domain'], np.zeros(0, np.int64))
+            rows = domain_rows if rows is None else np.intersect1d(rows, domain_rows, assume_unique=True)
+
+        after = self._timestamp(filters.get('published_after'))
+        before = self._timestamp(filters.get('published_before'))
+        if after is not None or before is not None:
+            if rows is None:
+                rows = np.arange(len(self.published))
+            published = self.published[rows]
+            mask = ~np.isnan(published)
+            if after is not None:
+                mask &= published >= after
+            if before is not None:
+                mask &= published <= before
+            rows = rows[mask]
+
+        return rows
+
+class VectorIndex:
+    """Exact (or optional HNSW / int8 + rerank) cosine-similarity index over article embeddings"""
+
+    def __init__(self, use_hnsw: bool = False, quantization: str = 'none', rerank_factor: int = 4,
+                 embedding_model: Optional[str] = None, expected_dimension: int = 0):
+        self.matrix = np.zeros((0, 0), dtype=np.float32)
+        # Only vectors tagged with embedding_model are loaded; vectors of different models live in
+        # different spaces and must never be ranked together
+        self.embedding_model = embedding_model
+        self.expected_dimension = expected_dimension
+        # int8 first-pass codes with per-row scales; exact scores come from self.matrix
+        self.quantization = quantization
+        self.rerank_factor = max(1, rerank_factor)
+        self.codes: Optional[np.ndarray] = None
+        self.scales: Optional[np.ndarray] = None
+        self.ids: List[str] = []
+        self.metadata: List[Dict[str, Any]] = []
+        self.last_updated: Optional[str] = None
+        self._positions: Dict[str, int] = {}
+        self._lock = threading.RLock()
+        self.use_hnsw = use_hnsw
+        self._hnsw = None
+        self.snapshot_version: Optional[str] = None
+        self._filter_columns: Optional[FilterColumns] = None
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def dimension(self) -> int:
+        return self.matrix.shape[1]
+
+    def check_dimension(self, dimension: int, source: str):
+        """Fail fast when vectors (or queries) do not match the index"""
+        expected = self.dimension if len(self.ids) else self.expected_dimension
+        if expected and dimension != expected:
+            raise ValueError(
+                f"{source} dimension {dimension} does not match index dimension {expected}"
+                f" ({self.embedding_model or 'unknown model'}); re-embed or align EMBEDDING_BACKEND/EMBEDDING_MODEL"
+            )
+
+    @staticmethod
+    def _normalize(vectors: np.ndarray) -> np.ndarray:
+        """L2-normalize rows so cosine similarity becomes a dot product"""
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+
+    @staticmethod
+    def quantize(vectors: np.ndarray):
+        """Symmetric per-row int8 quantization: vector ≈ codes * scale"""
+        vectors = np.asarray(vectors, dtype=np.float32)
+        scales = np.abs(vectors).max(axis=1) / 127.0
+        scales[scales == 0] = 1.0
+        codes = np.clip(np.rint(vectors / scales[:, None]), -127, 127).astype(np.int8)
+        return codes, scales.astype(np.float32)
+
+    @staticmethod
+    def parse_embedding(value: Any) -> Optional[List[float]]:
+        """pgvector columns come back from PostgREST as '[0.1,0.2,...]' strings"""
+        if value is None:
+            return None
+        if isinstance(value, str):
+            return json.loads(value)
+        return value
+
+    def upsert(self, ids: List[str], vectors: List[List[float]], metadata: List[Dict[str, Any]]):
+        """Insert new vectors and overwrite existing ones in place"""
+        if not ids:
+            return
+        batch = self._normalize(np.asarray(vectors, dtype=np.float32))
+        # Overlapping pages can return a row twice; the last copy wins
+        last_rows = {doc_id: row for row, doc_id in enumerate(ids)}
+        if len(last_rows) < len(ids):
+            rows = sorted(last_rows.values())
+            ids = [ids[row] for row in rows]
+            metadata = [metadata[row] for row in rows]
+            batch = batch[rows]
+
+        with self._lock:
+            self.check_dimension(batch.shape[1], "Embedding")
+            if len(self.ids) == 0:
+                self.matrix = np.zeros((0, batch.shape[1]), dtype=np.float32)
+            elif not self.matrix.flags.writeable:
+                # Snapshot matrices are read-only memory maps; copy before modifying
+                self.matrix = np.array(self.matrix, dtype=np.float32)
+                if self.codes is not None:
+                    self.codes = np.array(self.codes)
+                    self.scales = np.array(self.scales)
+
+            new_rows = []
+            for row, (doc_id, meta) in enumerate(zip(ids, metadata)):
+                position = self._positions.get(doc_id)
+                if position is None:
+                    self._positions[doc_id] = len(self.ids)
+                    new_rows.append(row)
+                    self.ids.append(doc_id)
+                    self.metadata.append(meta)
+                else:
+                    self.matrix[position] = batch[row]
+                    self.metadata[position] = meta
+
+            if new_rows:
+                # One concatenation per batch keeps the matrix contiguous
+                self.matrix = np.ascontiguousarray(np.vstack([self.matrix, batch[new_rows]]))
+
+            if self.quantization == 'int8':
+                self._update_codes(ids, batch)
+
+            if self.use_hnsw:
+                self._update_hnsw([self._positions[doc_id] for doc_id in ids], batch)
+
+            self._filter_columns = None
+
+    def _update_codes(self, ids: List[str], batch: np.ndarray):
+        """Keep the int8 codes in step with the float matrix"""
+        codes, scales = self.quantize(batch)
+        if self.codes is None or len(self.codes) == 0:
+            self.codes, self.scales = self.quantize(self.matrix)
+            return
+        positions = np.array([self._positions[doc_id] for doc_id in ids])
+        appended = positions >= len(self.codes)
+        self.codes[positions[~appended]] = codes[~appended]
+        self.scales[positions[~appended]] = scales[~appended]
+        if appended.any():
+            order = np.argsort(positions[appended])
+            self.codes = np.vstack([self.codes, codes[appended][order]])
+            self.scales = np.concatenate([self.scales, scales[appended][order]])
+
+    def _update_hnsw(self, positions: List[int], batch: np.ndarray):
+        """Add or replace items in the optional HNSW graph"""
+        try:
+            import hnswlib
+        except ImportError:
+            print("Warning: hnswlib not installed, falling back to exact search")
+            self.use_hnsw = False
+            return
+
+        if self._hnsw is None:
+            self._hnsw = hnswlib.Index(space='ip', dim=self.dimension)
+            self._hnsw.init_index(max_elements=max(1024, len(self.ids) * 2), ef_construction=200, M=16)
+            self._hnsw.set_ef(64)
+        elif len(self.ids) > self._hnsw.get_max_elements():
+            self._hnsw.resize_index(len(self.ids) * 2)
+        self._hnsw.add_items(batch, np.asarray(positions))
+
+    @property
+    def filter_columns(self) -> FilterColumns:
+        """Partitions for metadata filters, rebuilt lazily after changes"""
+        if self._filter_columns is None:
+            self._filter_columns = FilterColumns(self.metadata)
+        return self._filter_columns
+
+    def search(self, query_embedding: List[float], limit: int = 10, threshold: float = 0.0,
+               filters: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """Return up to limit documents with cosine similarity >= threshold, best first
+
+        filters (tags, source_domain, published_after, published_before) are applied
+        before scoring, so a filtered query only scans its partition.
+        """
+        with self._lock:
+            count = len(self.ids)
+            if count == 0:
+                return []
+
+            query = np.asarray(query_embedding, dtype=np.float32)
+            self.check_dimension(query.shape[0], "Query embedding")
+            query /= np.linalg.norm(query) or 1.0
+
+            rows = self.filter_columns.candidates(filters)
+            if rows is not None:
+                return self._search_rows(rows, query, limit, threshold)
+
+            k = min(limit, count)
+
+            if self._hnsw is not None:
+                labels, distances = self._hnsw.knn_query(query, k=k)
+                top = labels[0]
+                scores = 1.0 - distances[0]
+            elif self.codes is not None:
+                top, scores = self._search_quantized(query, k)
+            else:
+                similarities = self._score(query)
+                top = self._top_k(similarities, k)
+                scores = similarities[top]
+
+            return self._results(top, scores, threshold)
+
+    def search_batch(self, query_embeddings: List[List[float]], limit: int = 10, threshold: float = 0.0,
+                     filters: Optional[Dict[str, Any]] = None) -> List[List[Dict[str, Any]]]:
+        """Search several queries at once, returning one result list per query
+
+        All queries are scored in a single matrix-matrix product, which reads the
+        matrix once instead of once per query.
+        """
+        with self._lock:
+            count = len(self.ids)
+            if count == 0 or not len(query_embeddings):
+                return [[] for _ in query_embeddings]
+
+            queries = np.asarray(query_embeddings, dtype=np.float32)
+            self.check_dimension(queries.shape[1], "Query embedding")
+            norms = np.linalg.norm(queries, axis=1, keepdims=True)
+            queries /= np.where(norms == 0, 1.0, norms)
+
+            rows = self.filter_columns.candidates(filters)
+            if rows is not None:
+                return [self._search_rows(rows, query, limit, threshold) for query in queries]
+
+            k = min(limit, count)
+
+            if self._hnsw is not None:
+                labels, distances = self._hnsw.knn_query(queries, k=k)
+                return [self._results(labels[i], 1.0 - distances[i], threshold) for i in range(len(queries))]
+
+            if self.codes is not None:
+                approx = self._blockwise_dot(self.codes, queries.T) * self.scales[:, None]
+                results = []
+                for column, query in enumerate(queries):
+                    candidates = np.sort(self._top_k(approx[:, column], min(count, k * self.rerank_factor)))
+                    exact = np.asarray(self.matrix[candidates], dtype=np.float32) @ query
+                    order = self._top_k(exact, k)
+                    results.append(self._results(candidates[order], exact[order], threshold))
+                return results
+
+            similarities = self._blockwise_dot(self.matrix, queries.T)
+            results = []
+            for column in range(len(queries)):
+                top = self._top_k(similarities[:, column], k)
+                results.append(self._results(top, similarities[top, column], threshold))
+            return results
+
+    def _results(self, positions: np.ndarray, scores: np.ndarray, threshold: float) -> List[Dict[str, Any]]:
+        """Result dicts for positions ordered best first, stopping below threshold"""
+        results = []
+        for position, score in zip(positions, scores):
+            if score < threshold:
+                break
+            results.append({
+                'id': self.ids[position],
+                **self.metadata[position],
+                'similarity': float(score)
+            })
+        return results
+
+    def _search_rows(self, rows: np.ndarray, query: np.ndarray, limit: int, threshold: float) -> List[Dict[str, Any]]:
+        """Exact search restricted to the given row positions"""
+        if not len(rows):
+            return []
+        if self.codes is not None:
+            # First pass on the partition's int8 codes, exact rerank of the best candidates
+            approx = self._blockwise_dot(self.codes[rows], query) * self.scales[rows]
+            rows = np.sort(rows[self._top_k(approx, min(len(rows), limit * self.rerank_factor))])
+        similarities = self._blockwise_dot(self.matrix[rows], query)
+        top = self._top_k(similarities, min(limit, len(rows)))
+        return self._results(rows[top], similarities[top], threshold)
+
+    @staticmethod
+    def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+        """Indices of the k highest scores, best first"""
+        if k < len(scores):
+            top = np.argpartition(-scores, k - 1)[:k]
+        else:
+            top = np.arange(len(scores))
+        return top[np.argsort(-scores[top])]
+
+    @staticmethod
+    def _blockwise_dot(matrix: np.ndarray, query: np.ndarray) -> np.ndarray:
+        """matrix @ query (a vector or a dimension x queries matrix), upcasting
+        reduced-precision rows block by block to bound temporary memory"""
+        if matrix.dtype == np.float32:
+            return matrix @ query
+        scores = np.empty((len(matrix),) + query.shape[1:], dtype=np.float32)
+        for start in range(0, len(matrix), SCORE_BLOCK_ROWS):
+            block = matrix[start:start + SCORE_BLOCK_ROWS]
+            scores[start:start + len(block)] = block.astype(np.float32) @ query
+        return scores
+
+    def _score(self, query: np.ndarray) -> np.ndarray:
+        """Cosine similarity of the query against every row"""
+        return self._blockwise_dot(self.matrix, query)
+
+    def _search_quantized(self, query: np.ndarray, k: int):
+        """Approximate int8 scan, then exact float rerank of the best k * rerank_factor rows"""
+        approx = self._blockwise_dot(self.codes, query) * self.scales
+        candidates = np.sort(self._top_k(approx, min(len(approx), k * self.rerank_factor)))
+        # Sorted fancy indexing reads only the candidate rows from a memory-mapped matrix
+        exact = np.asarray(self.matrix[candidates], dtype=np.float32) @ query
+        order = self._top_k(exact, k)
+        return candidates[order], exact[order]
+
+    def save_snapshot(self, directory: Path, version: str, dtype: str = 'float32', embedding_model: Optional[str] = None) -> Path:
+        """Write vectors.npy plus a meta.json sidecar and atomically point CURRENT at them"""
+        directory = Path(directory)
+        snapshot_dir = directory / version
+        snapshot_dir.mkdir(parents=True, exist_ok=True)
+
+        with self._lock:
+            np.save(snapshot_dir / 'vectors.npy', np.ascontiguousarray(self.matrix, dtype=np.dtype(dtype)))
+            codes, scales = self.quantize(self.matrix) if len(self.ids) else (self.matrix.astype(np.int8), np.zeros(0, np.float32))
+            np.save(snapshot_dir / 'codes_int8.npy', codes)
+            np.save(snapshot_dir / 'scales.npy', scales)
+            meta = {
+                'version': version,
+                'dtype': dtype,
+                'dimension': self.dimension,
+                'count': len(self.ids),
+                'embedding_model': embedding_model or self.embedding_model or '',
+                'last_updated': self.last_updated,
+                'ids': self.ids,
+                'metadata': [
+                    {**item, 'text_content': (item.get('text_content') or '')[:SNAPSHOT_PREVIEW_CHARS]}
+                    for item in self.metadata
+                ]
+            }
+        with open(snapshot_dir / 'meta.json', 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False)
+
+        pointer = directory / 'CURRENT.tmp'
+        pointer.write_text(version, encoding='utf-8')
+        pointer.replace(directory / 'CURRENT')
+
+        # Keep the previous snapshot for workers still mapping it
+        snapshots = sorted(path for path in directory.iterdir() if path.is_dir())
+        for old in snapshots[:-SNAPSHOTS_TO_KEEP]:
+            shutil.rmtree(old, ignore_errors=True)
+
+        return snapshot_dir
+
+    @staticmethod
+    def current_snapshot_version(directory: Path) -> Optional[str]:
+        """Version named by the CURRENT pointer, if any"""
+        pointer = Path(directory) / 'CURRENT'
+        if not pointer.exists():
+            return None
+        return pointer.read_text(encoding='utf-8').strip() or None
+
+    @classmethod
+    def from_snapshot(cls, directory: Path, use_hnsw: bool = False, quantization: str = 'none',
+                      rerank_factor: int = 4, embedding_model: Optional[str] = None) -> Optional['VectorIndex']:
+        """Memory-map the current snapshot; the page cache is shared by every worker
+
+        With embedding_model set, a snapshot built from a different model is rejected.
+        """
+        version = cls.current_snapshot_version(directory)
+        if version is None:
+            return None
+
+        start = time.perf_counter()
+        snapshot_dir = Path(directory) / version
+        with open(snapshot_dir / 'meta.json', 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        if embedding_model and meta.get('embedding_model') != embedding_model:
+            raise ValueError(f"Snapshot {version} was built from {meta.get('embedding_model') or 'an untagged model'}, not {embedding_model}")
+
+        index = cls(use_hnsw=use_hnsw, quantization=quantization, rerank_factor=rerank_factor,
+                    embedding_model=meta.get('embedding_model') or embedding_model)
+        index.matrix = np.load(snapshot_dir / 'vectors.npy', mmap_mode='r')
+        if quantization == 'int8' and (snapshot_dir / 'codes_int8.npy').exists():
+            index.codes = np.load(snapshot_dir / 'codes_int8.npy', mmap_mode='r')
+            index.scales = np.load(snapshot_dir / 'scales.npy', mmap_mode='r')
+        index.ids = meta['ids']
+        index.metadata = meta['metadata']
+        index.last_updated = meta.get('last_updated')
+        index.snapshot_version = version
+        index._positions = {doc_id: position for position, doc_id in enumerate(index.ids)}
+        if use_hnsw and len(index.ids):
+            index._update_hnsw(list(range(len(index.ids))), np.asarray(index.matrix, dtype=np.float32))
+
+        elapsed = (time.perf_counter() - start) * 1000
+        print(f"Loaded vector snapshot {version}: {len(index.ids)} vectors ({meta['dtype']}) in {elapsed:.1f} ms")
+        return index
+
+    def load_from_supabase(self, supabase, incremental: bool = True) -> int:
+        """Load vectors (only those updated since the last load when incremental) in pages"""
+        since = self.last_updated if incremental else None
+        loaded = 0
+        start = 0
+
+        while True:
+            query = supabase.table('embeddings') \
+                .select('article_id, embedding, text_content, updated_at, '
+                        'articles(title, filepath, tag, published_date, source_domain)')
+            if self.embedding_model:
+                query = query.eq('embedding_model', self.embedding_model)
+            if since:
+                query = query.gt('updated_at', since)
+            result = query.order('updated_at').range(start, start + PAGE_SIZE - 1).execute()
+            rows = result.data or []
+
+            ids, vectors, metadata = [], [], []
+            for row in rows:
+                embedding = self.parse_embedding(row.get('embedding'))
+                if not embedding:
+                    continue
+                article = row.get('articles') or {}
+                ids.append(row['article_id'])
+                vectors.append(embedding)
+                metadata.append({
+                    'title': article.get('title', ''),
+                    'filepath': article.get('filepath', ''),
+                    'tag': article.get('tag'),
+                    'published_date': article.get('published_date'),
+                    'source_domain': article.get('source_domain'),
+                    'text_content': row.get('text_content') or ''
+                })
+                if row.get('updated_at') and (self.last_updated is None or row['updated_at'] > self.last_updated):
+                    self.last_updated = row['updated_at']
+
+            self.upsert(ids, vectors, metadata)
+            loaded += len(ids)
+
+            if len(rows) < PAGE_SIZE:
+                break
+            start += PAGE_SIZE
+
+        return loaded
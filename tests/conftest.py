@@ -0,0 +1,7 @@
+"""
+Pipeline modules live flat in src/ and import each other by name, as they do when run from there
+"""
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'src'))
@@ -0,0 +1,73 @@
+import xml.etree.ElementTree as ET
+from datetime import datetime
+import pytest
+import catalog
+from catalog import ArticleCatalog, catalog_entry, LISTING_START
+
+@pytest.fixture
+def site(tmp_path, monkeypatch):
+    docs = tmp_path / 'docs' / 'auto'
+    monkeypatch.setattr(catalog, 'DOCS_DIR', docs)
+    monkeypatch.setattr(catalog, 'TOPICS_DIR', tmp_path / 'docs' / 'topics')
+    monkeypatch.setattr(catalog, 'ARCHIVE_DIR', tmp_path / 'docs' / 'archive')
+    monkeypatch.setattr(catalog, 'FEED_PATH', tmp_path / 'static' / 'rss.xml')
+    monkeypatch.setattr(catalog, 'SITE_URL', 'https://example.com')
+    monkeypatch.setattr(catalog, 'RSS_ITEMS', 2)
+    return tmp_path
+
+def entry(slug, date, tag='ai', url=None):
+    article = {'seo_title': f"{slug} & more", 'summary': f"About {slug}. Details.", 'tag': tag,
+               'url': url or f"https://news.example/{slug}", 'source_domain': 'news.example'}
+    run = date.replace('-', '')
+    return catalog_entry(article, f"{run}_060000/{run}-{slug}.md", slug, datetime.strptime(date, '%Y-%m-%d'))
+
+def test_catalog_entry_keeps_the_first_summary_sentence_and_a_relative_path(site):
+    record = catalog_entry({'title': 'T', 'summary': 'One. Two.'}, catalog.DOCS_DIR / 'run' / 'page.md', 'page',
+                           datetime(2026, 10, 19))
+
+    assert record['path'] == 'run/page.md'
+    assert record['summary'] == 'One.'
+    assert record['tag'] == 'development'
+
+def test_publish_updates_only_the_affected_listings_newest_first(site):
+    articles = ArticleCatalog(site / 'catalog.jsonl')
+    articles.publish([entry('first', '2026-09-30')])
+    pages = articles.publish([entry('second', '2026-10-01'), entry('third', '2026-10-02', tag='rust')])
+
+    topics = site / 'docs' / 'topics'
+    archive = site / 'docs' / 'archive'
+    assert sorted(pages) == sorted(str(path) for path in [
+        topics / 'ai.md', topics / 'rust.md', archive / '2026-10.md', site / 'static' / 'rss.xml'])
+    ai_page = (topics / 'ai.md').read_text(encoding='utf-8')
+    assert ai_page.index('second & more') < ai_page.index('first & more')
+    assert ai_page.index(LISTING_START) < ai_page.index('second & more')
+    assert '../auto/20261001_060000/20261001-second.md' in ai_page
+    assert 'first' not in (archive / '2026-10.md').read_text(encoding='utf-8')
+    assert 'first' in (archive / '2026-09.md').read_text(encoding='utf-8')
+
+def test_feed_lists_the_newest_entries_with_utc_dates(site):
+    articles = ArticleCatalog(site / 'catalog.jsonl')
+    articles.publish([entry('first', '2026-10-17'), entry('second', '2026-10-18'), entry('third', '2026-10-19')])
+
+    channel = ET.parse(site / 'static' / 'rss.xml').getroot().find('channel')
+    items = channel.findall('item')
+
+    assert [item.findtext('title') for item in items] == ['third & more', 'second & more']
+    assert items[0].findtext('link') == 'https://example.com/docs/auto/20261019_060000/third'
+    assert items[0].findtext('pubDate') == 'Mon, 19 Oct 2026 00:00:00 +0000'
+
+def test_read_tail_crosses_chunk_boundaries(site, monkeypatch):
+    monkeypatch.setattr(catalog, 'TAIL_CHUNK_BYTES', 64)
+    articles = ArticleCatalog(site / 'catalog.jsonl')
+    articles.append([entry(f"post-{i}", '2026-10-19') for i in range(20)])
+
+    assert [record['slug'] for record in articles.read_tail(3)] == ['post-17', 'post-18', 'post-19']
+    assert len(articles.read_tail(50)) == 20
+
+def test_published_urls(site):
+    articles = ArticleCatalog(site / 'catalog.jsonl')
+    assert articles.published_urls() == set()
+
+    articles.append([entry('first', '2026-10-19', url='https://a.example/post')])
+
+    assert articles.published_urls() == {'https://a.example/post'}
@@ -0,0 +1,40 @@
+import random
+import string
+from dedup import NearDuplicateDetector
+
+def article_text(seed: int, words: int = 150) -> str:
+    """Random lowercase words: unrelated texts share almost no 5-character shingles"""
+    rng = random.Random(seed)
+    return ' '.join(''.join(rng.choices(string.ascii_lowercase, k=rng.randint(3, 8))) for _ in range(words))
+
+def detector(**kwargs):
+    return NearDuplicateDetector(**{'threshold': 0.8, 'num_perm': 128, 'bands': 32, 'shingle_size': 5, **kwargs})
+
+def test_signature_is_deterministic_for_a_seed():
+    text = article_text(1)
+
+    assert (detector().signature(text) == detector().signature(text)).all()
+    assert detector().signature("abc") is None
+
+def test_near_duplicates_are_clustered_and_distinct_texts_are_not():
+    original = article_text(1)
+    syndicated = "Reposted from the wire. " + original + " Subscribe for more."
+    unrelated = article_text(2)
+
+    clusters = detector().find_clusters([original, unrelated, syndicated, ""])
+
+    assert clusters == [[0, 2]]
+
+def test_deduplicate_keeps_the_longest_copy_with_alternate_sources():
+    original = article_text(3)
+    articles = [
+        {'url': 'https://a.example/story', 'title': 'A', 'content': original},
+        {'url': 'https://b.example/story', 'title': 'B', 'content': original + " Extra closing paragraph."},
+        {'url': 'https://c.example/other', 'title': 'C', 'content': article_text(4)},
+    ]
+
+    result = detector().deduplicate(articles)
+
+    assert [article['url'] for article in result['articles']] == ['https://b.example/story', 'https://c.example/other']
+    assert [source['url'] for source in result['articles'][0]['alternate_sources']] == ['https://a.example/story']
+    assert result['clusters'] == [{'representative': 'https://b.example/story', 'duplicates': ['https://a.example/story']}]
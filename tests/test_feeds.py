@@ -0,0 +1,120 @@
+import io
+from types import SimpleNamespace
+import pytest
+import feeds
+from feeds import FeedDiscovery, KeywordMatcher
+
+RSS = b"""<?xml version="1.0"?>
+<rss version="2.0"><channel>
+  <title>Example</title>
+  <image><url>https://example.com/logo.png</url><title>Example</title></image>
+  <item>
+    <title>Rust 2.0 released</title>
+    <link>https://example.com/rust-2</link>
+    <pubDate>Mon, 19 Oct 2026 08:00:00 GMT</pubDate>
+  </item>
+  <item>
+    <title>Gardening tips</title>
+    <link>https://example.com/garden</link>
+    <pubDate>Mon, 19 Oct 2026 08:00:00 GMT</pubDate>
+  </item>
+</channel></rss>"""
+
+SITEMAP = b"""<?xml version="1.0"?>
+<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
+  <url><loc>https://example.com/blog/rust-compiler-speedups</loc><lastmod>2026-10-18</lastmod></url>
+  <url><loc>https://example.com/blog/old-rust-post</loc><lastmod>2020-01-01</lastmod></url>
+</urlset>"""
+
+def test_matcher_requires_every_word_of_a_keyword():
+    matcher = KeywordMatcher(['Gemini Pro', 'Rust'])
+
+    assert matcher.match("Gemini 2 Pro benchmarks") == ['Gemini Pro']
+    assert matcher.match("Gemini nano on device") == []
+    assert matcher.match("Why RUST, and why now") == ['Rust']
+
+def test_matcher_respects_ascii_word_boundaries_but_not_cjk():
+    matcher = KeywordMatcher(['RAG', '生成AI'])
+
+    assert matcher.match("Object storage pricing") == []
+    assert matcher.match("Production RAG pipelines") == ['RAG']
+    assert matcher.match("最新の生成AIまとめ") == ['生成AI']
+
+def test_matcher_follows_failure_links_to_overlapping_words():
+    matcher = KeywordMatcher(['生成', '成AI', 'AI'])
+
+    assert matcher.match("生成AIの活用") == ['生成', '成AI', 'AI']
+
+class FakeResponse:
+    def __init__(self, status_code=200, body=b'', headers=None):
+        self.status_code = status_code
+        self.raw = io.BytesIO(body)
+        self.headers = headers or {}
+
+    def raise_for_status(self):
+        pass
+
+    def close(self):
+        pass
+
+class FakeSession:
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.requests = []
+
+    def get(self, url, headers=None, **kwargs):
+        self.requests.append(headers or {})
+        return self.responses.pop(0)
+
+@pytest.fixture
+def discovery(tmp_path, monkeypatch):
+    resolver = feeds.DateResolver(cache_path=tmp_path / 'date_formats.json')
+    monkeypatch.setattr(feeds, 'DateResolver', lambda: resolver)
+    monkeypatch.setattr(feeds, 'ArticleCatalog', lambda: SimpleNamespace(published_urls=lambda: {'https://example.com/published'}))
+    config = SimpleNamespace(keyword_list=['Rust'], search_config={'date_range': 'week'}, feed_sources=[])
+    instance = FeedDiscovery(config=config, state_path=tmp_path / 'feeds.json')
+    instance.cutoff = feeds.datetime(2026, 10, 12, tzinfo=feeds.timezone.utc)
+    return instance
+
+def test_poll_keeps_matching_rss_items_and_ignores_channel_image_urls(discovery):
+    discovery.session = FakeSession([FakeResponse(body=RSS, headers={'ETag': '"v1"'})])
+
+    articles = discovery.poll('https://example.com/feed')
+
+    assert [article['url'] for article in articles] == ['https://example.com/rust-2']
+    assert articles[0]['published_date'].startswith('2026-10-19')
+
+def test_poll_matches_sitemap_slugs_and_drops_stale_entries(discovery):
+    discovery.session = FakeSession([FakeResponse(body=SITEMAP)])
+
+    articles = discovery.poll('https://example.com/sitemap.xml')
+
+    assert [article['url'] for article in articles] == ['https://example.com/blog/rust-compiler-speedups']
+
+def test_published_urls_are_skipped(discovery):
+    body = RSS.replace(b'https://example.com/rust-2', b'https://example.com/published')
+    discovery.session = FakeSession([FakeResponse(body=body)])
+
+    assert discovery.poll('https://example.com/feed') == []
+
+def test_validators_are_sent_back_and_304_yields_nothing(discovery):
+    discovery.session = FakeSession([
+        FakeResponse(body=RSS, headers={'ETag': '"v1"', 'Last-Modified': 'Mon, 19 Oct 2026 08:00:00 GMT'}),
+        FakeResponse(status_code=304),
+    ])
+
+    discovery.poll('https://example.com/feed')
+    second = discovery.poll('https://example.com/feed')
+
+    assert second == []
+    assert discovery.session.requests[1] == {
+        'If-None-Match': '"v1"', 'If-Modified-Since': 'Mon, 19 Oct 2026 08:00:00 GMT'
+    }
+
+def test_truncated_body_keeps_the_old_validators(discovery):
+    discovery.state['https://example.com/feed'] = {'etag': '"v1"'}
+    discovery.session = FakeSession([FakeResponse(body=RSS[:len(RSS) // 2], headers={'ETag': '"v2"'})])
+
+    discovery.poll('https://example.com/feed')
+
+    assert discovery.state['https://example.com/feed']['etag'] == '"v1"'
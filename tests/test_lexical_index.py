@@ -0,0 +1,56 @@
+from lexical_index import BM25Index, reciprocal_rank_fusion, tokenize
+
+def build(docs):
+    index = BM25Index()
+    ids = [str(i) for i in range(len(docs))]
+    index.build(ids, [title for title, _ in docs], [body for _, body in docs], [{'tag': 'ai'} for _ in ids])
+    return index
+
+def test_tokenize_keeps_tech_names_and_splits_japanese_into_bigrams():
+    assert tokenize("C++ and Node.js on CI") == ['c++', 'and', 'node.js', 'on', 'ci']
+    assert tokenize("生成AI") == ['生成', 'ai']
+
+def test_bm25_ranks_matching_documents_only():
+    index = build([
+        ("Rust release notes", "The rust compiler gets faster builds"),
+        ("Python packaging", "pip and wheels explained"),
+        ("Weekly digest", "A short note on rust and python"),
+    ])
+
+    results = index.search("rust")
+
+    assert [result['id'] for result in results] == ['0', '2']
+    assert results[0]['score'] > results[1]['score'] > 0
+    assert results[0]['tag'] == 'ai'
+
+def test_bm25_rare_terms_outweigh_common_terms():
+    index = build([
+        ("GPU kernels", "kernels kernels"),
+        ("Kernels", "the common word"),
+        ("Other", "the common word"),
+    ])
+
+    scores = index.scores("gpu common")
+
+    assert scores[0] > scores[1]
+
+def test_bm25_limit_and_unknown_terms():
+    index = build([(f"title {i}", "shared body text") for i in range(5)])
+
+    assert len(index.search("shared", limit=2)) == 2
+    assert index.search("absent") == []
+
+def test_rrf_rewards_documents_ranked_by_both_lists():
+    vector = [{'id': 'a', 'similarity': 0.9}, {'id': 'b', 'similarity': 0.8}, {'id': 'c', 'similarity': 0.7}]
+    lexical = [{'id': 'b', 'score': 12.0}, {'id': 'c', 'score': 3.0}]
+
+    fused = reciprocal_rank_fusion([vector, lexical], limit=3, k=60)
+
+    assert [result['id'] for result in fused] == ['b', 'c', 'a']
+    assert fused[0]['score'] == 1 / 62 + 1 / 61
+    assert fused[0]['similarity'] == 0.8
+
+def test_rrf_respects_limit():
+    fused = reciprocal_rank_fusion([[{'id': str(i)} for i in range(5)]], limit=2)
+
+    assert [result['id'] for result in fused] == ['0', '1']
@@ -0,0 +1,124 @@
+import json
+from types import SimpleNamespace
+import pytest
+import llm
+from config import Config
+from llm import LLMProcessor, usage_summary
+
+CONFIG = Config()
+TAG = sorted(CONFIG.all_tags)[0]
+GOOD_SUMMARY = "A new release ships faster builds. It also changes defaults. Upgrading takes minutes."
+
+def reply(summary=GOOD_SUMMARY, tag=TAG, finish_reason='stop', prompt_tokens=1000, completion_tokens=100):
+    message = SimpleNamespace(content=json.dumps({'seo_title': 'Title', 'summary': summary, 'tag': tag, 'relevant': True}),
+                              refusal=None)
+    return SimpleNamespace(
+        choices=[SimpleNamespace(message=message, finish_reason=finish_reason)],
+        usage=SimpleNamespace(prompt_tokens=prompt_tokens, completion_tokens=completion_tokens)
+    )
+
+class FakeCompletions:
+    """Returns (or raises) the scripted replies in order and records the model of each call"""
+
+    def __init__(self, replies):
+        self.replies = list(replies)
+        self.models = []
+
+    def create(self, model, **kwargs):
+        self.models.append(model)
+        outcome = self.replies.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+@pytest.fixture
+def processor(monkeypatch):
+    monkeypatch.setattr(llm, 'LLM_ROUTING', 'cascade')
+    monkeypatch.setattr(llm, 'LLM_SMALL_MODEL', 'gpt-4o-mini')
+    monkeypatch.setattr(llm, 'LLM_LARGE_MODEL', 'gpt-4o')
+    monkeypatch.setattr(llm, 'LLM_ESCALATE_CONTENT_CHARS', 6000)
+    monkeypatch.setattr(llm, 'LLM_SUMMARY_MIN_CHARS', 50)
+    monkeypatch.setattr(llm, 'LLM_SUMMARY_MAX_CHARS', 800)
+    monkeypatch.setattr(llm, 'LLM_MAX_RETRIES', 1)
+    instance = LLMProcessor.__new__(LLMProcessor)
+    instance.config = CONFIG
+    return instance
+
+def script(processor, *replies):
+    completions = FakeCompletions(replies)
+    processor.client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    return completions
+
+ARTICLE = {'url': 'https://a.example/post', 'title': 'Post', 'snippet': 'Snippet', 'source_domain': 'a.example'}
+
+def test_small_model_answer_is_accepted(processor):
+    completions = script(processor, reply())
+
+    result = processor._generate('short article', ARTICLE)
+
+    assert completions.models == ['gpt-4o-mini']
+    assert result['llm_model'] == 'gpt-4o-mini'
+    assert result['llm_route'] == 'cascade'
+    assert [call['outcome'] for call in result['llm_cascade']] == ['accepted']
+    assert result['llm_cascade'][0]['cost_usd'] == pytest.approx((1000 * 0.15 + 100 * 0.60) / 1_000_000)
+
+def test_weak_small_model_answers_escalate_and_are_still_billed(processor):
+    completions = script(processor, reply(summary='Too short.'), reply())
+
+    result = processor._generate('short article', ARTICLE)
+
+    assert completions.models == ['gpt-4o-mini', 'gpt-4o']
+    assert result['llm_model'] == 'gpt-4o'
+    escalated, accepted = result['llm_cascade']
+    assert (escalated['model'], escalated['outcome']) == ('gpt-4o-mini', 'escalated')
+    assert escalated['cost_usd'] > 0 and 'latency_ms' in escalated
+    assert (accepted['model'], accepted['outcome']) == ('gpt-4o', 'accepted')
+
+def test_truncated_answers_escalate(processor):
+    completions = script(processor, reply(finish_reason='length'), reply())
+
+    result = processor._generate('short article', ARTICLE)
+
+    assert completions.models == ['gpt-4o-mini', 'gpt-4o']
+    assert result['llm_cascade'][0]['prompt_tokens'] == 1000
+
+def test_long_articles_and_stories_go_straight_to_the_large_model(processor):
+    completions = script(processor, reply(), reply())
+
+    long_result = processor._generate('x' * 6001, ARTICLE)
+    story_result = processor._generate('story', ARTICLE, source_count=3)
+
+    assert completions.models == ['gpt-4o', 'gpt-4o']
+    assert (long_result['llm_route'], story_result['llm_route']) == ('long article', 'multi-source story')
+
+def test_last_model_is_retried_then_falls_back_to_the_snippet(processor):
+    completions = script(processor, Exception("timeout"), Exception("rate limited"), Exception("server error"))
+
+    result = processor._generate('short article', ARTICLE)
+
+    assert completions.models == ['gpt-4o-mini', 'gpt-4o', 'gpt-4o']
+    assert [call['outcome'] for call in result['llm_cascade']] == ['escalated', 'retried', 'failed']
+    assert all('latency_ms' in call for call in result['llm_cascade'])
+    assert result['llm_model'] == 'fallback'
+    assert result['summary'] == 'Snippet'
+
+def test_single_routing_uses_only_the_large_model(processor, monkeypatch):
+    monkeypatch.setattr(llm, 'LLM_ROUTING', 'single')
+    monkeypatch.setattr(llm, 'LLM_MAX_RETRIES', 0)
+    completions = script(processor, Exception("server error"))
+
+    result = processor._generate('short article', ARTICLE)
+
+    assert completions.models == ['gpt-4o']
+    assert [call['outcome'] for call in result['llm_cascade']] == ['failed']
+
+def test_usage_summary_totals_every_attempt(processor):
+    script(processor, reply(summary='Too short.'), reply())
+    articles = [processor._generate('short article', ARTICLE)]
+
+    summary = usage_summary(articles)
+
+    assert summary['models']['gpt-4o-mini']['escalated'] == 1
+    assert summary['models']['gpt-4o']['accepted'] == 1
+    assert summary['total_cost_usd'] == pytest.approx(
+        sum(call['cost_usd'] for call in articles[0]['llm_cascade']), abs=1e-6)
@@ -0,0 +1,90 @@
+import threading
+import time
+import pytest
+import reader
+from reader import ArticleReader
+
+LONG = 'x' * 300
+
+@pytest.fixture
+def hedged_reader(monkeypatch):
+    monkeypatch.setattr(reader, 'READER_HEDGE_DELAY', 0.1)
+    monkeypatch.setattr(reader, 'READER_HEDGE_MIN_CONTENT_CHARS', 200)
+    instance = ArticleReader()
+    instance.hedged = True
+    yield instance
+    instance.close()
+
+def stub(instance, method, content='', delay=0.0, error=None):
+    """Replace one extraction method; returns the list of cancel events it was called with"""
+    calls = []
+
+    def extract(url, cancel=None):
+        calls.append(cancel)
+        if delay:
+            cancel.wait(delay)
+        if error:
+            raise error
+        return {'url': url, 'content': content, 'extraction_method': method}
+
+    setattr(instance, f"_extract_with_{method}", extract)
+    return calls
+
+def test_fast_mercury_wins_without_starting_the_direct_fetch(hedged_reader):
+    stub(hedged_reader, 'mercury', LONG)
+    direct = stub(hedged_reader, 'beautifulsoup', LONG)
+
+    result = hedged_reader.read_article('https://a.example/post')
+
+    assert result['extraction_method'] == 'mercury'
+    assert direct == []
+
+def test_slow_mercury_loses_to_the_direct_fetch_and_is_cancelled(hedged_reader):
+    mercury = stub(hedged_reader, 'mercury', LONG, delay=5.0)
+    stub(hedged_reader, 'beautifulsoup', LONG)
+
+    started = time.monotonic()
+    result = hedged_reader.read_article('https://a.example/post')
+
+    assert result['extraction_method'] == 'beautifulsoup'
+    assert time.monotonic() - started < 1.0
+    assert mercury[0].is_set()
+
+def test_mercury_failure_starts_the_direct_fetch_at_once(hedged_reader, monkeypatch):
+    monkeypatch.setattr(reader, 'READER_HEDGE_DELAY', 5.0)
+    stub(hedged_reader, 'mercury', error=Exception("HTTP 500"))
+    stub(hedged_reader, 'beautifulsoup', LONG)
+
+    started = time.monotonic()
+    result = hedged_reader.read_article('https://a.example/post')
+
+    assert result['extraction_method'] == 'beautifulsoup'
+    assert time.monotonic() - started < 1.0
+
+def test_short_results_do_not_win_and_the_longer_one_is_kept(hedged_reader):
+    stub(hedged_reader, 'mercury', 'm' * 50)
+    stub(hedged_reader, 'beautifulsoup', 'b' * 80)
+
+    result = hedged_reader.read_article('https://a.example/post')
+
+    assert result['content'] == 'b' * 80
+
+def test_reader_can_be_reused_after_close(hedged_reader):
+    stub(hedged_reader, 'mercury', LONG)
+    stub(hedged_reader, 'beautifulsoup', LONG)
+
+    hedged_reader.read_article('https://a.example/one')
+    hedged_reader.close()
+
+    assert hedged_reader.read_article('https://a.example/two')['extraction_method'] == 'mercury'
+    assert hedged_reader.latencies['mercury'] and len(hedged_reader.latencies['mercury']) == 2
+
+def test_each_thread_gets_its_own_session():
+    instance = ArticleReader()
+    sessions = []
+    thread = threading.Thread(target=lambda: sessions.append(instance.session))
+    thread.start()
+    thread.join()
+
+    assert sessions[0] is not instance.session
+    assert instance.session is instance.session
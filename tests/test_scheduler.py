@@ -0,0 +1,57 @@
+from datetime import datetime
+import pytest
+import scheduler
+from scheduler import KeywordScheduler
+
+NOW = datetime(2026, 10, 19)
+
+@pytest.fixture
+def keyword_scheduler(tmp_path, monkeypatch):
+    monkeypatch.setattr(scheduler, 'STATE_DIR', tmp_path)
+    monkeypatch.setattr(scheduler, 'CRAWL_TARGET_YIELD', 2.0)
+    monkeypatch.setattr(scheduler, 'CRAWL_PRIOR_YIELD', 5.0)
+    monkeypatch.setattr(scheduler, 'CRAWL_MAX_PAGES', 3)
+    monkeypatch.setattr(scheduler, 'CRAWL_MAX_INTERVAL_DAYS', 7)
+    monkeypatch.setattr(scheduler, 'CRAWL_YIELD_ALPHA', 0.5)
+    instance = KeywordScheduler(state_path=tmp_path / 'crawl_schedule.json', quota=5, published_urls=[])
+    instance.keywords = {
+        'hot': {'yield': 10.0, 'duplicate_rate': 0.1, 'runs': 3, 'last_run': '2026-10-18T00:00:00'},
+        'dry': {'yield': 0.5, 'duplicate_rate': 0.9, 'runs': 3, 'last_run': '2026-10-18T00:00:00'},
+    }
+    return instance
+
+def test_plan_skips_keywords_not_due_and_spends_spare_quota_on_yield(keyword_scheduler):
+    # dry is searched every ceil(2 / 0.5) = 4 days; hot and the unseen keyword are due
+    plan = keyword_scheduler.plan(['dry', 'new', 'hot'], now=NOW)
+
+    assert plan == {'new': 2, 'hot': 3}
+    assert sum(plan.values()) <= keyword_scheduler.quota
+
+def test_plan_gives_first_pages_to_the_best_keywords_when_quota_is_short(keyword_scheduler):
+    keyword_scheduler.quota = 1
+
+    assert keyword_scheduler.plan(['new', 'hot'], now=NOW) == {'hot': 1}
+
+def test_plan_makes_overdue_keywords_due_again(keyword_scheduler):
+    keyword_scheduler.keywords['dry']['last_run'] = '2026-10-14T00:00:00'
+
+    assert 'dry' in keyword_scheduler.plan(['dry'], now=NOW)
+
+def test_record_folds_yield_into_moving_average(keyword_scheduler):
+    keyword_scheduler.record('hot', requests_made=2, results=20, new_urls=4, now=NOW)
+    keyword_scheduler.record('new', requests_made=1, results=10, new_urls=6, now=NOW)
+    keyword_scheduler.record('dry', requests_made=0, results=0, new_urls=0, now=NOW)
+
+    assert keyword_scheduler.keywords['hot']['yield'] == 6.0
+    assert keyword_scheduler.keywords['new']['yield'] == 6.0
+    assert keyword_scheduler.keywords['new']['duplicate_rate'] == 0.4
+    assert keyword_scheduler.keywords['dry']['runs'] == 3
+
+def test_published_urls_are_not_new(tmp_path, monkeypatch):
+    monkeypatch.setattr(scheduler, 'STATE_DIR', tmp_path)
+    instance = KeywordScheduler(state_path=tmp_path / 'crawl_schedule.json', published_urls=['https://a.example/post/'])
+
+    assert not instance.is_new('https://a.example/post')
+    assert instance.is_new('https://b.example/post')
+    instance.mark_seen('https://b.example/post')
+    assert not instance.is_new('https://b.example/post')
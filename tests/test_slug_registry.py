@@ -0,0 +1,59 @@
+import json
+from slug_registry import SlugRegistry
+
+def test_claim_appends_the_lowest_free_suffix(tmp_path):
+    registry = SlugRegistry(tmp_path)
+
+    assert [registry.claim('gpu-news') for _ in range(3)] == ['gpu-news', 'gpu-news-1', 'gpu-news-2']
+    assert registry.claim('other') == 'other'
+
+def test_claim_sees_pages_in_unindexed_run_directories(tmp_path):
+    run_dir = tmp_path / '20261018'
+    run_dir.mkdir()
+    (run_dir / '20261018-gpu-news.md').write_text('---\n---\n')
+    (run_dir / 'notes.txt').write_text('')
+
+    registry = SlugRegistry(tmp_path)
+
+    assert 'gpu-news' in registry
+    assert registry.claim('gpu-news') == 'gpu-news-1'
+    assert registry.runs == {'20261018'}
+
+def test_release_frees_a_failed_claim(tmp_path):
+    registry = SlugRegistry(tmp_path)
+    slug = registry.claim('broken')
+
+    registry.release(slug)
+
+    assert 'broken' not in registry
+    assert registry.claim('broken') == 'broken'
+
+def test_each_run_writes_only_its_own_shard(tmp_path):
+    registry = SlugRegistry(tmp_path)
+    registry.assign(registry.claim('gpu-news'), '20261019_060000/20261019-gpu-news.md')
+    registry.add_run('20261019_060000')
+
+    assert registry.save() == [str(tmp_path / '_index' / 'slugs' / '20261019_060000.json')]
+    assert json.loads((tmp_path / '_index' / 'slugs' / '20261019_060000.json').read_text(encoding='utf-8')) == \
+        {'gpu-news': '20261019_060000/20261019-gpu-news.md'}
+    assert registry.save() == []
+
+    next_run = SlugRegistry(tmp_path)
+    next_run.assign(next_run.claim('gpu-news'), '20261020_060000/20261020-gpu-news-1.md')
+    next_run.add_run('20261020_060000')
+
+    assert next_run.save() == [str(tmp_path / '_index' / 'slugs' / '20261020_060000.json')]
+    assert json.loads((tmp_path / '_index' / 'slugs' / '20261019_060000.json').read_text(encoding='utf-8')) == \
+        {'gpu-news': '20261019_060000/20261019-gpu-news.md'}
+    assert SlugRegistry(tmp_path).claim('gpu-news') == 'gpu-news-2'
+
+def test_legacy_single_file_index_is_still_read(tmp_path):
+    (tmp_path / '_index').mkdir()
+    (tmp_path / '_index' / 'slugs.json').write_text(json.dumps({
+        'runs': ['20261018_060000'], 'slugs': {'gpu-news': '20261018_060000/20261018-gpu-news.md'}
+    }))
+
+    registry = SlugRegistry(tmp_path)
+
+    assert registry.claim('gpu-news') == 'gpu-news-1'
+    assert '20261018_060000' in registry.runs
@@ -0,0 +1,82 @@
+import numpy as np
+import pytest
+from bench_vector_index import synthetic_corpus, make_queries
+from vector_index import VectorIndex
+
+def build(vectors, quantization='none', **kwargs):
+    index = VectorIndex(quantization=quantization, **kwargs)
+    ids = [str(i) for i in range(len(vectors))]
+    index.upsert(ids, vectors, [{'title': f"doc {i}"} for i in ids])
+    return index
+
+def test_search_returns_top_k_by_cosine_similarity():
+    index = build([[1, 0, 0], [0.9, 0.1, 0], [0, 1, 0], [0, 0, 1]])
+
+    results = index.search([1, 0, 0], limit=2)
+
+    assert [result['id'] for result in results] == ['0', '1']
+    assert results[0]['similarity'] == pytest.approx(1.0)
+    assert results[0]['title'] == 'doc 0'
+
+def test_search_stops_below_threshold():
+    index = build([[1, 0, 0], [0.9, 0.1, 0], [0, 1, 0]])
+
+    results = index.search([1, 0, 0], limit=3, threshold=0.5)
+
+    assert [result['id'] for result in results] == ['0', '1']
+
+def test_upsert_overwrites_existing_ids():
+    index = build([[1, 0], [0, 1]])
+    index.upsert(['0'], [[0, 1]], [{'title': 'moved'}])
+
+    assert len(index) == 2
+    assert index.search([0, 1], limit=1)[0]['similarity'] == pytest.approx(1.0)
+
+def test_dimension_mismatch_fails_fast():
+    index = build([[1, 0, 0]])
+
+    with pytest.raises(ValueError):
+        index.search([1, 0])
+    with pytest.raises(ValueError):
+        index.upsert(['x'], [[1, 0]], [{}])
+
+def test_int8_rerank_matches_exact_search():
+    corpus = synthetic_corpus(2000, 64)
+    queries = make_queries(corpus, 20)
+    exact = build(corpus)
+    quantized = build(corpus, quantization='int8', rerank_factor=4)
+
+    for query in queries:
+        expected = exact.search(query, limit=10, threshold=-1.0)
+        results = quantized.search(query, limit=10, threshold=-1.0)
+        assert [result['id'] for result in results] == [result['id'] for result in expected]
+        # Reranked scores are exact, not the int8 approximations
+        assert [result['similarity'] for result in results] == pytest.approx([result['similarity'] for result in expected])
+
+def test_int8_batch_search_matches_single_queries():
+    corpus = synthetic_corpus(500, 32)
+    queries = make_queries(corpus, 5)
+    index = build(corpus, quantization='int8')
+
+    batch = index.search_batch(queries, limit=5, threshold=-1.0)
+
+    assert [[result['id'] for result in results] for results in batch] == \
+        [[result['id'] for result in index.search(query, limit=5, threshold=-1.0)] for query in queries]
+
+def test_quantize_round_trips_within_one_step():
+    vectors = np.random.default_rng(0).normal(size=(10, 16)).astype(np.float32)
+
+    codes, scales = VectorIndex.quantize(vectors)
+
+    assert codes.dtype == np.int8
+    assert np.all(np.abs(codes * scales[:, None] - vectors) <= scales[:, None] / 2 + 1e-6)
+
+def test_upsert_keeps_the_last_copy_of_a_repeated_id():
+    index = VectorIndex(quantization='int8')
+    index.upsert(['a', 'b', 'a'], [[1, 0], [0, 1], [1, 1]], [{'title': 'old'}, {'title': 'b'}, {'title': 'new'}])
+
+    assert sorted(index.ids) == ['a', 'b']
+    assert len(index.matrix) == len(index.codes) == 2
+    result = index.search([1, 1], limit=1)[0]
+    assert (result['id'], result['title']) == ('a', 'new')
+    assert result['similarity'] == pytest.approx(1.0)